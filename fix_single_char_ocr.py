@@ -4,13 +4,17 @@
 แก้ปัญหาเฉพาะ Single Character Recognition
 """
 
-import os
+import sys
 import subprocess
 import json
 from pathlib import Path
 from datetime import datetime
 import logging
 
+sys.path.append(str(Path(__file__).parent / "scripts" / "ml"))
+from thai_ocr_predictor import ThaiOCRPredictor
+from infer_rec_runner import DEFAULT_TIMEOUT, InferRecRunner
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,8 @@ class SingleCharOCRFixer:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.backend = "predictor"  # หรือ "subprocess": เรียก infer_rec.py ครั้งเดียวกับทุกภาพ
+        self.timeout = DEFAULT_TIMEOUT
         
     def fix_issue_1_correct_config(self):
         """🔧 Issue 1: สร้าง config ที่ถูกต้องสำหรับ single character"""
@@ -104,8 +110,8 @@ Metric:
             else:
                 logger.error(f"  ❌ {file}: ไม่พบไฟล์")
     
-    def fix_issue_3_test_single_images(self, config_path):
-        """🔧 Issue 3: ทดสอบกับภาพเดี่ยวๆ เพื่อดูปัญหา"""
+    def fix_issue_3_test_single_images(self, config_path, max_images=None):
+        """🔧 Issue 3: ทดสอบกับภาพเดี่ยวๆ เพื่อดูปัญหา (max_images None = ทุกภาพในโฟลเดอร์)"""
         logger.info("🔧 แก้ปัญหา 3: ทดสอบกับภาพเดี่ยวๆ")
         
         # หาภาพทดสอบ
@@ -117,7 +123,7 @@ Metric:
         
         for test_dir in test_dirs:
             if test_dir.exists():
-                images = list(test_dir.glob("*.jpg"))[:3]
+                images = sorted(test_dir.glob("*.jpg"))[:max_images]
                 test_images.extend(images)
                 break
                 
@@ -127,88 +133,48 @@ Metric:
             
         logger.info(f"🧪 ทดสอบกับ {len(test_images)} ภาพ")
         
+        # โหลดโมเดลครั้งเดียว แล้ว predict ทุกภาพใน batch เดียว
+        error = "Empty prediction"
+        try:
+            if self.backend == "subprocess":
+                runner = InferRecRunner(self.project_root / "PaddleOCR", config_path, timeout=self.timeout)
+                predictions = runner.predict(test_images)
+                error = runner.last_error or error
+            else:
+                with ThaiOCRPredictor.from_config(config_path, self.project_root / "models/sagemaker_trained/best_model",
+                                                  base_dir=self.project_root / "PaddleOCR") as predictor:
+                    predictions = predictor.predict(test_images)
+        except Exception as e:
+            logger.error(f"  ❌ Exception: {e}")
+            return [{"image": img_path.name, "error": str(e), "success": False} for img_path in test_images]
+        
         results = []
-        for img_path in test_images:
+        for img_path, (predicted_text, confidence) in zip(test_images, predictions):
             logger.info(f"📷 ทดสอบ: {img_path.name}")
             
-            # รัน inference
-            cmd = [
-                "python", "PaddleOCR/tools/infer_rec.py",
-                "-c", os.path.relpath(config_path, self.project_root / "PaddleOCR"),
-                "-o", f"Global.infer_img={os.path.relpath(img_path, self.project_root / 'PaddleOCR')}"
-            ]
-            
-            try:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    cwd=str(self.project_root / "PaddleOCR"),
-                    timeout=30
-                )
+            # สำหรับ single character เอาแค่ตัวแรก
+            if predicted_text:
+                single_char = predicted_text[0]
                 
-                if result.returncode == 0 and "result:" in result.stdout:
-                    # แยกผลลัพธ์
-                    for line in result.stdout.split('\n'):
-                        if "result:" in line:
-                            predicted = line.split("result:")[1].strip()
-                            
-                            # ทำความสะอาดผลลัพธ์
-                            if ' ' in predicted:
-                                # แยก text และ confidence
-                                parts = predicted.rsplit(' ', 1)
-                                predicted_text = parts[0].strip()
-                                try:
-                                    confidence = float(parts[1])
-                                except:
-                                    confidence = 0.0
-                            else:
-                                predicted_text = predicted
-                                confidence = 0.0
-                            
-                            # สำหรับ single character เอาแค่ตัวแรก
-                            if predicted_text:
-                                single_char = predicted_text[0]
-                                
-                                result_data = {
-                                    "image": img_path.name,
-                                    "raw_prediction": predicted,
-                                    "predicted_text": predicted_text,
-                                    "single_char": single_char,
-                                    "confidence": confidence,
-                                    "success": True
-                                }
-                                
-                                results.append(result_data)
-                                logger.info(f"  ✅ ผลลัพธ์: '{single_char}' (เต็ม: '{predicted_text}') | Conf: {confidence:.6f}")
-                                break
-                else:
-                    error_data = {
-                        "image": img_path.name,
-                        "error": result.stderr if result.stderr else "No result found",
-                        "stdout": result.stdout,
-                        "success": False
-                    }
-                    results.append(error_data)
-                    logger.warning(f"  ❌ ล้มเหลว: {error_data['error'][:50]}...")
-                    
-            except subprocess.TimeoutExpired:
-                timeout_data = {
+                result_data = {
                     "image": img_path.name,
-                    "error": "Timeout (30s)",
-                    "success": False
+                    "raw_prediction": f"{predicted_text} {confidence}",
+                    "predicted_text": predicted_text,
+                    "single_char": single_char,
+                    "confidence": confidence,
+                    "success": True
                 }
-                results.append(timeout_data)
-                logger.warning(f"  ⏱️ Timeout: {img_path.name}")
                 
-            except Exception as e:
-                exception_data = {
+                results.append(result_data)
+                logger.info(f"  ✅ ผลลัพธ์: '{single_char}' (เต็ม: '{predicted_text}') | Conf: {confidence:.6f}")
+            else:
+                error_data = {
                     "image": img_path.name,
-                    "error": str(e),
+                    "error": error,
                     "success": False
                 }
-                results.append(exception_data)
-                logger.error(f"  ❌ Exception: {e}")
+                results.append(error_data)
+                logger.warning(f"  ❌ ล้มเหลว: {error_data['error']}")
         
         return results
     
@@ -322,7 +288,18 @@ Metric:
         return summary
 
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="🔧 Fix Single Character OCR Issues")
+    parser.add_argument("--backend", choices=["predictor", "subprocess"], default="predictor",
+                        help="predictor: Paddle Inference in-process; subprocess: one infer_rec.py call for all images")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Overall timeout in seconds for --backend subprocess")
+    args = parser.parse_args()
+    
     fixer = SingleCharOCRFixer()
+    fixer.backend = args.backend
+    fixer.timeout = args.timeout
     result = fixer.run_comprehensive_test()
     
     print(f"\n🎯 สถานะ: {'✅ สำเร็จ' if result['test_results']['success_rate'] > 0 else '❌ ต้องแก้ไขเพิ่มเติม'}")
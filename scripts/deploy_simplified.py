@@ -15,6 +15,9 @@ import base64
 from pathlib import Path
 from botocore.exceptions import ClientError
 
+# Local caches next to the data (label_index.py / compiled_dictionary.py sidecars); rebuilt on demand, never uploaded
+SKIP_SUFFIXES = {'.idx', '.trie'}
+
 def setup_logging():
     """Setup logging"""
     logging.basicConfig(
@@ -95,7 +98,7 @@ def upload_training_data(bucket_name):
     total_count = 0
     
     for file_path in data_dir.rglob('*'):
-        if file_path.is_file():
+        if file_path.is_file() and file_path.suffix not in SKIP_SUFFIXES:
             relative_path = file_path.relative_to(data_dir)
             s3_key = f"data/training/{relative_path}".replace('\\', '/')
             
@@ -19,6 +19,7 @@ class EasySingleCharTraining:
         self.setup_logging()
         self.project_root = Path(__file__).parent.parent
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.images_s3_uri = None
         
     def setup_logging(self):
         logging.basicConfig(
@@ -61,28 +62,35 @@ class EasySingleCharTraining:
             
         self.logger.info(f"✅ พบ dataset: {latest_dataset.name}")
         
-        # แปลงเป็น single character format
-        train_data_dir = latest_dataset / "train_data/rec"
-        single_char_dir = self.project_root / f"thai-letters/datasets/single_char_{self.timestamp}/train_data/rec"
-        single_char_dir.mkdir(parents=True, exist_ok=True)
+        # สร้าง overlay dataset: label แบบ single character + อ้างอิงภาพของ dataset ต้นทาง (ไม่คัดลอกภาพ)
+        sys.path.append(str(self.project_root / "thai-letters"))
+        from overlay_dataset import create_overlay
         
-        # คัดลอกข้อมูลและแก้ไข label files เป็น single character
-        import shutil
-        
-        # คัดลอก images
-        if (train_data_dir / "thai_data").exists():
-            shutil.copytree(train_data_dir / "thai_data", single_char_dir / "thai_data")
+        s3_bucket = "paddleocr-dev-data-bucket"
+        s3_prefix = f"data/single_char_{self.timestamp}"
+        images_s3_uri = f"s3://{s3_bucket}/data/images/{latest_dataset.name}/"
         
-        # แก้ไข label files เป็น single character
-        self._convert_to_single_char_labels(train_data_dir, single_char_dir)
+        self.logger.info("🔧 แปลง labels เป็น single character (overlay)...")
+        create_overlay(latest_dataset, output_dir, [{"first_char": True}],
+                       dict_path=self.project_root / "thai-letters/th_dict.txt",
+                       images_s3_uri=images_s3_uri)
+        single_char_dir = output_dir / "train_data"
         
-        # คัดลอก dictionary
-        shutil.copy(self.project_root / "thai-letters/th_dict.txt", single_char_dir / "th_dict.txt")
+        # อัปโหลดภาพของ dataset ต้นทางครั้งเดียว (sync ข้ามไฟล์ที่มีอยู่แล้ว ทุก variant ใช้ร่วมกัน)
+        self.logger.info(f"📤 อัปโหลดภาพไป {images_s3_uri}")
+        cmd = [
+            "aws", "s3", "sync",
+            str(latest_dataset / "train_data/rec/thai_data"),
+            f"{images_s3_uri}thai_data/",
+            "--quiet"
+        ]
         
-        # อัปโหลดไป S3
-        s3_bucket = "paddleocr-dev-data-bucket"
-        s3_prefix = f"data/single_char_{self.timestamp}"
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"❌ อัปโหลดภาพไป S3 ล้มเหลว: {result.stderr}")
+        self.images_s3_uri = images_s3_uri
         
+        # อัปโหลดเฉพาะ overlay (labels + dictionary + overlay.json)
         self.logger.info(f"📤 อัปโหลดข้อมูลไป s3://{s3_bucket}/{s3_prefix}/")
         
         cmd = [
@@ -99,35 +107,6 @@ class EasySingleCharTraining:
         self.logger.info("✅ อัปโหลดข้อมูลเสร็จสิ้น")
         return s3_bucket, s3_prefix
     
-    def _convert_to_single_char_labels(self, source_dir, target_dir):
-        """แปลง label files เป็น single character"""
-        self.logger.info("🔧 แปลง labels เป็น single character...")
-        
-        label_files = ["rec_gt_train.txt", "rec_gt_val.txt"]
-        
-        for label_file in label_files:
-            source_file = source_dir / label_file
-            target_file = target_dir / label_file
-            
-            if source_file.exists():
-                with open(source_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                
-                single_char_lines = []
-                for line in lines:
-                    line = line.strip()
-                    if '\t' in line:
-                        img_path, text = line.split('\t', 1)
-                        # เอาแค่ตัวอักษรแรก
-                        if text:
-                            first_char = text[0]
-                            single_char_lines.append(f"{img_path}\t{first_char}\n")
-                
-                with open(target_file, 'w', encoding='utf-8') as f:
-                    f.writelines(single_char_lines)
-                    
-                self.logger.info(f"✅ แปลง {label_file}: {len(single_char_lines)} samples")
-
     def step_2_create_single_char_config(self):
         """⚙️ Step 2: สร้าง single character training config"""
         self.logger.info("🎯 Step 2: สร้าง Single Character Training Configuration")
@@ -189,8 +168,8 @@ class EasySingleCharTraining:
             "Train": {
                 "dataset": {
                     "name": "SimpleDataSet",
-                    "data_dir": "/opt/ml/input/data/training/",
-                    "label_file_list": ["/opt/ml/input/data/training/rec_gt_train.txt"],
+                    "data_dir": "/opt/ml/input/data/images/",
+                    "label_file_list": ["/opt/ml/input/data/training/rec/rec_gt_train.txt"],
                     "transforms": [
                         {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
                         {"CTCLabelEncode": {}},
@@ -208,8 +187,8 @@ class EasySingleCharTraining:
             "Eval": {
                 "dataset": {
                     "name": "SimpleDataSet", 
-                    "data_dir": "/opt/ml/input/data/training/",
-                    "label_file_list": ["/opt/ml/input/data/training/rec_gt_val.txt"],
+                    "data_dir": "/opt/ml/input/data/images/",
+                    "label_file_list": ["/opt/ml/input/data/training/rec/rec_gt_val.txt"],
                     "transforms": [
                         {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
                         {"CTCLabelEncode": {}},
@@ -260,7 +239,17 @@ class EasySingleCharTraining:
                         'S3DataDistributionType': 'FullyReplicated'
                     }
                 }
-            }],
+            }] + ([{
+                # ภาพของ dataset ต้นทางสำหรับ overlay dataset
+                'ChannelName': 'images',
+                'DataSource': {
+                    'S3DataSource': {
+                        'S3DataType': 'S3Prefix',
+                        'S3Uri': self.images_s3_uri,
+                        'S3DataDistributionType': 'FullyReplicated'
+                    }
+                }
+            }] if self.images_s3_uri else []),
             'OutputDataConfig': {
                 'S3OutputPath': f's3://{s3_bucket}/models/'
             },
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔎 Lexicon-constrained CTC Beam Search
+ถอดรหัส output ของ CTC head ทีละ batch ด้วย prefix beam search ที่จำกัดผลให้อยู่ใน lexicon
+(trie ของคำจาก thai_corpus.txt) แทน greedy CTCLabelDecode
+
+- ทำงานกับทั้ง batch พร้อมกัน: beam ทุกภาพเก็บใน array (N, beam_width) เดียว
+- ต่อ timestep ขยาย beam ด้วยเฉพาะ top-k class ที่น่าจะเป็นที่สุด
+- สถานะของ prefix คือ node ใน trie: class ที่เดินต่อจาก node ไม่ได้ถูกตัดทิ้งทันที
+  prefix ที่ได้ข้อความเดียวกันจะถูกรวมความน่าจะเป็น (blank / non-blank) เป็น beam เดียว
+- แยกเวลาถอดรหัสออกจากเวลา forward ของ network (decode_timed)
+
+Class id ของ CTC: 0 = blank, i + 1 = entry i ของ dictionary (use_space_char: " " ต่อท้าย)
+
+ใช้งาน:
+    python scripts/ml/ctc_beam_search.py --logits probs.npy --beam-width 10
+    python scripts/ml/ctc_beam_search.py --labels <rec_gt_val.txt> --beam-width 10 --noise 0.3
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import read_dictionary
+
+DEFAULT_LEXICON = "thai-letters/thai_corpus.txt"
+DEFAULT_BEAM_WIDTH = 10
+DEFAULT_TOP_K = 8
+INPUT_TYPES = ["probs", "logits", "log_probs"]
+
+_NEG_INF = -np.inf
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix64(z: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer (ใช้เป็น key ของ prefix)"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def read_lexicon(lexicon_file: Path) -> List[str]:
+    """อ่านคำจาก lexicon ทีละบรรทัด"""
+    with open(lexicon_file, 'r', encoding='utf-8') as f:
+        return [word for word in (line.strip() for line in f) if word]
+
+
+def to_log_probs(outputs: np.ndarray, input_type: str = "probs") -> np.ndarray:
+    """แปลง output ของ head (N, T, C) เป็น log probability (float32)"""
+    outputs = np.asarray(outputs, dtype=np.float32)
+    if input_type == "log_probs":
+        return outputs
+    if input_type == "logits":
+        shifted = outputs - outputs.max(axis=-1, keepdims=True)
+        return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+    with np.errstate(divide='ignore'):
+        return np.log(outputs)
+
+
+class BeamResult(NamedTuple):
+    text: str
+    score: float        # log P(text | ภาพ) รวมทุก alignment ที่อยู่ใน beam (ลดลงตามความยาวข้อความ)
+    in_lexicon: bool    # False = ไม่มี beam ที่จบที่คำใน lexicon (คืน beam ที่ดีที่สุดแทน)
+    confidence: float   # prob เฉลี่ยของ class ที่ beam ปล่อยออกมา ณ timestep นั้น (แบบ CTCLabelDecode, ไม่มี = 0)
+
+
+class LexiconTrie:
+    """Trie ของ codepoint แบบตาราง dense: trans[node, alphabet index] -> child
+
+    node สุดท้าย (dead) ใช้แทน "เดินต่อไม่ได้" และเดินจาก dead ได้ dead เสมอ
+    """
+
+    def __init__(self, words: Iterable[str]):
+        children = [{}]
+        terminal = [False]
+        for word in words:
+            node = 0
+            for ch in word:
+                child = children[node].get(ch)
+                if child is None:
+                    child = len(children)
+                    children[node][ch] = child
+                    children.append({})
+                    terminal.append(False)
+                node = child
+            terminal[node] = True
+
+        self.alphabet = sorted({ch for edges in children for ch in edges})
+        self.index = {ch: i for i, ch in enumerate(self.alphabet)}
+        self.nodes = len(children)
+        self.dead = self.nodes
+        # คอลัมน์สุดท้าย = codepoint ที่ไม่อยู่ใน lexicon
+        self.trans = np.full((self.nodes + 1, len(self.alphabet) + 1), self.dead, dtype=np.int32)
+        for node, edges in enumerate(children):
+            for ch, child in edges.items():
+                self.trans[node, self.index[ch]] = child
+        self.terminal = np.zeros(self.nodes + 1, dtype=bool)
+        self.terminal[:self.nodes] = terminal
+
+    def class_paths(self, units: List[str]) -> np.ndarray:
+        """codepoint ของแต่ละ class เป็น alphabet index (C, ความยาวสูงสุด), -1 = เติมท้าย"""
+        width = max(1, max((len(unit) for unit in units), default=1))
+        outside = len(self.alphabet)
+        paths = np.full((len(units), width), -1, dtype=np.int32)
+        for c, unit in enumerate(units):
+            if not unit:
+                paths[c, 0] = outside  # entry ว่าง (บรรทัดแรกของ th_dict.txt) ไม่เคยเป็นผลลัพธ์ที่ถูก
+            for j, ch in enumerate(unit):
+                paths[c, j] = self.index.get(ch, outside)
+        return paths
+
+
+class CTCBeamSearchDecoder:
+    """Prefix beam search แบบ vectorized ทั้ง batch พร้อม lexicon constraint"""
+
+    def __init__(self, dict_path: Path, lexicon: Optional[Iterable[str]] = None,
+                 beam_width: int = DEFAULT_BEAM_WIDTH, top_k: int = DEFAULT_TOP_K,
+                 use_space_char: bool = False, word_sequence: bool = False, min_prob: float = 0.0):
+        """
+        Args:
+            lexicon: คำที่อนุญาต (None = ไม่จำกัด, เป็น beam search ธรรมดา)
+            beam_width: จำนวน prefix ที่เก็บต่อภาพต่อ timestep
+            top_k: จำนวน class (ไม่นับ blank) ที่ใช้ขยาย beam ต่อ timestep
+            word_sequence: อนุญาตหลายคำต่อกัน (เริ่มคำใหม่ได้เมื่อจบคำใน lexicon หรือหลังช่องว่าง)
+            min_prob: ไม่ขยายด้วย class ที่ความน่าจะเป็นต่ำกว่านี้
+        """
+        self.beam_width = beam_width
+        self.top_k = top_k
+        self.word_sequence = word_sequence
+        self.log_min_prob = np.log(min_prob) if min_prob > 0 else _NEG_INF
+
+        # class 0 = blank, class i + 1 = entry i (เหมือน CTCLabelDecode)
+        self.characters = [""] + read_dictionary(Path(dict_path), use_space_char)
+        self.num_classes = len(self.characters)
+        self.space_class = self.num_classes - 1 if use_space_char else -1
+
+        self.constrained = lexicon is not None
+        self.trie = LexiconTrie(lexicon if self.constrained else [])
+        self.paths = self.trie.class_paths(self.characters)
+        self.paths[0, :] = -1
+        # codepoint ของแต่ละ class (C, ความยาวสูงสุด) เติม 0 ท้าย: key ของ prefix คิดจากข้อความที่ได้
+        width = max(1, max(len(unit) for unit in self.characters))
+        self.codepoints = np.zeros((self.num_classes, width), dtype=np.uint64)
+        for c, unit in enumerate(self.characters):
+            self.codepoints[c, :len(unit)] = [ord(ch) for ch in unit]
+        self.last_decode_ms = 0.0
+
+    @classmethod
+    def from_files(cls, dict_path: Path, lexicon_file: Optional[Path] = DEFAULT_LEXICON, **kwargs):
+        lexicon = read_lexicon(Path(lexicon_file)) if lexicon_file else None
+        return cls(dict_path, lexicon, **kwargs)
+
+    def _walk(self, node: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        """node ใน trie หลังต่อ class (broadcast), dead = ต่อไม่ได้"""
+        if not self.constrained:
+            return np.zeros(np.broadcast(node, classes).shape, dtype=np.int32)
+        trans, paths = self.trie.trans, self.paths[classes]
+        node = np.broadcast_to(node, classes.shape)
+        for j in range(paths.shape[-1]):
+            step = paths[..., j]
+            node = np.where(step >= 0, trans[node, step], node)
+        return node
+
+    def _prefix_key(self, key: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        """key ของ prefix หลังต่อ class: hash ต่อกันทีละ codepoint ที่ class นั้นให้
+
+        "ก็" ที่เป็น entry เดียว กับ "ก" + "็" จึงได้ key เดียวกันและถูกรวมเป็น beam เดียว
+        """
+        codepoints = self.codepoints[classes]
+        key = np.broadcast_to(key, classes.shape)
+        for j in range(codepoints.shape[-1]):
+            step = codepoints[..., j]
+            key = np.where(step > 0, _mix64(key ^ (step * _GOLDEN)), key)
+        return key
+
+    def _extend(self, node: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        nxt = self._walk(node, classes)
+        if self.constrained and self.word_sequence:
+            # จบคำแล้ว: เริ่มคำใหม่จาก root หรือข้ามช่องว่างกลับไปที่ root
+            ended = self.trie.terminal[node]
+            restart = self._walk(np.zeros_like(node), classes)
+            nxt = np.where((nxt == self.trie.dead) & ended, restart, nxt)
+            if self.space_class >= 0:
+                nxt = np.where((classes == self.space_class) & ended, 0, nxt)
+        return nxt
+
+    def decode(self, outputs: np.ndarray, input_type: str = "probs") -> List[BeamResult]:
+        """ถอดรหัส output ของ head ทั้ง batch (N, T, C)"""
+        started = time.perf_counter()
+        log_probs = to_log_probs(outputs, input_type)
+        if log_probs.ndim == 2:
+            log_probs = log_probs[None]
+        n, steps, classes = log_probs.shape
+        if classes != self.num_classes:
+            raise ValueError(f"output has {classes} classes, dictionary gives {self.num_classes}")
+
+        width = self.beam_width
+        k = min(self.top_k, classes - 1)
+        items = np.arange(n)
+
+        # beam เริ่มต้น: prefix ว่างที่ root (ช่องอื่นว่าง = -inf)
+        key = np.zeros((n, width), dtype=np.uint64)
+        node = np.zeros((n, width), dtype=np.int32)
+        last = np.zeros((n, width), dtype=np.int32)
+        pb = np.full((n, width), _NEG_INF, dtype=np.float32)
+        pnb = np.full((n, width), _NEG_INF, dtype=np.float32)
+        pb[:, 0] = 0.0
+
+        parents = np.zeros((steps, n, width), dtype=np.int32)
+        emits = np.zeros((steps, n, width), dtype=np.int32)
+        beam_ids = np.broadcast_to(np.arange(width, dtype=np.int32), (n, width))
+
+        for t in range(steps):
+            lp = log_probs[:, t]
+            # top-k class ที่ไม่ใช่ blank
+            top = np.argpartition(-lp[:, 1:], k - 1, axis=1)[:, :k] + 1
+            lp_top = np.take_along_axis(lp, top, axis=1)
+
+            total = np.logaddexp(pb, pnb)
+            alive = total > _NEG_INF
+
+            # 1) prefix เดิม: ต่อด้วย blank หรือซ้ำตัวสุดท้าย (CTC ยุบตัวซ้ำ)
+            stay_pb = total + lp[:, :1]
+            stay_pnb = np.where(last > 0, pnb + np.take_along_axis(lp, last, axis=1), _NEG_INF)
+
+            # 2) ต่อ prefix ด้วย class ใหม่ (N, B, K)
+            cls = np.broadcast_to(top[:, None, :], (n, width, k))
+            ext_node = self._extend(node[:, :, None], cls)
+            same = cls == last[:, :, None]
+            # ตัวเดียวกับตัวสุดท้ายต้องมี blank คั่น จึงต่อได้จาก pb เท่านั้น
+            ext_pnb = np.where(same, pb[:, :, None], total[:, :, None]) + lp_top[:, None, :]
+            ok = (ext_node != self.trie.dead) & alive[:, :, None] & (lp_top[:, None, :] >= self.log_min_prob)
+            ext_key = self._prefix_key(key[:, :, None], cls)
+
+            # รวม candidate ทั้งหมดที่ยังมีชีวิตเป็น array แบน
+            stay_ok = alive
+            c_item = np.concatenate([np.broadcast_to(items[:, None], (n, width))[stay_ok],
+                                     np.broadcast_to(items[:, None, None], (n, width, k))[ok]])
+            c_key = np.concatenate([key[stay_ok], ext_key[ok]])
+            c_node = np.concatenate([node[stay_ok], ext_node[ok]])
+            c_last = np.concatenate([last[stay_ok], cls[ok]])
+            c_pb = np.concatenate([stay_pb[stay_ok], np.full(int(ok.sum()), _NEG_INF, dtype=np.float32)])
+            c_pnb = np.concatenate([stay_pnb[stay_ok], ext_pnb[ok]])
+            c_parent = np.concatenate([beam_ids[stay_ok],
+                                       np.broadcast_to(beam_ids[:, :, None], (n, width, k))[ok]])
+            c_emit = np.concatenate([np.full(int(stay_ok.sum()), -1, dtype=np.int32), cls[ok]])
+            c_score = np.logaddexp(c_pb, c_pnb)
+
+            # prefix เดียวกัน (ภาพเดียวกัน + key เดียวกัน) รวมเป็น beam เดียว
+            order = np.lexsort((-c_score, c_key, c_item))
+            g_item, g_key = c_item[order], c_key[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (g_item[1:] != g_item[:-1]) | (g_key[1:] != g_key[:-1])
+            starts = np.nonzero(first)[0]
+            rep = order[starts]
+            g_pb = np.logaddexp.reduceat(c_pb[order], starts)
+            g_pnb = np.logaddexp.reduceat(c_pnb[order], starts)
+            g_score = np.logaddexp(g_pb, g_pnb)
+            g_item = g_item[starts]
+
+            # เก็บ beam_width อันดับแรกของแต่ละภาพ
+            rank_order = np.lexsort((-g_score, g_item))
+            ranked_item = g_item[rank_order]
+            item_start = np.searchsorted(ranked_item, ranked_item, side='left')
+            rank = np.arange(len(rank_order)) - item_start
+            keep = rank < width
+            sel, slot, row = rank_order[keep], rank[keep], ranked_item[keep]
+            src = rep[sel]
+
+            key = np.zeros((n, width), dtype=np.uint64)
+            node = np.full((n, width), self.trie.dead, dtype=np.int32)
+            last = np.zeros((n, width), dtype=np.int32)
+            pb = np.full((n, width), _NEG_INF, dtype=np.float32)
+            pnb = np.full((n, width), _NEG_INF, dtype=np.float32)
+            key[row, slot] = c_key[src]
+            node[row, slot] = c_node[src]
+            last[row, slot] = c_last[src]
+            pb[row, slot] = g_pb[sel]
+            pnb[row, slot] = g_pnb[sel]
+            parents[t, row, slot] = c_parent[src]
+            emits[t, row, slot] = c_emit[src]
+
+        results = self._finish(log_probs, key, node, pb, pnb, parents, emits)
+        self.last_decode_ms = (time.perf_counter() - started) * 1000
+        return results
+
+    def _finish(self, log_probs, key, node, pb, pnb, parents, emits) -> List[BeamResult]:
+        """เลือก beam ที่ดีที่สุดที่จบเป็นคำ แล้วย้อน back-pointer เป็นข้อความ"""
+        n = key.shape[0]
+        items = np.arange(n)
+        score = np.logaddexp(pb, pnb)
+        if self.constrained:
+            complete = np.where(self.trie.terminal[node], score, _NEG_INF)
+        else:
+            complete = score
+        in_lexicon = complete.max(axis=1) > _NEG_INF
+        best = np.where(in_lexicon, complete.argmax(axis=1), score.argmax(axis=1))
+        best_score = score[items, best]
+
+        beam = best
+        emitted = np.zeros((parents.shape[0], n), dtype=np.int32)
+        for t in range(parents.shape[0] - 1, -1, -1):
+            emitted[t] = emits[t, items, beam]
+            beam = parents[t, items, beam]
+
+        # confidence เทียบกับ greedy ได้ (exp(score) เล็กลงเรื่อยๆ ตามความยาวข้อความ)
+        emitted_lp = np.take_along_axis(log_probs, np.maximum(emitted.T, 0)[:, :, None], axis=2)[:, :, 0]
+        mask = emitted.T > 0
+        counts = mask.sum(axis=1)
+        confidence = np.where(mask, np.exp(emitted_lp), 0).sum(axis=1) / np.maximum(counts, 1)
+
+        results = []
+        for i in range(n):
+            classes = emitted[:, i]
+            text = "".join(self.characters[c] for c in classes[classes > 0])
+            results.append(BeamResult(text, float(best_score[i]), bool(in_lexicon[i]), float(confidence[i])))
+        return results
+
+    def decode_timed(self, forward: Callable[[np.ndarray], np.ndarray], batch: np.ndarray,
+                     input_type: str = "probs"):
+        """รัน forward ของ network แล้วถอดรหัส โดยจับเวลาแยกกัน
+
+        Returns:
+            (results, {"forward_ms": ..., "decode_ms": ...})
+        """
+        started = time.perf_counter()
+        outputs = forward(batch)
+        forward_ms = (time.perf_counter() - started) * 1000
+        results = self.decode(outputs, input_type)
+        return results, {"forward_ms": forward_ms, "decode_ms": self.last_decode_ms}
+
+
+def greedy_decode(outputs: np.ndarray, characters: List[str]) -> List[str]:
+    """CTC greedy แบบ CTCLabelDecode (ใช้เทียบกับ beam search)"""
+    best = np.asarray(outputs).argmax(axis=-1)
+    keep = best > 0
+    keep[:, 1:] &= best[:, 1:] != best[:, :-1]
+    return ["".join(characters[c] for c in row[mask]) for row, mask in zip(best, keep)]
+
+
+def synthetic_outputs(labels: List[str], decoder: CTCBeamSearchDecoder, steps: int,
+                      noise: float = 0.3, seed: int = 0) -> np.ndarray:
+    """สร้าง softmax output จำลอง (N, T, C) จาก label: path CTC ของ label + noise"""
+    rng = np.random.default_rng(seed)
+    index = {}
+    for c, unit in enumerate(decoder.characters[1:], start=1):
+        if len(unit) == 1:
+            index[unit] = c
+    logits = rng.standard_normal((len(labels), steps, decoder.num_classes)).astype(np.float32) * noise * 3
+    logits[:, :, 0] += 2.0
+    for i, label in enumerate(labels):
+        classes = [index[ch] for ch in label if ch in index][:steps // 2]
+        for j, c in enumerate(classes):
+            t = int((j + 0.5) * steps / max(len(classes), 1))
+            logits[i, t, c] += 6.0
+    return logits
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🔎 Lexicon-constrained CTC beam search")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt", help="Character dictionary of the model")
+    parser.add_argument("--lexicon", type=str, default=DEFAULT_LEXICON,
+                       help="Word list for the trie ('' = unconstrained beam search)")
+    parser.add_argument("--use-space-char", action="store_true", help="Global.use_space_char of the model")
+    parser.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Classes expanded per timestep")
+    parser.add_argument("--min-prob", type=float, default=0.0, help="Skip classes below this probability")
+    parser.add_argument("--word-sequence", action="store_true", help="Allow several lexicon words per image")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--logits", type=str, help=".npy with head outputs (N, T, C)")
+    source.add_argument("--labels", type=str, help="Label file used to simulate head outputs")
+    parser.add_argument("--input-type", type=str, default="probs", choices=INPUT_TYPES)
+    parser.add_argument("--timesteps", type=int, default=25, help="Timesteps of simulated outputs")
+    parser.add_argument("--noise", type=float, default=0.3, help="Noise level of simulated outputs")
+    parser.add_argument("--max-samples", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+
+    args = parser.parse_args()
+
+    decoder = CTCBeamSearchDecoder.from_files(args.dict, args.lexicon or None, beam_width=args.beam_width,
+                                              top_k=args.top_k, use_space_char=args.use_space_char,
+                                              word_sequence=args.word_sequence, min_prob=args.min_prob)
+    print(f"📚 Lexicon trie: {decoder.trie.nodes:,} nodes, {len(decoder.trie.alphabet)} codepoints")
+
+    labels = None
+    input_type = args.input_type
+    if args.logits:
+        outputs = np.load(args.logits)[:args.max_samples]
+    else:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            labels = [line.rstrip('\n').split('\t', 1)[-1] for line in f if line.strip()][:args.max_samples]
+        outputs = synthetic_outputs(labels, decoder, args.timesteps, args.noise)
+        input_type = "logits"
+
+    results, decode_ms = [], 0.0
+    for start in range(0, len(outputs), args.batch_size):
+        results.extend(decoder.decode(outputs[start:start + args.batch_size], input_type))
+        decode_ms += decoder.last_decode_ms
+
+    started = time.perf_counter()
+    greedy = greedy_decode(outputs, decoder.characters)
+    greedy_ms = (time.perf_counter() - started) * 1000
+
+    batches = -(-len(outputs) // args.batch_size)
+    print(f"⏱️ Beam search: {decode_ms / batches:.2f} ms/batch, {decode_ms / len(outputs):.3f} ms/sample "
+          f"(beam {args.beam_width}, top-k {args.top_k}, batch {args.batch_size})")
+    print(f"⏱️ Greedy:      {greedy_ms / len(outputs):.3f} ms/sample")
+    print(f"📖 In lexicon: {sum(r.in_lexicon for r in results)}/{len(results)}")
+    if labels is not None:
+        beam_acc = sum(r.text == label for r, label in zip(results, labels)) / len(labels)
+        greedy_acc = sum(g == label for g, label in zip(greedy, labels)) / len(labels)
+        print(f"🎯 Exact match: beam {beam_acc:.1%} | greedy {greedy_acc:.1%}")
+    for r, g in list(zip(results, greedy))[:5]:
+        print(f"   '{g}' -> '{r.text}' ({r.score:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ Vectorized CTC Greedy Decoder
+CTCLabelDecode แบบทั้ง batch ในครั้งเดียว (ไม่มี loop Python ต่อ sample)
+
+- argmax / ยุบตัวซ้ำ / ตัด blank ด้วย mask ของ array (B, T)
+- id -> ข้อความผ่านตาราง dictionary ที่คอมไพล์ไว้: codepoint ของทุก entry ต่อกัน + offsets
+  ตัวที่เหลือทั้ง batch ถูกกระจายเป็น codepoint ลงเมทริกซ์ (B, L) uint32
+  แล้ว view เป็น numpy unicode '<U{L}' (UCS-4 เดียวกัน จึงไม่ต้องคัดลอก)
+- confidence = ค่าเฉลี่ย prob ของตัวที่เหลือ (เหมือน CTCLabelDecode, ไม่มีตัวเหลือ = 0)
+
+ผลลัพธ์เป็น structured array: text (U), confidence (f4), length (จำนวน token ที่เหลือ)
+
+benchmark เทียบกับ post-processor เดิม (CTCLabelDecode ของ PaddleOCR ถ้า import ได้
+ไม่อย่างนั้นใช้ loop ต่อ sample แบบเดียวกัน) ที่ batch size 1 - 512:
+    python scripts/ml/ctc_greedy_decoder.py --benchmark --batch-sizes 1,8,32,128,512
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import read_dictionary
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128, 512]
+DEFAULT_TIMESTEPS = 25
+BENCHMARK_REPEATS = 20
+
+
+def decoded_dtype(max_length: int) -> np.dtype:
+    return np.dtype([("text", f"<U{max(max_length, 1)}"), ("confidence", "<f4"), ("length", "<i4")])
+
+
+class CTCGreedyDecoder:
+    """greedy decode ทั้ง batch ด้วยตาราง codepoint ของ dictionary"""
+
+    def __init__(self, characters: Sequence[str]):
+        """
+        Args:
+            characters: ตาราง class -> ข้อความ โดย class 0 = blank (เช่น ThaiOCRPredictor.characters)
+        """
+        self.characters = list(characters)
+        encoded = [np.frombuffer(c.encode("utf-32-le"), dtype="<u4") for c in self.characters]
+        self.lengths = np.array([len(e) for e in encoded], dtype=np.int64)
+        self.lengths[0] = 0
+        self.starts = np.zeros(len(encoded), dtype=np.int64)
+        np.cumsum(self.lengths[:-1], out=self.starts[1:])
+        self.codepoints = np.concatenate(encoded[1:] or [np.zeros(0, dtype="<u4")]).astype(np.uint32)
+        self.num_classes = len(self.characters)
+
+    @classmethod
+    def from_dict(cls, dict_path: Path, use_space_char: bool = False) -> "CTCGreedyDecoder":
+        return cls([""] + read_dictionary(Path(dict_path), use_space_char))
+
+    def decode(self, probs: np.ndarray) -> np.ndarray:
+        """probs (B, T, C) -> structured array (B,) [text, confidence, length]"""
+        probs = np.asarray(probs)
+        batch, _, classes = probs.shape
+        if classes != self.num_classes:
+            raise ValueError(f"output has {classes} classes, dictionary gives {self.num_classes}")
+        best = probs.argmax(axis=-1)
+        best_prob = np.take_along_axis(probs, best[..., None], axis=-1)[..., 0]
+        keep = best > 0
+        keep[:, 1:] &= best[:, 1:] != best[:, :-1]
+
+        counts = keep.sum(axis=1)
+        confidence = np.where(keep, best_prob, 0).sum(axis=1, dtype=np.float64) / np.maximum(counts, 1)
+
+        rows, _ = np.nonzero(keep)
+        ids = best[keep]
+        lengths = self.lengths[ids]
+        text_lengths = np.bincount(rows, weights=lengths, minlength=batch).astype(np.int64)
+        total = int(lengths.sum())
+
+        # codepoint ลำดับที่ k ของผลรวม: entry ของมัน (repeat) + ตำแหน่งภายใน entry
+        token_of = np.repeat(np.arange(len(ids)), lengths)
+        token_start = np.cumsum(lengths) - lengths
+        within = np.arange(total) - token_start[token_of]
+        codepoints = self.codepoints[self.starts[ids][token_of] + within]
+
+        row_start = np.cumsum(text_lengths) - text_lengths
+        row_of = rows[token_of]
+        width = max(int(text_lengths.max()) if batch else 0, 1)
+        matrix = np.zeros((batch, width), dtype=np.uint32)
+        matrix[row_of, np.arange(total) - row_start[row_of]] = codepoints
+
+        result = np.empty(batch, dtype=decoded_dtype(width))
+        result["text"] = matrix.view(f"<U{width}").reshape(batch)
+        result["confidence"] = confidence
+        result["length"] = counts
+        return result
+
+    def decode_list(self, probs: np.ndarray) -> List[Tuple[str, float]]:
+        """[(text, confidence)] แบบเดียวกับ ThaiOCRPredictor.predict_batch"""
+        decoded = self.decode(probs)
+        return list(zip(decoded["text"].tolist(), decoded["confidence"].astype(np.float64).tolist()))
+
+
+def loop_decode(probs: np.ndarray, characters: Sequence[str]) -> List[Tuple[str, float]]:
+    """post-processor เดิม: CTCLabelDecode.decode ทีละ sample (ใช้เทียบผลและความเร็ว)"""
+    results = []
+    for sample in probs:
+        best = sample.argmax(axis=1)
+        prob = sample.max(axis=1)
+        chars, confs = [], []
+        for t, c in enumerate(best):
+            if c == 0 or (t > 0 and best[t - 1] == c):
+                continue
+            chars.append(characters[c])
+            confs.append(prob[t])
+        results.append(("".join(chars), float(np.mean(confs)) if confs else 0.0))
+    return results
+
+
+def paddleocr_post_processor(dict_path: Path, use_space_char: bool = False,
+                             paddleocr_dir: Path = Path("PaddleOCR")):
+    """CTCLabelDecode ของ PaddleOCR (None ถ้า import ไม่ได้)"""
+    sys.path.append(str(Path(paddleocr_dir).resolve()))
+    try:
+        from ppocr.postprocess.rec_postprocess import CTCLabelDecode
+    except Exception:
+        return None
+    return CTCLabelDecode(character_dict_path=str(dict_path), use_space_char=use_space_char)
+
+
+def random_probs(batch: int, steps: int, classes: int, seed: int = 0) -> np.ndarray:
+    """softmax output จำลอง: blank เด่น + ตัวอักษรสุ่มบางช่วง"""
+    rng = np.random.default_rng(seed)
+    logits = rng.standard_normal((batch, steps, classes)).astype(np.float32)
+    logits[:, :, 0] += 2.0
+    hits = rng.random((batch, steps)) < 0.4
+    logits[hits, rng.integers(1, classes, hits.sum())] += 8.0
+    logits -= logits.max(axis=-1, keepdims=True)
+    probs = np.exp(logits)
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+
+def benchmark(decoder: CTCGreedyDecoder, batch_sizes: Sequence[int], steps: int = DEFAULT_TIMESTEPS,
+              repeats: int = BENCHMARK_REPEATS, reference=None) -> List[dict]:
+    """ms ต่อ batch ของ decoder เทียบกับ reference (callable probs -> [(text, conf)])"""
+    reference = reference or (lambda probs: loop_decode(probs, decoder.characters))
+    rows = []
+    for batch_size in batch_sizes:
+        probs = random_probs(batch_size, steps, decoder.num_classes, seed=batch_size)
+        expected = reference(probs)
+        got = decoder.decode_list(probs)
+        same = all(a[0] == b[0] and abs(a[1] - b[1]) < 1e-5 for a, b in zip(got, expected))
+
+        timings = {}
+        for name, fn in (("reference", reference), ("vectorized", decoder.decode)):
+            fn(probs)
+            started = time.perf_counter()
+            for _ in range(repeats):
+                fn(probs)
+            timings[name] = (time.perf_counter() - started) * 1000 / repeats
+        rows.append({"batch_size": batch_size, "reference_ms": timings["reference"],
+                     "vectorized_ms": timings["vectorized"],
+                     "speedup": timings["reference"] / timings["vectorized"], "identical": same})
+    return rows
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="⚡ Vectorized CTC greedy decoding")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--logits", type=str, default=None, help="Saved head output (N, T, C) .npy to decode")
+    parser.add_argument("--benchmark", action="store_true", help="Compare with the per-sample post-processor")
+    parser.add_argument("--batch-sizes", type=str, default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--timesteps", type=int, default=DEFAULT_TIMESTEPS)
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS)
+    parser.add_argument("--paddleocr-dir", type=str, default="PaddleOCR")
+
+    args = parser.parse_args()
+
+    decoder = CTCGreedyDecoder.from_dict(Path(args.dict), args.use_space_char)
+    if args.logits:
+        decoded = decoder.decode(np.load(args.logits))
+        for i, row in enumerate(decoded[:20]):
+            print(f"   {i}: '{row['text']}' ({row['confidence']:.4f}, {row['length']} tokens)")
+        return
+    if not args.benchmark:
+        parser.error("use --logits or --benchmark")
+
+    reference, name = None, "per-sample loop"
+    post_processor = paddleocr_post_processor(Path(args.dict), args.use_space_char, Path(args.paddleocr_dir))
+    if post_processor is not None:
+        reference, name = (lambda probs: post_processor(probs)), "PaddleOCR CTCLabelDecode"
+
+    print(f"⚡ {decoder.num_classes} classes, {args.timesteps} timesteps; reference: {name}")
+    print(f"   {'batch':>5}  {'reference':>10}  {'vectorized':>10}  {'speedup':>7}  identical")
+    for row in benchmark(decoder, [int(v) for v in args.batch_sizes.split(",")], args.timesteps,
+                         args.repeats, reference):
+        print(f"   {row['batch_size']:>5}  {row['reference_ms']:>8.2f}ms  {row['vectorized_ms']:>8.2f}ms  "
+              f"{row['speedup']:>6.1f}x  {'✅' if row['identical'] else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📏 Bulk Evaluation Metrics (CER / WER / confusion)
+คำนวณ metric ของ recognition ทั้งชุดในครั้งเดียวด้วย rapidfuzz + numpy
+
+- CER: Levenshtein distance ระดับ codepoint ของทุกคู่ด้วย rapidfuzz.process.cpdist (C++, หลาย thread)
+- WER: แต่ละคำ (แยกด้วย whitespace) ถูกแทนด้วย codepoint ใน Private Use Area หนึ่งตัว
+  (vocabulary จาก np.unique ของทุกคำทั้งสองฝั่ง)
+  แล้วใช้ cpdist ตัวเดิม (ระยะระหว่างลำดับคำ = ระยะระหว่างสตริงของ codepoint แทนคำ)
+- exact match, character accuracy ต่อ sample = 1 - distance / max(len)
+- confusion matrix ระดับหน่วยของ dictionary (tokenize ด้วย CompiledDictionary แบบ longest match)
+    * คู่ที่ต่างกัน: Levenshtein alignment (replace / delete / insert) ด้วย DP ของ numpy
+      ทุกคู่ในก้อนเดียวกันพร้อมกัน (ไม่มี loop Python ต่อคู่)
+    * token ของ reference ที่ไม่ถูกแก้ = ทายถูก (เส้นทแยง)
+    * รวมเป็น sparse matrix (COO) ด้วย np.unique ของ (reference, predicted)
+  class พิเศษ: <unk> = codepoint นอก dictionary, <eps> = ช่องว่างของ insert / delete
+- precision / recall ต่อ class จากผลรวมแถว (reference) และคอลัมน์ (predicted)
+
+ใช้งาน:
+    python scripts/ml/eval_metrics.py predictions.tsv                 # image\\tlabel\\tpredicted[\\tconf]
+    python scripts/ml/eval_metrics.py --benchmark 100000
+"""
+
+import sys
+import time
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import CompiledDictionary
+
+DEFAULT_DICT = "thai-letters/th_dict.txt"
+UNK = "<unk>"
+EPS = "<eps>"
+# จำนวนช่องของตาราง DP ต่อก้อนของ confusion_matrix (คุมหน่วยความจำ)
+ALIGN_CELLS = 1 << 22
+# Supplementary Private Use Area-A/B: 131,068 codepoint สำหรับแทนคำหรือ class
+_PUA_RANGES = [(0xF0000, 0xFFFFD), (0x100000, 0x10FFFD)]
+
+
+def _pua(index: np.ndarray) -> np.ndarray:
+    """index -> codepoint ใน PUA"""
+    first = _PUA_RANGES[0][1] - _PUA_RANGES[0][0] + 1
+    return np.where(index < first, _PUA_RANGES[0][0] + index, _PUA_RANGES[1][0] + index - first).astype(np.uint32)
+
+
+def _pua_capacity() -> int:
+    return sum(end - start + 1 for start, end in _PUA_RANGES)
+
+
+def _join(codepoints: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """codepoint ต่อกัน + offsets -> รายการสตริง"""
+    text = codepoints.astype("<u4").tobytes().decode("utf-32-le")
+    return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def edit_distances(predictions: Sequence, references: Sequence, workers: int = -1) -> np.ndarray:
+    """Levenshtein distance ของทุกคู่ (สตริงหรือ list ของ hashable)"""
+    from rapidfuzz.distance import Levenshtein
+    from rapidfuzz.process import cpdist
+    if not len(references):
+        return np.zeros(0, dtype=np.int64)
+    return cpdist(predictions, references, scorer=Levenshtein.distance, workers=workers, dtype=np.int32).astype(np.int64)
+
+
+def word_sequences(predictions: Sequence[str], references: Sequence[str]):
+    """แปลงแต่ละข้อความเป็นสตริงที่ 1 codepoint = 1 คำ (คำเดียวกันได้ codepoint เดียวกัน)"""
+    split = list(map(str.split, chain(predictions, references)))
+    counts = np.fromiter(map(len, split), dtype=np.int64, count=len(split))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    # vocabulary ทั้งสองฝั่งในครั้งเดียว: id ของคำ = ตำแหน่งใน np.unique
+    words = np.array(list(chain.from_iterable(split)), dtype=str)
+    vocab, ids = np.unique(words, return_inverse=True)
+    ids = ids.reshape(-1).astype(np.int64)
+    if len(vocab) > _pua_capacity():
+        # list ของ id ก็ใช้กับ cpdist ได้ แค่ช้ากว่า
+        mapped = [ids[offsets[i]:offsets[i + 1]].tolist() for i in range(len(split))]
+    else:
+        mapped = _join(_pua(ids), offsets)
+    return mapped[:len(predictions)], mapped[len(predictions):]
+
+
+def _alignment(ref: np.ndarray, ref_len: np.ndarray, pred: np.ndarray, pred_len: np.ndarray):
+    """Levenshtein alignment ของหลายคู่พร้อมกัน (padded (B, N) / (B, M)) แบบเดียวกับ Levenshtein.editops
+
+    - ตัด prefix / suffix ที่ตรงกันออกก่อน (เหมือน rapidfuzz)
+    - DP ทีละแถวของ reference: substitute / delete คิดทั้งแถวในครั้งเดียว
+      ส่วน insert (ขึ้นกับช่องซ้าย) = running minimum ของ row - j แล้วบวก j คืน
+    - backtrace ทุกคู่พร้อมกันจากท้าย ลำดับการเลือก delete, insert, diagonal ตาม rapidfuzz
+      (คู่ที่มีหลาย alignment ที่ดีที่สุดจึงได้ผลเดียวกับ editops)
+
+    Returns:
+        (pair, src, dest) ของทุก edit: src = ตำแหน่งใน reference (-1 = insert),
+        dest = ตำแหน่งใน prediction (-1 = delete)
+    """
+    batch, n = ref.shape
+    m = pred.shape[1]
+    shorter = np.minimum(ref_len, pred_len)
+    k = np.arange(min(n, m))
+    prefix = np.cumprod((ref[:, k] == pred[:, k]) & (k < shorter[:, None]), axis=1).sum(axis=1)
+    ref_back = np.take_along_axis(ref, np.maximum(ref_len[:, None] - 1 - k, 0), axis=1)
+    pred_back = np.take_along_axis(pred, np.maximum(pred_len[:, None] - 1 - k, 0), axis=1)
+    suffix = np.cumprod((ref_back == pred_back) & (k < (shorter - prefix)[:, None]), axis=1).sum(axis=1)
+    ref_len, pred_len = ref_len - prefix - suffix, pred_len - prefix - suffix
+    n, m = max(int(ref_len.max()), 1), max(int(pred_len.max()), 1)
+    ref = np.take_along_axis(ref, np.minimum(prefix[:, None] + np.arange(n), ref.shape[1] - 1), axis=1)
+    pred = np.take_along_axis(pred, np.minimum(prefix[:, None] + np.arange(m), pred.shape[1] - 1), axis=1)
+    ref[np.arange(n) >= ref_len[:, None]] = -1
+    pred[np.arange(m) >= pred_len[:, None]] = -2
+
+    dtype = np.int16 if n + m < np.iinfo(np.int16).max else np.int32
+    cols = np.arange(m + 1, dtype=dtype)
+    table = np.empty((batch, n + 1, m + 1), dtype=dtype)
+    table[:, 0] = cols
+    for i in range(1, n + 1):
+        row = table[:, i]
+        row[:, 0] = i
+        row[:, 1:] = np.minimum(table[:, i - 1, :-1] + (ref[:, i - 1, None] != pred),
+                                table[:, i - 1, 1:] + 1)
+        row[:] = np.minimum.accumulate(row - cols, axis=1) + cols
+
+    # backtrace บนตารางแบบ flat: ช่อง (b, i, j) = b * (N + 1) * (M + 1) + i * (M + 1) + j
+    flat = table.reshape(-1)
+    pairs, srcs, dests = [], [], []
+    b = np.arange(batch)
+    i, j = ref_len.astype(np.int64), pred_len.astype(np.int64)
+    active = (i > 0) | (j > 0)
+    while active.any():
+        b, i, j = b[active], i[active], j[active]
+        ii, jj = np.maximum(i - 1, 0), np.maximum(j - 1, 0)
+        here, up = b * (n + 1) * (m + 1) + i * (m + 1), b * (n + 1) * (m + 1) + ii * (m + 1)
+        delete = (i > 0) & ((j == 0) | (flat[here + j] - flat[up + j] == 1))
+        insert = ~delete & ((i == 0) | ((j > 1) & (flat[here + jj] - flat[up + jj] == -1)))
+        edit = delete | insert | (ref[b, ii] != pred[b, jj])
+        pairs.append(b[edit])
+        srcs.append(np.where(insert, -1, ii + prefix[b])[edit])
+        dests.append(np.where(delete, -1, jj + prefix[b])[edit])
+        i = np.where(insert, i, ii)
+        j = np.where(delete, j, jj)
+        active = (i > 0) | (j > 0)
+    empty = np.zeros(0, dtype=np.int64)
+    return (np.concatenate(pairs or [empty]), np.concatenate(srcs or [empty]),
+            np.concatenate(dests or [empty]))
+
+
+class ConfusionMatrix(NamedTuple):
+    """sparse confusion matrix (COO): counts[k] = จำนวนครั้งที่ reference rows[k] ถูกทายเป็น cols[k]"""
+    rows: np.ndarray
+    cols: np.ndarray
+    counts: np.ndarray
+    labels: List[str]
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+        dense[self.rows, self.cols] = self.counts
+        return dense
+
+    def per_class(self) -> Dict[str, Dict]:
+        """precision / recall / support ของทุก class ที่ปรากฏ (ไม่รวม <eps>)"""
+        size = len(self.labels)
+        true_pos = np.bincount(self.rows[self.rows == self.cols], self.counts[self.rows == self.cols], size)
+        reference = np.bincount(self.rows, self.counts, size)
+        predicted = np.bincount(self.cols, self.counts, size)
+        result = {}
+        for c in np.nonzero((reference > 0) | (predicted > 0))[0]:
+            label = self.labels[c]
+            if label == EPS:
+                continue
+            result[label] = {
+                "support": int(reference[c]),
+                "predicted": int(predicted[c]),
+                "precision": float(true_pos[c] / predicted[c]) if predicted[c] else 0.0,
+                "recall": float(true_pos[c] / reference[c]) if reference[c] else 0.0,
+            }
+        return result
+
+    def top_confusions(self, n: int = 20) -> List[Dict]:
+        """คู่ (reference -> predicted) ที่ผิดบ่อยที่สุด"""
+        wrong = np.nonzero(self.rows != self.cols)[0]
+        order = wrong[np.argsort(-self.counts[wrong], kind="stable")[:n]]
+        return [{"reference": self.labels[self.rows[k]], "predicted": self.labels[self.cols[k]],
+                 "count": int(self.counts[k])} for k in order]
+
+
+def confusion_matrix(predictions: Sequence[str], references: Sequence[str],
+                     dictionary: CompiledDictionary) -> ConfusionMatrix:
+    """confusion ระดับหน่วยของ dictionary จาก alignment แบบ Levenshtein"""
+    entries = len(dictionary)
+    unk, eps = entries, entries + 1
+    labels = dictionary.units + [UNK, EPS]
+
+    def classes(texts):
+        tokens = dictionary.encode_batch(texts)
+        ids = np.where(tokens.ids >= 0, tokens.ids, unk).astype(np.int64)
+        offsets = np.asarray(tokens.offsets, dtype=np.int64)
+        return ids, offsets[:-1], np.diff(offsets)
+
+    ref_ids, ref_start, ref_len = classes(references)
+    pred_ids, pred_start, pred_len = classes(predictions)
+
+    # คู่ที่ต่างกัน: ความยาวไม่เท่า หรือมี token ที่ต่างอย่างน้อยหนึ่งตัว (เทียบทุกคู่ความยาวเท่าพร้อมกัน)
+    differ = ref_len != pred_len
+    equal = np.nonzero(~differ)[0]
+    pair_of = np.repeat(equal, ref_len[equal])
+    within = np.arange(len(pair_of)) - np.repeat(np.cumsum(ref_len[equal]) - ref_len[equal], ref_len[equal])
+    mismatch = ref_ids[ref_start[pair_of] + within] != pred_ids[pred_start[pair_of] + within]
+    differ[pair_of[mismatch]] = True
+
+    # alignment เฉพาะคู่ที่ต่างกัน: replace (ref, pred), delete (ref, eps), insert (eps, pred)
+    # เรียงจากยาวไปสั้นแล้วแบ่งเป็นก้อน เพื่อให้ padding และตาราง DP ของแต่ละก้อนเล็ก
+    # เก็บเป็นตำแหน่งใน ref_ids / pred_ids (-1 = eps) แล้วค่อยแปลงเป็น class ทีเดียว
+    todo = np.nonzero(differ)[0]
+    todo = todo[np.argsort(-np.maximum(ref_len[todo], pred_len[todo]), kind="stable")]
+    ref_padded, pred_padded = np.append(ref_ids, -1), np.append(pred_ids, -2)
+    src_pos, dest_pos = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    start = 0
+    while start < len(todo):
+        longest = int(max(ref_len[todo[start]], pred_len[todo[start]])) + 1
+        chunk = todo[start:start + max(1, ALIGN_CELLS // (longest * longest))]
+        start += len(chunk)
+        n, m = max(int(ref_len[chunk].max()), 1), max(int(pred_len[chunk].max()), 1)
+        ref_at = ref_start[chunk, None] + np.arange(n)
+        pred_at = pred_start[chunk, None] + np.arange(m)
+        ref = ref_padded[np.where(ref_at < ref_start[chunk, None] + ref_len[chunk, None], ref_at, len(ref_ids))]
+        pred = pred_padded[np.where(pred_at < pred_start[chunk, None] + pred_len[chunk, None], pred_at, len(pred_ids))]
+        pair, src, dest = _alignment(ref, ref_len[chunk], pred, pred_len[chunk])
+        src_pos.append(np.where(src >= 0, ref_start[chunk][pair] + src, -1))
+        dest_pos.append(np.where(dest >= 0, pred_start[chunk][pair] + dest, -1))
+    src_pos = np.concatenate(src_pos)
+    dest_pos = np.concatenate(dest_pos)
+
+    # token ของ reference ที่ไม่ถูก replace / delete = ทายถูก (เส้นทแยง) รวมทุกคู่ที่ตรงกันทั้งหมด
+    touched = np.zeros(len(ref_ids), dtype=bool)
+    touched[src_pos[src_pos >= 0]] = True
+    rows = np.concatenate([ref_ids[~touched], np.where(src_pos >= 0, ref_padded[src_pos], eps)])
+    cols = np.concatenate([ref_ids[~touched], np.where(dest_pos >= 0, pred_padded[dest_pos], eps)])
+
+    size = len(labels)
+    keys, counts = np.unique(rows * size + cols, return_counts=True)
+    return ConfusionMatrix(keys // size, keys % size, counts, labels)
+
+
+def sample_metrics(predictions: Sequence[str], references: Sequence[str]) -> List[Dict]:
+    """metric ต่อ sample (แทน calculate_accuracy เดิม) คำนวณทั้งชุดในครั้งเดียว"""
+    distances = edit_distances(predictions, references)
+    pred_len = np.fromiter(map(len, predictions), dtype=np.int64, count=len(predictions))
+    ref_len = np.fromiter(map(len, references), dtype=np.int64, count=len(references))
+    longest = np.maximum(pred_len, ref_len)
+    char_accuracy = np.where(longest > 0, 1 - distances / np.maximum(longest, 1), 1.0)
+    return [{"character_accuracy": float(acc), "exact_match": bool(dist == 0), "edit_distance": int(dist),
+             "predicted_length": int(p), "ground_truth_length": int(r)}
+            for acc, dist, p, r in zip(char_accuracy, distances, pred_len, ref_len)]
+
+
+def compute_metrics(predictions: Sequence[str], references: Sequence[str],
+                    dictionary: Optional[CompiledDictionary] = None, top_confusions: int = 20) -> Dict:
+    """สรุป metric ทั้งชุด (dictionary = None: ไม่คำนวณ confusion / per-class)"""
+    predictions, references = list(predictions), list(references)
+    count = len(references)
+    char_edits = edit_distances(predictions, references)
+    ref_chars = int(sum(map(len, references)))
+    word_preds, word_refs = word_sequences(predictions, references)
+    word_edits = edit_distances(word_preds, word_refs)
+    ref_words = int(sum(map(len, word_refs)))
+    exact = int((char_edits == 0).sum())
+
+    pred_len = np.fromiter(map(len, predictions), dtype=np.int64, count=count)
+    ref_len = np.fromiter(map(len, references), dtype=np.int64, count=count)
+    longest = np.maximum(pred_len, ref_len)
+    char_accuracy = np.where(longest > 0, 1 - char_edits / np.maximum(longest, 1), 1.0)
+
+    metrics = {
+        "samples": count,
+        "exact_matches": exact,
+        "exact_match_rate": exact / count if count else 0.0,
+        "cer": int(char_edits.sum()) / ref_chars if ref_chars else 0.0,
+        "wer": int(word_edits.sum()) / ref_words if ref_words else 0.0,
+        "character_edits": int(char_edits.sum()),
+        "reference_characters": ref_chars,
+        "word_edits": int(word_edits.sum()),
+        "reference_words": ref_words,
+        "average_character_accuracy": float(char_accuracy.mean()) if count else 0.0,
+    }
+    if dictionary is not None:
+        confusion = confusion_matrix(predictions, references, dictionary)
+        per_class = confusion.per_class()
+        recalls = [c["recall"] for label, c in per_class.items() if c["support"] and label != UNK]
+        metrics["macro_recall"] = float(np.mean(recalls)) if recalls else 0.0
+        metrics["per_class"] = per_class
+        metrics["top_confusions"] = confusion.top_confusions(top_confusions)
+    return metrics
+
+
+def main():
+    """Main function"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="📏 CER / WER / confusion metrics for recognition results")
+    parser.add_argument("predictions", nargs="?", help="TSV with label and prediction columns")
+    parser.add_argument("--label-column", type=int, default=1)
+    parser.add_argument("--prediction-column", type=int, default=2)
+    parser.add_argument("--dict", type=str, default=DEFAULT_DICT)
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--top", type=int, default=20, help="Most frequent confusions to show")
+    parser.add_argument("--output", type=str, default=None, help="Save metrics as JSON")
+    parser.add_argument("--benchmark", type=int, default=0, help="Time N synthetic samples")
+
+    args = parser.parse_args()
+
+    dictionary = CompiledDictionary(Path(args.dict), args.use_space_char)
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        units = [u for u in dictionary.units if u]
+        references = [units[i] for i in rng.integers(0, len(units), args.benchmark)]
+        predictions = [r if rng.random() < 0.7 else units[rng.integers(0, len(units))] for r in references]
+    elif args.predictions:
+        references, predictions = [], []
+        with open(args.predictions, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) > max(args.label_column, args.prediction_column):
+                    references.append(fields[args.label_column])
+                    predictions.append(fields[args.prediction_column])
+    else:
+        parser.error("predictions file or --benchmark is required")
+
+    started = time.perf_counter()
+    metrics = compute_metrics(predictions, references, dictionary, args.top)
+    elapsed = time.perf_counter() - started
+
+    print(f"📏 {metrics['samples']:,} samples in {elapsed * 1000:.0f} ms")
+    print(f"   Exact match: {metrics['exact_match_rate']:.2%} | CER: {metrics['cer']:.2%} | "
+          f"WER: {metrics['wer']:.2%} | macro recall: {metrics['macro_recall']:.2%}")
+    print(f"🔀 Top confusions:")
+    for item in metrics["top_confusions"][:args.top]:
+        print(f"   '{item['reference']}' -> '{item['predicted']}': {item['count']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        print(f"📄 Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
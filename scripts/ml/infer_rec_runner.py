@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📂 Directory-mode runner for PaddleOCR tools/infer_rec.py
+สำหรับเครื่องที่ต้องใช้ infer_rec.py แบบ black box (ไม่มี exported model / Paddle Inference)
+
+แทนการเรียก infer_rec.py ทีละภาพ (โหลดโมเดลใหม่ทุกภาพ, timeout 30 วินาทีต่อภาพ):
+    1. นำภาพที่เลือกเข้าโฟลเดอร์ชั่วคราว (hardlink > symlink > copy) ตั้งชื่อตามลำดับ
+    2. เรียก infer_rec.py ครั้งเดียวด้วย Global.infer_img=<โฟลเดอร์> และ Global.save_res_path
+    3. อ่านผลจาก save_res_path (ถ้าไม่มีจึงอ่านบรรทัด infer_img: / result: จาก log)
+       แล้วจับคู่กลับเป็นผลของแต่ละภาพตามชื่อไฟล์
+    timeout มีค่าเดียวสำหรับทั้งรอบ
+
+ใช้ interface เดียวกับ ThaiOCRPredictor (predict / predict_batch -> [(text, confidence)])
+
+ใช้งาน:
+    python scripts/ml/infer_rec_runner.py test_inference_config.yml --labels <rec_gt_val.txt> --timeout 600
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_TIMEOUT = 600
+RESULT_FILE = "infer_rec_results.txt"
+STAGE_MODES = ["hardlink", "symlink", "copy"]
+
+_INFER_IMG_RE = re.compile(r"infer_img:\s*(.+?)\s*$")
+_RESULT_RE = re.compile(r"result:\s*(.*?)\s*$")
+
+
+def _split_result(info: str) -> Tuple[str, float]:
+    """'<text>\\t<score>' (PaddleOCR 2.x) หรือ '<text> <score>' -> (text, confidence)"""
+    for sep in ("\t", " "):
+        if sep in info:
+            text, score = info.rsplit(sep, 1)
+            try:
+                return text.strip(), float(score)
+            except ValueError:
+                pass
+    return info.strip(), 0.0
+
+
+def parse_result_file(path: Path) -> Dict[str, Tuple[str, float]]:
+    """อ่าน save_res_path ของ infer_rec.py: '<file>\\t<text>\\t<score>' ต่อบรรทัด -> {ชื่อไฟล์: ผล}"""
+    results = {}
+    if not Path(path).exists():
+        return results
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if '\t' not in line:
+                continue
+            image, info = line.split('\t', 1)
+            results[os.path.basename(image)] = _split_result(info)
+    return results
+
+
+def parse_infer_output(output: str) -> Dict[str, Tuple[str, float]]:
+    """อ่าน log ของ infer_rec.py: แต่ละ 'result:' เป็นของ 'infer_img:' บรรทัดล่าสุด"""
+    results = {}
+    current = None
+    for line in output.splitlines():
+        match = _INFER_IMG_RE.search(line)
+        if match:
+            current = os.path.basename(match.group(1))
+            continue
+        match = _RESULT_RE.search(line)
+        if match and current is not None:
+            results[current] = _split_result(match.group(1))
+            current = None
+    return results
+
+
+def stage_images(images: Sequence[Path], stage_dir: Path) -> List[str]:
+    """นำภาพเข้าโฟลเดอร์ชั่วคราว ชื่อ 000000_<ชื่อเดิม> (กันชื่อซ้ำข้ามโฟลเดอร์ และเรียงตาม input)"""
+    names = []
+    modes = list(STAGE_MODES)
+    for i, image in enumerate(images):
+        image = Path(image)
+        name = f"{i:06d}_{image.name}"
+        target = stage_dir / name
+        while True:
+            mode = modes[0]
+            try:
+                if mode == "hardlink":
+                    os.link(image, target)
+                elif mode == "symlink":
+                    os.symlink(os.path.abspath(image), target)
+                else:
+                    shutil.copy2(image, target)
+                break
+            except OSError:
+                if mode == "copy":
+                    raise
+                modes.pop(0)  # filesystem ไม่รองรับ: ไม่ต้องลองซ้ำกับภาพถัดไป
+        names.append(name)
+    return names
+
+
+class InferRecRunner:
+    """เรียก tools/infer_rec.py ครั้งเดียวต่อชุดภาพ"""
+
+    def __init__(self, paddleocr_dir: Path, config_file: Path, timeout: float = DEFAULT_TIMEOUT,
+                 python: str = sys.executable, options: Optional[List[str]] = None):
+        """
+        Args:
+            paddleocr_dir: โฟลเดอร์ PaddleOCR (cwd ของ infer_rec.py)
+            timeout: วินาทีสำหรับการเรียกทั้งรอบ
+            options: -o เพิ่มเติม เช่น ["Global.use_gpu=False"]
+        """
+        self.paddleocr_dir = Path(paddleocr_dir)
+        self.config_file = Path(config_file)
+        self.timeout = timeout
+        self.python = python
+        self.options = list(options or [])
+        self.load_seconds = 0.0
+        self.last_error = ""
+        self.last_returncode = None
+        self.timings = {"images": 0, "calls": 0, "subprocess_ms": 0.0}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def predict(self, images: Sequence, batch_size: Optional[int] = None) -> List[Tuple[str, float]]:
+        """predict ทุกภาพใน infer_rec.py รอบเดียว (batch_size ไม่ใช้ คงไว้ให้เข้ากับ ThaiOCRPredictor)
+
+        ภาพที่ไม่มีผลใน output ได้ ("", 0.0) และ last_error เก็บสาเหตุ
+        """
+        images = [Path(image) for image in images]
+        if not images:
+            return []
+
+        with tempfile.TemporaryDirectory(prefix="infer_rec_") as tmp:
+            stage_dir = Path(tmp) / "images"
+            stage_dir.mkdir()
+            names = stage_images(images, stage_dir)
+            result_file = Path(tmp) / RESULT_FILE
+
+            cmd = [
+                self.python, "tools/infer_rec.py",
+                "-c", os.path.relpath(self.config_file.resolve(), self.paddleocr_dir.resolve()),
+                "-o", f"Global.infer_img={stage_dir}", f"Global.save_res_path={result_file}",
+                *self.options
+            ]
+
+            started = time.perf_counter()
+            output = ""
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(self.paddleocr_dir),
+                                        timeout=self.timeout)
+                output = (result.stdout or "") + "\n" + (result.stderr or "")
+                self.last_returncode = result.returncode
+                self.last_error = (result.stderr or "").strip()[-2000:] if result.returncode != 0 else ""
+            except subprocess.TimeoutExpired as e:
+                output = "\n".join(_text(part) for part in (e.stdout, e.stderr))
+                self.last_returncode = None
+                self.last_error = f"Inference timeout ({self.timeout:.0f}s for {len(images)} images)"
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            parsed = parse_result_file(result_file)
+            if len(parsed) < len(names):
+                # save_res_path หาย / ถูกตัด (timeout): เติมจาก log
+                for name, value in parse_infer_output(output).items():
+                    parsed.setdefault(name, value)
+
+        self.timings["images"] += len(images)
+        self.timings["calls"] += 1
+        self.timings["subprocess_ms"] += elapsed_ms
+        if len(parsed) < len(names) and not self.last_error:
+            self.last_error = "No result found in output"
+        return [parsed.get(name, ("", 0.0)) for name in names]
+
+    predict_batch = predict
+
+    def predict_one(self, image) -> Tuple[str, float]:
+        return self.predict([image])[0]
+
+    def throughput(self) -> Dict:
+        images = max(self.timings["images"], 1)
+        total_ms = self.timings["subprocess_ms"]
+        return {
+            **self.timings,
+            "ms_per_image": total_ms / images,
+            "images_per_second": self.timings["images"] / (total_ms / 1000) if total_ms else 0.0,
+        }
+
+
+def _text(part) -> str:
+    if part is None:
+        return ""
+    return part.decode('utf-8', errors='replace') if isinstance(part, bytes) else part
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="📂 Run PaddleOCR infer_rec.py once over a directory of images")
+    parser.add_argument("config", help="PaddleOCR rec config (-c of infer_rec.py)")
+    parser.add_argument("--paddleocr-dir", type=str, default="PaddleOCR")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--labels", type=str, help="rec_gt_*.txt; images are resolved next to it")
+    source.add_argument("--images", nargs="+", help="Image files")
+    parser.add_argument("--max-samples", type=int, default=0, help="0 = all")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds for the whole run")
+
+    args = parser.parse_args()
+
+    if args.labels:
+        label_file = Path(args.labels)
+        samples = []
+        with open(label_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '\t' in line:
+                    rel_path, label = line.rstrip('\n').split('\t', 1)
+                    samples.append((label_file.parent / rel_path, label))
+    else:
+        samples = [(Path(p), None) for p in args.images]
+    if args.max_samples:
+        samples = samples[:args.max_samples]
+
+    runner = InferRecRunner(args.paddleocr_dir, args.config, args.timeout)
+    results = runner.predict([path for path, _ in samples])
+    if runner.last_error:
+        print(f"⚠️ {runner.last_error[-300:]}")
+
+    labelled = [(r, label) for r, (_, label) in zip(results, samples) if label is not None]
+    if labelled:
+        correct = sum(text == label for (text, _), label in labelled)
+        print(f"🎯 Exact match: {correct}/{len(labelled)} ({correct / len(labelled):.1%})")
+    answered = sum(1 for text, _ in results if text)
+    stats = runner.throughput()
+    print(f"⏱️ {answered}/{len(results)} images answered in one call: "
+          f"{stats['subprocess_ms'] / 1000:.1f}s ({stats['images_per_second']:.1f} images/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 Thai OCR Inference Server (SageMaker serving contract)
+HTTP server สำหรับ recognition model ที่ export แล้ว: GET /ping และ POST /invocations
+
+- โหลด ThaiOCRPredictor ครั้งเดียวตอนเริ่ม
+- ทุกภาพที่เข้ามาลง queue ที่มีขนาดจำกัด แล้ว batcher thread เดียวรวมเป็น micro-batch
+  ตาม max batch size หรือ max wait (นับจากภาพแรกของ batch) แล้วค่อยเรียก predictor
+- queue เต็ม -> 429 ทันที (ให้ client / load balancer ถอยแทนการรอจน timeout)
+  request ที่มีภาพมากกว่า --queue-size -> 413 (แบ่ง request ให้เล็กลง ไม่ใช่ลองใหม่)
+- แยก latency ต่อ request: รอใน queue / inference / ทั้งหมด (ส่งกลับใน header และสรุปที่ GET /stats)
+
+Payload ของ /invocations:
+    - ภาพเดียวเป็น bytes (application/octet-stream, application/x-image, image/*)
+    - JSON: {"images": ["<base64>", ...]} หรือ {"instances": [{"b64": "<base64>"}, ...]}
+ผลลัพธ์: {"predictions": [{"text": "...", "confidence": 0.97}, ...]}
+
+ใช้งาน (local ไม่ต้องใช้ AWS):
+    python scripts/ml/inference_server.py --model-dir models/sagemaker_trained/best_model --port 8080
+    curl --data-binary @image.jpg -H "Content-Type: application/octet-stream" localhost:8080/invocations
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from thai_ocr_predictor import ENGINES, ThaiOCRPredictor
+
+DEFAULT_MODEL_DIR = "/opt/ml/model"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 10.0
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_REQUEST_TIMEOUT = 30.0
+LATENCY_WINDOW = 10000
+IMAGE_CONTENT_TYPES = ("application/octet-stream", "application/x-image", "image/")
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """queue ไม่มีที่ว่างพอสำหรับภาพทั้ง request"""
+
+
+class _Job:
+    __slots__ = ("image", "enqueued", "started", "finished", "done", "result", "error")
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.enqueued = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """รวมภาพจากหลาย request เป็น batch เดียวก่อนส่งเข้า predictor"""
+
+    def __init__(self, predict_batch, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            predict_batch: ฟังก์ชัน [image] -> [(text, confidence)] เช่น ThaiOCRPredictor.predict_batch
+            max_wait_ms: เวลารอภาพเพิ่มนับจากภาพแรกของ batch
+            queue_size: จำนวนภาพที่รอได้สูงสุด (เกินนี้ submit จะ raise QueueFull)
+                และจำนวนภาพสูงสุดต่อ request
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue_size = queue_size
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.batches = 0
+        self.batched_images = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def submit(self, images: List[np.ndarray]) -> List[_Job]:
+        """เข้า queue ทั้ง request หรือไม่เข้าเลย
+
+        Raises:
+            ValueError: request มีภาพมากกว่า queue_size (ไม่มีทางเข้า queue ได้ ต่างจาก QueueFull)
+            QueueFull: queue ว่างไม่พอในตอนนี้
+        """
+        if len(images) > self.queue_size:
+            raise ValueError(f"{len(images)} images in one request; the limit is {self.queue_size}")
+        jobs = [_Job(image) for image in images]
+        with self._cond:
+            if len(self._queue) + len(jobs) > self.queue_size:
+                raise QueueFull(f"queue full ({len(self._queue)}/{self.queue_size})")
+            self._queue.extend(jobs)
+            self._cond.notify()
+        return jobs
+
+    def _next_batch(self) -> List[_Job]:
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0].enqueued + self.max_wait
+            while self._running and len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            started = time.perf_counter()
+            for job in batch:
+                job.started = started
+            try:
+                results = self.predict_batch([job.image for job in batch])
+                for job, result in zip(batch, results):
+                    job.result = result
+            except Exception as e:
+                logger.exception("batch of %d failed", len(batch))
+                for job in batch:
+                    job.error = str(e)
+            finished = time.perf_counter()
+            self.batches += 1
+            self.batched_images += len(batch)
+            for job in batch:
+                job.finished = finished
+                job.done.set()
+
+
+class LatencyStats:
+    """latency ล่าสุด LATENCY_WINDOW request + ตัวนับ (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"requests": 0, "images": 0, "rejected": 0, "errors": 0}
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    def record(self, images: int, queue_ms: float, inference_ms: float, total_ms: float):
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts["images"] += images
+            self._window.append((queue_ms, inference_ms, total_ms))
+
+    def summary(self) -> Dict:
+        with self._lock:
+            window = np.array(self._window, dtype=np.float64).reshape(-1, 3)
+            summary = dict(self.counts)
+        for column, name in enumerate(("queue_ms", "inference_ms", "total_ms")):
+            values = window[:, column]
+            summary[name] = {
+                "p50": float(np.percentile(values, 50)) if len(values) else 0.0,
+                "p99": float(np.percentile(values, 99)) if len(values) else 0.0,
+                "mean": float(values.mean()) if len(values) else 0.0,
+            }
+        return summary
+
+
+def decode_payload(body: bytes, content_type: str) -> List[np.ndarray]:
+    """body ของ /invocations -> ภาพ BGR"""
+    import cv2
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        payload = json.loads(body.decode("utf-8"))
+        if isinstance(payload, dict) and "instances" in payload:
+            encoded = [item["b64"] if isinstance(item, dict) else item for item in payload["instances"]]
+        elif isinstance(payload, dict):
+            encoded = payload.get("images") or [payload["image"]]
+        else:
+            encoded = payload
+        blobs = [base64.b64decode(item) for item in encoded]
+    elif not content_type or content_type.startswith(IMAGE_CONTENT_TYPES):
+        blobs = [body]
+    else:
+        raise ValueError(f"unsupported content type: {content_type}")
+
+    images = []
+    for i, blob in enumerate(blobs):
+        image = cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"image {i} cannot be decoded")
+        images.append(image)
+    if not images:
+        raise ValueError("no images in request")
+    return images
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer + micro-batcher + latency stats"""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog (ค่าเริ่มต้น 5 ทำให้ connection ถูก reset ตอน burst)
+
+    def __init__(self, address, batcher: MicroBatcher, request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        super().__init__(address, InvocationHandler)
+        self.batcher = batcher
+        self.request_timeout = request_timeout
+        self.stats = LatencyStats()
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.stop()
+
+
+class InvocationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/ping":
+            self._send_json(200, {"status": "healthy"})
+        elif self.path == "/stats":
+            server = self.server
+            stats = server.stats.summary()
+            stats.update(queue_depth=server.batcher.pending(), batches=server.batcher.batches,
+                         mean_batch_size=server.batcher.batched_images / max(server.batcher.batches, 1))
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": f"not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/invocations":
+            self._send_json(404, {"error": f"not found: {self.path}"})
+            return
+        server = self.server
+        received = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            images = decode_payload(body, self.headers.get("Content-Type"))
+        except Exception as e:
+            server.stats.count("errors")
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            jobs = server.batcher.submit(images)
+        except ValueError as e:
+            # ใหญ่กว่า queue ทั้งหมด: ลองใหม่กี่ครั้งก็ไม่ผ่าน จึงไม่ใช่ 429
+            server.stats.count("errors")
+            self._send_json(413, {"error": str(e)})
+            return
+        except QueueFull as e:
+            server.stats.count("rejected")
+            self._send_json(429, {"error": str(e)}, {"Retry-After": "1"})
+            return
+
+        deadline = received + server.request_timeout
+        for job in jobs:
+            if not job.done.wait(max(0.0, deadline - time.perf_counter())):
+                server.stats.count("errors")
+                self._send_json(503, {"error": f"inference timeout ({server.request_timeout:.0f}s)"})
+                return
+        errors = [job.error for job in jobs if job.error]
+        if errors:
+            server.stats.count("errors")
+            self._send_json(500, {"error": errors[0]})
+            return
+
+        # ภาพของ request เดียวอาจอยู่คนละ batch: นับ queue จนภาพสุดท้ายเริ่ม และ inference ของทุก batch
+        queue_ms = max(job.started - job.enqueued for job in jobs) * 1000
+        inference_ms = sum((finished - started) for started, finished in
+                           {(job.started, job.finished) for job in jobs}) * 1000
+        total_ms = (time.perf_counter() - received) * 1000
+        server.stats.record(len(jobs), queue_ms, inference_ms, total_ms)
+        predictions = [{"text": text, "confidence": float(conf)} for text, conf in (job.result for job in jobs)]
+        self._send_json(200, {"predictions": predictions}, {
+            "X-Queue-Ms": f"{queue_ms:.2f}",
+            "X-Inference-Ms": f"{inference_ms:.2f}",
+            "X-Total-Ms": f"{total_ms:.2f}",
+        })
+
+
+def create_server(predictor, host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                  max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                  queue_size: int = DEFAULT_QUEUE_SIZE,
+                  request_timeout: float = DEFAULT_REQUEST_TIMEOUT) -> InferenceServer:
+    """สร้าง server (batcher เริ่มทำงานแล้ว) -> เรียก serve_forever() ต่อ"""
+    batcher = MicroBatcher(predictor.predict_batch, max_batch_size, max_wait_ms, queue_size)
+    batcher.start()
+    return InferenceServer((host, port), batcher, request_timeout)
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🌐 SageMaker-compatible inference server with micro-batching")
+    parser.add_argument("command", nargs="?", default="serve", help="'serve' (passed by SageMaker)")
+    parser.add_argument("--model-dir", type=str, default=os.environ.get("SM_MODEL_DIR", DEFAULT_MODEL_DIR),
+                       help="Exported inference model directory")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--config", type=str, default=None, help="PaddleOCR config for dictionary / image shape")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--engine", choices=ENGINES, default=os.environ.get("OCR_ENGINE", "paddle"),
+                       help="onnx: ONNX Runtime (inference.onnx in the model dir)")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SAGEMAKER_BIND_TO_PORT", DEFAULT_PORT)))
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Images waiting before 429 (also the per-request limit, 413 above it)")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT)
+    parser.add_argument("--cpu-threads", type=int, default=None)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+
+    options = dict(batch_size=args.max_batch_size, cpu_threads=args.cpu_threads, engine=args.engine)
+    if args.config:
+        predictor = ThaiOCRPredictor.from_config(args.config, args.model_dir, **options)
+    else:
+        predictor = ThaiOCRPredictor(args.model_dir, args.dict, use_space_char=args.use_space_char, **options)
+    logger.info(f"Model loaded in {predictor.load_seconds:.2f}s: {predictor.model_dir}")
+
+    server = create_server(predictor, args.host, args.port, args.max_batch_size, args.max_wait_ms,
+                           args.queue_size, args.request_timeout)
+    logger.info(f"Serving on {args.host}:{args.port} (batch <= {args.max_batch_size}, "
+                f"wait <= {args.max_wait_ms:g} ms, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        predictor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔁 ONNX Runtime Backend for the Thai Recognition Model
+export checkpoint ที่เทรนแล้ว -> Paddle inference model -> ONNX แล้วรันด้วย ONNX Runtime
+(image สำหรับ serving ไม่ต้องมี paddlepaddle wheel)
+
+ขั้นตอน export:
+    1. tools/export_model.py -c configs/rec/thai_rec_export.yml -o Global.checkpoints=<best_accuracy>
+       -> inference.pdmodel / inference.json + inference.pdiparams
+    2. paddle2onnx -> inference.onnx (batch และความกว้างเป็น dynamic)
+
+ใช้กับ ThaiOCRPredictor ได้ทันที: ThaiOCRPredictor(model_dir, dict_path, engine="onnx")
+(create_onnx_predictor คืน forward(batch NCHW) -> probs (N, T, C) แบบเดียวกับ Paddle Inference)
+
+compare: รัน validation set ผ่านทั้งสอง engine ด้วย batch เดียวกัน แล้วรายงาน
+    - ความต่างของ probs (max / mean abs), argmax ที่ตรงกัน, ข้อความที่ตรงกัน
+    - เวลาโหลด, latency ต่อ batch (p50 / p99), images/sec
+
+ใช้งาน:
+    python scripts/ml/onnx_backend.py export --checkpoint models/sagemaker_trained/best_accuracy
+    python scripts/ml/onnx_backend.py compare models/sagemaker_trained/best_model --labels <rec_gt_val.txt>
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from thai_ocr_predictor import (DEFAULT_BATCH_SIZE, ThaiOCRPredictor, create_paddle_predictor,
+                                ctc_greedy_decode, find_model_files)
+
+ONNX_FILE = "inference.onnx"
+DEFAULT_OPSET = 11
+DEFAULT_EXPORT_CONFIG = "configs/rec/thai_rec_export.yml"
+DEFAULT_CHECKPOINT = "models/sagemaker_trained/best_accuracy"
+DEFAULT_MODEL_DIR = "models/sagemaker_trained/best_model"
+REPORT_FILE = "onnx_parity_report.json"
+
+
+def find_onnx_model(model: Path) -> Path:
+    """รับโฟลเดอร์ (ใช้ inference.onnx) หรือไฟล์ .onnx ตรงๆ"""
+    model = Path(model)
+    path = model / ONNX_FILE if model.is_dir() else model
+    if not path.exists():
+        raise FileNotFoundError(f"No ONNX model at {path}. Export it with: "
+                                f"python scripts/ml/onnx_backend.py export {model}")
+    return path
+
+
+def export_inference_model(config: Path, checkpoint: Path, output_dir: Path,
+                           paddleocr_dir: Path = Path("PaddleOCR")) -> Path:
+    """checkpoint (.pdparams ที่ไม่มีนามสกุล) -> Paddle inference model ใน output_dir"""
+    root = Path(paddleocr_dir).resolve()
+    cmd = [
+        sys.executable, "tools/export_model.py",
+        "-c", str(Path(config).resolve()),
+        "-o", f"Global.checkpoints={Path(checkpoint).resolve()}",
+        f"Global.save_inference_dir={Path(output_dir).resolve()}",
+    ]
+    print(f"📦 Exporting Paddle inference model: {checkpoint} -> {output_dir}")
+    result = subprocess.run(cmd, cwd=str(root), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"export_model.py failed:\n{result.stderr[-2000:]}")
+    find_model_files(output_dir)
+    return Path(output_dir)
+
+
+def export_onnx(model_dir: Path, output: Optional[Path] = None, opset: int = DEFAULT_OPSET) -> Path:
+    """Paddle inference model -> ONNX ด้วย paddle2onnx"""
+    model_file, params_file = find_model_files(model_dir)
+    output = Path(output or Path(model_dir) / ONNX_FILE)
+    cmd = [
+        "paddle2onnx",
+        "--model_dir", str(model_dir),
+        "--model_filename", model_file.name,
+        "--params_filename", params_file.name,
+        "--save_file", str(output),
+        "--opset_version", str(opset),
+        "--enable_onnx_checker", "True",
+    ]
+    print(f"🔁 Converting to ONNX (opset {opset}): {output}")
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise ImportError("paddle2onnx is required for ONNX export: pip install paddle2onnx")
+    if result.returncode != 0 or not output.exists():
+        raise RuntimeError(f"paddle2onnx failed:\n{(result.stderr or result.stdout)[-2000:]}")
+    return output
+
+
+def create_onnx_predictor(model: Path, use_gpu: bool = False, cpu_threads: Optional[int] = None):
+    """สร้าง ONNX Runtime session และคืนฟังก์ชัน forward(batch NCHW float32) -> probs (N, T, C)"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError("onnxruntime is required for engine='onnx': pip install onnxruntime")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = cpu_threads or os.cpu_count() or 1
+    options.inter_op_num_threads = 1
+    options.log_severity_level = 3
+    providers = ["CPUExecutionProvider"]
+    if use_gpu:
+        providers.insert(0, "CUDAExecutionProvider")
+
+    session = ort.InferenceSession(str(find_onnx_model(model)), options, providers=providers)
+    input_name = session.get_inputs()[0].name
+    output_name = session.get_outputs()[0].name
+
+    def forward(batch: np.ndarray) -> np.ndarray:
+        return session.run([output_name], {input_name: batch})[0]
+
+    return forward
+
+
+def _latency(batch_ms: Sequence[float], images: int) -> Dict:
+    values = np.asarray(batch_ms, dtype=np.float64)
+    total = values.sum()
+    return {
+        "batch_p50_ms": float(np.percentile(values, 50)) if len(values) else 0.0,
+        "batch_p99_ms": float(np.percentile(values, 99)) if len(values) else 0.0,
+        "ms_per_image": float(total / images) if images else 0.0,
+        "images_per_second": float(images / (total / 1000)) if total else 0.0,
+    }
+
+
+def compare_backends(model_dir: Path, dict_path: Path, images: Sequence[Path], onnx_model: Optional[Path] = None,
+                     image_shape: Optional[List[int]] = None, use_space_char: bool = False,
+                     batch_size: int = DEFAULT_BATCH_SIZE, cpu_threads: Optional[int] = None,
+                     forwards: Optional[Dict] = None) -> Dict:
+    """รันภาพชุดเดียวกันผ่าน Paddle และ ONNX Runtime -> ความต่างของ output + latency
+
+    Args:
+        forwards: {"paddle": fn, "onnx": fn} ที่สร้างไว้แล้ว (None = สร้างจาก model_dir / onnx_model)
+    """
+    forwards = dict(forwards or {})
+    load_seconds = {}
+    for engine in ("paddle", "onnx"):
+        if engine in forwards:
+            continue
+        started = time.perf_counter()
+        if engine == "paddle":
+            forwards[engine] = create_paddle_predictor(model_dir, cpu_threads=cpu_threads)
+        else:
+            forwards[engine] = create_onnx_predictor(onnx_model or model_dir, cpu_threads=cpu_threads)
+        load_seconds[engine] = time.perf_counter() - started
+
+    pre = ThaiOCRPredictor(model_dir, dict_path, image_shape, use_space_char, forward=forwards["paddle"],
+                           preprocess_workers=1)
+    pre.close()
+    characters = pre.characters
+
+    batch_ms = {"paddle": [], "onnx": []}
+    max_abs = mean_abs_sum = 0.0
+    elements = argmax_same = steps = text_same = 0
+    for start in range(0, len(images), batch_size):
+        # preprocess ครั้งเดียวต่อ batch ให้ทั้งสอง engine ได้ input เดียวกันทุก bit
+        batch = np.stack([pre.preprocess(image) for image in images[start:start + batch_size]])
+        outputs = {}
+        for engine in ("paddle", "onnx"):
+            started = time.perf_counter()
+            outputs[engine] = np.asarray(forwards[engine](batch), dtype=np.float32)
+            batch_ms[engine].append((time.perf_counter() - started) * 1000)
+        paddle_out, onnx_out = outputs["paddle"], outputs["onnx"]
+        if paddle_out.shape != onnx_out.shape:
+            raise ValueError(f"output shape mismatch: paddle {paddle_out.shape} vs onnx {onnx_out.shape}")
+
+        diff = np.abs(paddle_out - onnx_out)
+        max_abs = max(max_abs, float(diff.max()))
+        mean_abs_sum += float(diff.sum())
+        elements += diff.size
+        argmax_same += int((paddle_out.argmax(-1) == onnx_out.argmax(-1)).sum())
+        steps += paddle_out.shape[0] * paddle_out.shape[1]
+        text_same += sum(a[0] == b[0] for a, b in zip(ctc_greedy_decode(paddle_out, characters),
+                                                      ctc_greedy_decode(onnx_out, characters)))
+
+    count = len(images)
+    return {
+        "images": count,
+        "batch_size": batch_size,
+        "max_abs_diff": max_abs,
+        "mean_abs_diff": mean_abs_sum / elements if elements else 0.0,
+        "argmax_agreement": argmax_same / steps if steps else 0.0,
+        "text_agreement": text_same / count if count else 0.0,
+        "load_seconds": load_seconds,
+        "paddle": _latency(batch_ms["paddle"], count),
+        "onnx": _latency(batch_ms["onnx"], count),
+    }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🔁 Export the recognition model to ONNX and compare with Paddle")
+    parser.add_argument("action", choices=["export", "compare"])
+    parser.add_argument("model_dir", nargs="?", default=DEFAULT_MODEL_DIR, help="Exported inference model directory")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                       help=f"export: re-export this checkpoint first (e.g. {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--export-config", type=str, default=DEFAULT_EXPORT_CONFIG)
+    parser.add_argument("--paddleocr-dir", type=str, default="PaddleOCR")
+    parser.add_argument("--opset", type=int, default=DEFAULT_OPSET)
+    parser.add_argument("--onnx", type=str, default=None, help=f"ONNX model (default <model_dir>/{ONNX_FILE})")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--image-shape", type=str, default="3,32,100")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--labels", type=str, help="compare: rec_gt_val.txt; images are resolved next to it")
+    parser.add_argument("--max-samples", type=int, default=0, help="0 = all")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--cpu-threads", type=int, default=None)
+    parser.add_argument("--report", type=str, default=REPORT_FILE)
+
+    args = parser.parse_args()
+
+    if args.action == "export":
+        if args.checkpoint:
+            export_inference_model(Path(args.export_config), Path(args.checkpoint), Path(args.model_dir),
+                                   Path(args.paddleocr_dir))
+        output = export_onnx(Path(args.model_dir), args.onnx, args.opset)
+        print(f"✅ ONNX model: {output} ({output.stat().st_size / 1024 / 1024:.1f} MB)")
+        return
+
+    if not args.labels:
+        parser.error("compare needs --labels")
+    label_file = Path(args.labels)
+    images = []
+    with open(label_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if '\t' in line:
+                images.append(label_file.parent / line.split('\t', 1)[0])
+    if args.max_samples:
+        images = images[:args.max_samples]
+
+    shape = [int(v) for v in args.image_shape.split(",")]
+    report = compare_backends(Path(args.model_dir), Path(args.dict), images, args.onnx, shape,
+                              args.use_space_char, args.batch_size, args.cpu_threads)
+
+    print(f"🔍 Parity on {report['images']:,} images: max |diff| {report['max_abs_diff']:.2e}, "
+          f"mean |diff| {report['mean_abs_diff']:.2e}")
+    print(f"   argmax agreement {report['argmax_agreement']:.4%}, text agreement {report['text_agreement']:.2%}")
+    for engine in ("paddle", "onnx"):
+        stats = report[engine]
+        print(f"⏱️ {engine:6s}: load {report['load_seconds'].get(engine, 0):.2f}s, "
+              f"batch p50 {stats['batch_p50_ms']:.1f} ms / p99 {stats['batch_p99_ms']:.1f} ms, "
+              f"{stats['images_per_second']:,.1f} images/s")
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,12 @@
 """
 
 import os
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import CompiledDictionary, compile_dictionary
+
 def create_optimized_thai_dictionary():
     """สร้าง dictionary ที่เหมาะสมสำหรับภาษาไทยโดยเก็บรูปแบบผสมที่สำคัญ"""
     
@@ -16,8 +20,8 @@ def create_optimized_thai_dictionary():
         print(f"ไม่พบไฟล์ {original_dict_path}")
         return None
         
-    with open(original_dict_path, 'r', encoding='utf-8') as f:
-        original_chars = [line.strip() for line in f if line.strip()]
+    with CompiledDictionary(original_dict_path) as dictionary:
+        original_chars = [unit.strip() for unit in dictionary.units if unit.strip()]
     
     print(f"จำนวนอักขระในไฟล์เดิม: {len(original_chars)}")
     
@@ -60,9 +64,8 @@ def create_optimized_thai_dictionary():
     
     # เพิ่มตัวเลขไทยถ้าไม่มี
     thai_numbers = ['๐', '๑', '๒', '๓', '๔', '๕', '๖', '๗', '๘', '๙']
-    for num in thai_numbers:
-        if num not in thai_only_chars:
-            thai_only_chars.append(num)
+    thai_only_set = set(thai_only_chars)
+    thai_only_chars.extend(num for num in thai_numbers if num not in thai_only_set)
     
     # 4. สร้าง dictionary ใหม่
     optimized_dict = (
@@ -79,6 +82,7 @@ def create_optimized_thai_dictionary():
     with open(output_path, 'w', encoding='utf-8') as f:
         for char in optimized_dict:
             f.write(char + '\n')
+    compile_dictionary(output_path)
     
     print(f"\n✅ สร้าง Dictionary ที่เหมาะสมสำเร็จ: {output_path}")
     print(f"จำนวนอักขระไทยเดี่ยว: {len(thai_only_chars)}")
@@ -91,7 +95,8 @@ def create_optimized_thai_dictionary():
     print(f"ตัวอย่างอักขระผสม (10 ตัวแรก): {important_combined[:10]}")
     
     # 7. แสดงอักขระที่ถูกลบออก
-    removed_chars = [c for c in original_chars if c not in optimized_dict]
+    kept = set(optimized_dict)
+    removed_chars = [c for c in original_chars if c not in kept]
     print(f"\nตัวอย่างอักขระที่ถูกลบออก (10 ตัวแรก): {removed_chars[:10]}")
     
     return output_path
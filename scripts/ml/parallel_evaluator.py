@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏭 Multi-core Evaluation with a Pool of Predictor Workers
+แบ่ง validation label file เป็นช่วงบรรทัด (shard) แล้วกระจายให้ process pool
+แต่ละ worker โหลด ThaiOCRPredictor ครั้งเดียวตอนเริ่ม ด้วย cpu_math_library_num_threads ที่กำหนด
+
+- worker อ่านบรรทัดของ shard เองผ่าน LabelIndex (mmap) จึงส่งแค่ (start, end) ข้าม process
+- ผลลัพธ์ส่งกลับตามลำดับบรรทัดในไฟล์ (in-flight futures แบบมีขอบเขต)
+- calibration: ลองหลาย layout เช่น "1 process x N threads" กับ "N processes x 1 thread"
+  บนตัวอย่างสั้นๆ แล้วเลือกอันที่ได้ images/sec สูงสุด (ไม่นับเวลาโหลดโมเดล)
+
+ใช้งาน:
+    python scripts/ml/parallel_evaluator.py models/sagemaker_trained/best_model <rec_gt_val.txt> --config test_inference_config.yml
+    python scripts/ml/parallel_evaluator.py <model_dir> <rec_gt_val.txt> --procs 4 --threads 1
+"""
+
+import os
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+sys.path.append(str(Path(__file__).resolve().parent))
+from label_index import LabelIndex
+from thai_ocr_predictor import DEFAULT_BATCH_SIZE, ENGINES, ThaiOCRPredictor
+
+REPORT_FILE = "parallel_eval_report.json"
+DEFAULT_SHARD_SIZE = 256
+CALIBRATION_SAMPLES = 512
+
+# สถานะต่อ worker process (สร้างใน initializer ครั้งเดียว)
+_WORKER = {}
+
+
+def candidate_layouts(cpus: int) -> List[Tuple[int, int]]:
+    """(processes, threads ต่อ process) ที่จะลองตอน calibration"""
+    layouts = [(1, cpus), (cpus, 1)]
+    if cpus >= 4:
+        layouts.append((cpus // 2, 2))
+    return list(dict.fromkeys(layouts))
+
+
+def shard_ranges(total: int, shard_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+    for begin in range(start, total, shard_size):
+        yield begin, min(begin + shard_size, total)
+
+
+def _init_worker(label_file: str, predictor_kwargs: Dict):
+    _WORKER["index"] = LabelIndex(Path(label_file), write=False)
+    _WORKER["root"] = Path(label_file).parent
+    _WORKER["predictor"] = ThaiOCRPredictor(**predictor_kwargs)
+
+
+def evaluate_shard(start: int, end: int) -> Dict:
+    """predict บรรทัด [start, end) ของ label file -> ผลตามลำดับ + เวลา (wall clock ข้าม process)"""
+    index, root, predictor = _WORKER["index"], _WORKER["root"], _WORKER["predictor"]
+    began = time.time()
+    lines = index.lines(range(start, end))
+    images, errors = [], {}
+    for i, (rel_path, _) in enumerate(lines):
+        path = root / rel_path
+        if path.exists():
+            images.append((i, path))
+        else:
+            errors[i] = "image not found"
+
+    predictions = [("", 0.0)] * len(lines)
+    for b in range(0, len(images), predictor.batch_size):
+        batch = images[b:b + predictor.batch_size]
+        try:
+            for (i, _), prediction in zip(batch, predictor.predict_batch([path for _, path in batch])):
+                predictions[i] = prediction
+        except Exception as e:
+            for i, _ in batch:
+                errors[i] = str(e)
+
+    rows = [{"image": rel_path, "label": label, "predicted": text, "confidence": conf,
+             "error": errors.get(i)}
+            for i, ((rel_path, label), (text, conf)) in enumerate(zip(lines, predictions))]
+    return {"start": start, "rows": rows, "began": began, "ended": time.time(), "pid": os.getpid()}
+
+
+class ParallelEvaluator:
+    """ประเมินโมเดลทั้ง label file ด้วย process pool ของ predictor"""
+
+    def __init__(self, model_dir: Path, label_file: Path, dict_path: Path,
+                 image_shape: Optional[List[int]] = None, use_space_char: bool = False,
+                 batch_size: int = DEFAULT_BATCH_SIZE, shard_size: int = DEFAULT_SHARD_SIZE,
+                 procs: Optional[int] = None, threads: Optional[int] = None, engine: str = "paddle"):
+        """
+        Args:
+            procs / threads: layout ของ pool (None = เลือกจาก calibration)
+        """
+        self.label_file = Path(label_file)
+        self.shard_size = shard_size
+        self.procs = procs
+        self.threads = threads
+        self.predictor_kwargs = {
+            "model_dir": str(model_dir), "dict_path": str(dict_path), "image_shape": image_shape,
+            "use_space_char": use_space_char, "batch_size": batch_size, "preprocess_workers": 1,
+            "engine": engine,
+        }
+        with LabelIndex(self.label_file) as index:  # สร้าง .idx ครั้งเดียวก่อนแยก process
+            self.total = len(index)
+        self.calibration = []
+        self.stats = {}
+
+    def _pool(self, procs: int, threads: int) -> ProcessPoolExecutor:
+        kwargs = dict(self.predictor_kwargs, cpu_threads=threads)
+        return ProcessPoolExecutor(max_workers=procs, initializer=_init_worker,
+                                   initargs=(str(self.label_file), kwargs))
+
+    def _stream(self, executor: ProcessPoolExecutor, ranges, max_in_flight: int) -> Iterator[Dict]:
+        """ส่ง shard เข้า pool และคืนผลตามลำดับที่ส่ง"""
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(executor.submit(evaluate_shard, start, end))
+            while len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def calibrate(self, samples: int = CALIBRATION_SAMPLES, cpus: Optional[int] = None) -> Tuple[int, int]:
+        """ลองแต่ละ layout กับ samples บรรทัดแรก แล้วเลือกอันที่เร็วที่สุด"""
+        cpus = cpus or os.cpu_count() or 1
+        samples = min(samples, self.total)
+        shard = max(1, min(self.shard_size, samples // (2 * cpus) or 1))
+        self.calibration = []
+        for procs, threads in candidate_layouts(cpus):
+            with self._pool(procs, threads) as executor:
+                # รอบแรก: ให้ทุก worker โหลดโมเดล + warm up (ไม่จับเวลา)
+                list(self._stream(executor, shard_ranges(min(self.total, shard * procs), shard), procs * 2))
+                shards = list(self._stream(executor, shard_ranges(samples, shard), procs * 4))
+            images = sum(len(s["rows"]) for s in shards)
+            seconds = max(s["ended"] for s in shards) - min(s["began"] for s in shards)
+            rate = images / seconds if seconds > 0 else 0.0
+            self.calibration.append({"procs": procs, "threads": threads, "images_per_second": rate})
+            print(f"   🔧 {procs} proc x {threads} thread: {rate:,.1f} images/s")
+
+        best = max(self.calibration, key=lambda c: c["images_per_second"])
+        self.procs, self.threads = best["procs"], best["threads"]
+        return self.procs, self.threads
+
+    def evaluate(self) -> Iterator[Dict]:
+        """ผลของทุกบรรทัดตามลำดับในไฟล์ (generator)"""
+        if self.procs is None or self.threads is None:
+            self.calibrate()
+        started = time.perf_counter()
+        images = correct = 0
+        with self._pool(self.procs, self.threads) as executor:
+            for shard in self._stream(executor, shard_ranges(self.total, self.shard_size), self.procs * 4):
+                for row in shard["rows"]:
+                    images += 1
+                    correct += row["predicted"] == row["label"]
+                    yield row
+        elapsed = time.perf_counter() - started
+        self.stats = {
+            "images": images,
+            "exact_match": correct,
+            "accuracy": correct / images if images else 0.0,
+            "seconds": elapsed,
+            "images_per_second": images / elapsed if elapsed > 0 else 0.0,
+            "procs": self.procs,
+            "threads": self.threads,
+        }
+
+    def run(self, predictions_file: Optional[Path] = None) -> Dict:
+        """ประเมินทั้งไฟล์ (เขียน prediction เป็น TSV ตามลำดับถ้ากำหนด)"""
+        out = open(predictions_file, 'w', encoding='utf-8') if predictions_file else None
+        try:
+            for row in self.evaluate():
+                if out:
+                    out.write(f"{row['image']}\t{row['label']}\t{row['predicted']}\t{row['confidence']:.6f}\n")
+        finally:
+            if out:
+                out.close()
+        return self.stats
+
+    def write_report(self, path: Path):
+        report = {"label_file": str(self.label_file), **self.stats, "calibration": self.calibration}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Report: {path}")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🏭 Evaluate a recognition model with a pool of predictor processes")
+    parser.add_argument("model_dir", help="Exported inference model directory")
+    parser.add_argument("label_file", help="rec_gt_val.txt (images are resolved next to it)")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--config", type=str, default=None, help="PaddleOCR config for dictionary / image shape")
+    parser.add_argument("--image-shape", type=str, default="3,32,100")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--engine", choices=ENGINES, default="paddle")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Label lines per task")
+    parser.add_argument("--procs", type=int, default=None, help="Worker processes (with --threads: skip calibration)")
+    parser.add_argument("--threads", type=int, default=None, help="cpu_math_library_num_threads per worker")
+    parser.add_argument("--calibration-samples", type=int, default=CALIBRATION_SAMPLES)
+    parser.add_argument("--predictions", type=str, default=None, help="Write image\\tlabel\\tpredicted\\tconf here")
+    parser.add_argument("--report", type=str, default=REPORT_FILE)
+
+    args = parser.parse_args()
+
+    dict_path, image_shape = args.dict, [int(v) for v in args.image_shape.split(",")]
+    use_space_char = args.use_space_char
+    if args.config:
+        from thai_ocr_predictor import resolve_rec_config
+        settings = resolve_rec_config(Path(args.config))
+        dict_path = settings["character_dict_path"] or dict_path
+        image_shape, use_space_char = settings["image_shape"], settings["use_space_char"]
+
+    evaluator = ParallelEvaluator(args.model_dir, args.label_file, dict_path, image_shape, use_space_char,
+                                  args.batch_size, args.shard_size, args.procs, args.threads, args.engine)
+    print(f"📋 {evaluator.total:,} samples in {args.label_file}")
+    if args.procs is None or args.threads is None:
+        print(f"🔧 Calibrating on {min(args.calibration_samples, evaluator.total)} samples...")
+        procs, threads = evaluator.calibrate(args.calibration_samples)
+        print(f"✅ Using {procs} proc x {threads} thread")
+
+    stats = evaluator.run(args.predictions)
+    print(f"🎯 Exact match: {stats['exact_match']:,}/{stats['images']:,} ({stats['accuracy']:.1%})")
+    print(f"⚡ {stats['images_per_second']:,.1f} images/s ({stats['seconds']:.1f}s, "
+          f"{stats['procs']} proc x {stats['threads']} thread)")
+    evaluator.write_report(Path(args.report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+✂️ Data-driven Dictionary Pruning
+ตัด th_dict.txt ตามความถี่จริงใน label (แทนกฎตายตัวของ optimize_thai_dict.py)
+
+ขนาด CTC head (FC + softmax ทุก timestep) แปรตามจำนวน class ใน dictionary
+เครื่องมือนี้:
+    1. นับความถี่ของทุก entry จาก label files (label_coverage_analyzer)
+    2. ตัด entry ที่ไม่ถูกใช้ / ใช้น้อยกว่า --min-count (หรือเก็บเฉพาะที่ครอบคลุม --coverage)
+    3. เขียน dictionary ใหม่ + overlay dataset ที่ตัด sample ที่มีตัวอักษรที่ถูกตัดออก
+    4. แก้ character_dict_path ใน config
+    5. แปลง head weights ของ checkpoint เก่าให้ตรงกับ class id ใหม่
+    6. ประเมิน params / FLOPs ของ head และวัด latency ของ head บน CPU
+
+Class id ของ CTC: 0 = blank, i + 1 = entry i ของ dictionary (use_space_char: " " ต่อท้าย)
+
+ใช้งาน:
+    python scripts/ml/prune_thai_dict.py thai-letters/datasets/converted/<dataset> --output-dir pruned_dict/
+    python scripts/ml/prune_thai_dict.py <dataset> --output-dir pruned_dict/ --min-count 5 \\
+        --config configs/rec/thai_rec_sagemaker.yml --checkpoint models/best_accuracy.pdparams --remap-datasets
+"""
+
+import re
+import sys
+import json
+import time
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import CompiledDictionary, compile_dictionary
+from label_coverage_analyzer import LabelCoverageAnalyzer
+from overlay_dataset import create_overlay, data_root
+
+REPORT_FILE = "dict_pruning_report.json"
+DEFAULT_HEAD_IN_CHANNELS = 192   # SequenceEncoder rnn, hidden_size 96 x 2 ทิศทาง
+DEFAULT_IMAGE_SHAPE = [3, 32, 100]
+WIDTH_DOWNSAMPLE = 4             # backbone ของ rec ลดความกว้างลง 4 เท่า -> จำนวน timestep
+
+
+def head_cost(num_classes: int, in_channels: int, timesteps: int) -> Dict:
+    """params + FLOPs ต่อภาพของ CTC head (FC + softmax)"""
+    params = in_channels * num_classes + num_classes
+    # FC: multiply-add = 2 FLOPs, softmax ~ exp + sum + div = 3 FLOPs ต่อ class
+    flops = timesteps * (2 * in_channels * num_classes + 3 * num_classes)
+    return {"classes": num_classes, "params": params, "flops_per_image": flops}
+
+
+def benchmark_head(num_classes: int, in_channels: int, timesteps: int, batch_size: int = 32,
+                   repeats: int = 50, seed: int = 0) -> float:
+    """เวลาเฉลี่ย (ms) ของ FC + softmax + argmax ต่อ batch บน CPU (numpy, float32)"""
+    rng = np.random.default_rng(seed)
+    features = rng.standard_normal((batch_size * timesteps, in_channels), dtype=np.float32)
+    weight = rng.standard_normal((in_channels, num_classes), dtype=np.float32)
+    bias = rng.standard_normal(num_classes, dtype=np.float32)
+
+    def forward():
+        logits = features @ weight + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits.argmax(axis=1)
+
+    forward()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        forward()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def _load_params(path: Path) -> Dict:
+    """อ่าน .pdparams (ใช้ paddle ถ้ามี ไม่งั้นใช้ pickle: paddle.save เก็บเป็น numpy array)"""
+    try:
+        import paddle
+        return {k: np.asarray(v) for k, v in paddle.load(str(path)).items()}
+    except ImportError:
+        with open(path, 'rb') as f:
+            return {k: np.asarray(v) for k, v in pickle.load(f).items()}
+
+
+def _save_params(params: Dict, path: Path):
+    try:
+        import paddle
+        paddle.save(params, str(path))
+    except ImportError:
+        with open(path, 'wb') as f:
+            pickle.dump(params, f, protocol=2)
+
+
+def read_image_shape(config_path: Path) -> Optional[List[int]]:
+    """image_shape ตัวแรกของ RecResizeImg ใน config (อ่านแบบข้อความ)"""
+    text = Path(config_path).read_text(encoding='utf-8')
+    match = re.search(r"RecResizeImg:\s*\n\s*image_shape:\s*\[([\d\s,]+)\]", text)
+    return [int(v) for v in match.group(1).split(",")] if match else None
+
+
+class ThaiDictPruner:
+    """✂️ ตัด dictionary ตามความถี่ แล้ว remap dataset / config / checkpoint"""
+
+    def __init__(self, dataset_dirs: List[Path], dict_path: Path, output_dir: Path,
+                 min_count: int = 1, coverage: float = None, keep: str = "",
+                 mode: str = "ctc", use_space_char: bool = False, workers: int = None):
+        """
+        Args:
+            dataset_dirs: dataset ที่ใช้นับความถี่ (ค้นหา rec_gt_*.txt / labels.txt แบบ recursive)
+            dict_path: dictionary เดิม
+            output_dir: โฟลเดอร์ผลลัพธ์ (th_dict.txt, overlays, config, checkpoint, report)
+            min_count: ตัด entry ที่ปรากฏน้อยกว่านี้
+            coverage: เก็บเฉพาะ entry ที่ถี่ที่สุดจนครอบคลุมสัดส่วนนี้ของทุก occurrence (เช่น 0.9999)
+            keep: ตัวอักษรที่เก็บไว้เสมอ (เช่น "0123456789")
+            mode: ctc = นับแบบ CTCLabelEncode (ทีละ codepoint: ตรงกับ class ที่ head ใช้จริง),
+                  greedy = นับแบบ longest match
+            use_space_char: Global.use_space_char ของ config (" " เป็น class สุดท้ายเสมอ)
+        """
+        self.dataset_dirs = [Path(d) for d in dataset_dirs]
+        self.dict_path = Path(dict_path)
+        self.output_dir = Path(output_dir)
+        self.min_count = min_count
+        self.coverage = coverage
+        self.keep = set(keep or "")
+        self.mode = mode
+        self.use_space_char = use_space_char
+        self.workers = workers
+
+        self.dictionary = CompiledDictionary(self.dict_path, use_space_char)
+        self.units = self.dictionary.units
+        self.counts = np.zeros(len(self.units), dtype=np.int64)
+        self.kept_ids = None
+        self.report = {}
+
+    def measure(self) -> np.ndarray:
+        """นับความถี่ของทุก entry จากทุก dataset"""
+        for dataset_dir in self.dataset_dirs:
+            analyzer = LabelCoverageAnalyzer(dataset_dir, self.dict_path, self.mode,
+                                             self.use_space_char, self.workers)
+            analyzer.run()
+            self.counts += analyzer.total_counts()
+        return self.counts
+
+    def select(self) -> np.ndarray:
+        """เลือก entry ที่เก็บไว้ (ลำดับเดิม)"""
+        # " " ของ use_space_char ไม่ได้อยู่ในไฟล์: paddle ต่อท้ายให้เอง
+        file_entries = len(self.units) - (1 if self.use_space_char else 0)
+        candidates = np.arange(file_entries)
+        matchable = np.array([bool(self.units[i]) for i in candidates], dtype=bool)
+        keep = matchable & (self.counts[:file_entries] >= self.min_count)
+
+        if self.coverage is not None:
+            counts = np.where(keep, self.counts[:file_entries], 0)
+            order = np.argsort(-counts, kind='stable')
+            cumulative = np.cumsum(counts[order]) / max(counts.sum(), 1)
+            needed = int(np.searchsorted(cumulative, self.coverage) + 1)
+            by_coverage = np.zeros(file_entries, dtype=bool)
+            by_coverage[order[:needed]] = True
+            keep &= by_coverage
+
+        forced = np.array([self.units[i] in self.keep for i in candidates], dtype=bool)
+        self.kept_ids = candidates[keep | forced]
+        return self.kept_ids
+
+    def class_map(self) -> np.ndarray:
+        """new class -> old class ของ CTC head: [0 (blank)] + kept + 1 (+ space)"""
+        mapping = [0] + (self.kept_ids + 1).tolist()
+        if self.use_space_char:
+            mapping.append(len(self.units))
+        return np.array(mapping, dtype=np.int64)
+
+    def write_dictionary(self) -> Path:
+        """เขียน dictionary ใหม่ + compiled sidecar"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        new_dict = self.output_dir / "th_dict.txt"
+        with open(new_dict, 'w', encoding='utf-8') as f:
+            for i in self.kept_ids:
+                f.write(self.units[i] + "\n")
+        compile_dictionary(new_dict, self.use_space_char)
+        print(f"✅ Pruned dictionary: {new_dict} ({len(self.kept_ids)} entries)")
+        return new_dict
+
+    def remap_datasets(self, new_dict: Path) -> Dict[str, Dict]:
+        """overlay dataset ต่อ dataset: ตัด sample ที่มีตัวอักษรนอก dictionary ใหม่"""
+        chars = sorted({c for i in self.kept_ids for c in self.units[i]} | ({" "} if self.use_space_char else set()))
+        overlays = {}
+        for dataset_dir in self.dataset_dirs:
+            if not (data_root(dataset_dir) / "rec").is_dir():
+                print(f"⚠️ Not a converted dataset, skipped: {dataset_dir}")
+                continue
+            target = self.output_dir / Path(dataset_dir).resolve().name
+            overlay = create_overlay(dataset_dir, target, [{"chars": "".join(chars)}], dict_path=new_dict)
+            overlays[str(target)] = overlay["counts"]
+        return overlays
+
+    def remap_config(self, config_path: Path, new_dict: Path, dict_ref: str = None) -> Path:
+        """คัดลอก config แล้วเปลี่ยน character_dict_path (ส่วนอื่นคงเดิม)"""
+        config_path = Path(config_path)
+        text = config_path.read_text(encoding='utf-8')
+        dict_ref = dict_ref or str(new_dict.resolve())
+        text, replaced = re.subn(r"(?m)^(\s*character_dict_path:\s*).*$",
+                                 lambda m: m.group(1) + dict_ref, text)
+        target = self.output_dir / config_path.name
+        target.write_text(text, encoding='utf-8')
+        print(f"✅ Config: {target} (character_dict_path -> {dict_ref}, {replaced} line(s))")
+        return target
+
+    def remap_checkpoint(self, checkpoint: Path) -> Dict:
+        """ตัด parameter ที่มิติสุดท้ายเท่ากับจำนวน class เดิม (fc.weight [in, C], fc.bias [C])"""
+        checkpoint = Path(checkpoint)
+        params = _load_params(checkpoint)
+        old_classes = len(self.units) + 1
+        mapping = self.class_map()
+
+        remapped = []
+        for name, value in params.items():
+            if value.ndim >= 1 and value.shape[-1] == old_classes:
+                params[name] = np.ascontiguousarray(value[..., mapping])
+                remapped.append({"name": name, "old_shape": list(value.shape),
+                                 "new_shape": list(params[name].shape)})
+        if not remapped:
+            print(f"⚠️ No head parameter with {old_classes} classes in {checkpoint.name}")
+
+        target = self.output_dir / checkpoint.name
+        _save_params(params, target)
+        print(f"✅ Checkpoint: {target} ({len(remapped)} head parameter(s) remapped, optimizer state not copied)")
+        return {"checkpoint": str(target), "remapped": remapped}
+
+    def estimate(self, in_channels: int, timesteps: int, batch_size: int = 32) -> Dict:
+        """params / FLOPs / CPU latency ของ head ก่อนและหลังตัด"""
+        old_classes = len(self.units) + 1
+        new_classes = len(self.class_map())
+        old = head_cost(old_classes, in_channels, timesteps)
+        new = head_cost(new_classes, in_channels, timesteps)
+        old["cpu_ms_per_batch"] = round(benchmark_head(old_classes, in_channels, timesteps, batch_size), 3)
+        new["cpu_ms_per_batch"] = round(benchmark_head(new_classes, in_channels, timesteps, batch_size), 3)
+        return {
+            "in_channels": in_channels,
+            "timesteps": timesteps,
+            "batch_size": batch_size,
+            "before": old,
+            "after": new,
+            "params_saved": old["params"] - new["params"],
+            "flops_saved_ratio": round(1 - new["flops_per_image"] / old["flops_per_image"], 4),
+            "cpu_speedup": round(old["cpu_ms_per_batch"] / max(new["cpu_ms_per_batch"], 1e-9), 2)
+        }
+
+    def write_report(self, extra: Dict) -> Path:
+        pruned = sorted(set(range(len(self.units) - (1 if self.use_space_char else 0))) - set(self.kept_ids.tolist()))
+        total = int(self.counts.sum())
+        self.report = {
+            "dictionary": str(self.dict_path),
+            "datasets": [str(d) for d in self.dataset_dirs],
+            "mode": self.mode,
+            "min_count": self.min_count,
+            "coverage": self.coverage,
+            "entries_before": len(self.units),
+            "entries_after": len(self.kept_ids) + (1 if self.use_space_char else 0),
+            "occurrences": total,
+            "occurrences_lost": int(self.counts[pruned].sum()) if pruned else 0,
+            "pruned": [{"unit": self.units[i], "count": int(self.counts[i])} for i in pruned if self.units[i]],
+            **extra
+        }
+        report_path = self.output_dir / REPORT_FILE
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Pruning report: {report_path}")
+        return report_path
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="✂️ Prune th_dict.txt by measured label frequency")
+    parser.add_argument("datasets", nargs="+", help="Dataset directories used to count label frequencies")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt", help="Dictionary to prune")
+    parser.add_argument("--output-dir", type=str, required=True, help="Where to write the pruned artifacts")
+    parser.add_argument("--min-count", type=int, default=1, help="Drop entries seen fewer times (default: 1)")
+    parser.add_argument("--coverage", type=float, default=None,
+                       help="Keep only the most frequent entries covering this fraction of occurrences")
+    parser.add_argument("--keep", type=str, default="", help="Characters always kept, e.g. 0123456789")
+    parser.add_argument("--mode", type=str, default="ctc", choices=["ctc", "greedy"],
+                       help="ctc: count classes the way CTCLabelEncode emits them (default); greedy: longest match")
+    parser.add_argument("--use-space-char", action="store_true", help="Global.use_space_char of the model")
+    parser.add_argument("--remap-datasets", action="store_true",
+                       help="Write overlay datasets without samples that use pruned characters")
+    parser.add_argument("--config", type=str, action="append", default=[],
+                       help="Training config to copy with the new character_dict_path (repeatable)")
+    parser.add_argument("--dict-ref", type=str, default=None,
+                       help="character_dict_path written into configs (default: absolute path of the new dictionary)")
+    parser.add_argument("--checkpoint", type=str, default=None, help=".pdparams whose head is sliced to the new classes")
+    parser.add_argument("--head-in-channels", type=int, default=None,
+                       help=f"CTC head input channels (default: from checkpoint, else {DEFAULT_HEAD_IN_CHANNELS})")
+    parser.add_argument("--timesteps", type=int, default=None,
+                       help=f"Sequence length (default: image width / {WIDTH_DOWNSAMPLE} from --config)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size of the CPU head benchmark")
+    parser.add_argument("--workers", type=int, default=None)
+
+    args = parser.parse_args()
+
+    if not Path(args.dict).exists():
+        print(f"❌ Dictionary not found: {args.dict}")
+        sys.exit(1)
+
+    pruner = ThaiDictPruner(args.datasets, args.dict, args.output_dir, args.min_count, args.coverage,
+                            args.keep, args.mode, args.use_space_char, args.workers)
+    pruner.measure()
+    pruner.select()
+    new_dict = pruner.write_dictionary()
+
+    extra = {}
+    if args.remap_datasets:
+        extra["overlays"] = pruner.remap_datasets(new_dict)
+    if args.config:
+        extra["configs"] = [str(pruner.remap_config(c, new_dict, args.dict_ref)) for c in args.config]
+
+    in_channels = args.head_in_channels
+    if args.checkpoint:
+        extra["checkpoint"] = pruner.remap_checkpoint(args.checkpoint)
+        for item in extra["checkpoint"]["remapped"]:
+            if len(item["old_shape"]) == 2 and in_channels is None:
+                in_channels = item["old_shape"][0]
+
+    timesteps = args.timesteps
+    if timesteps is None:
+        image_shape = (read_image_shape(args.config[0]) if args.config else None) or DEFAULT_IMAGE_SHAPE
+        timesteps = image_shape[2] // WIDTH_DOWNSAMPLE
+
+    head = pruner.estimate(in_channels or DEFAULT_HEAD_IN_CHANNELS, timesteps, args.batch_size)
+    extra["head"] = head
+    pruner.write_report(extra)
+
+    report = pruner.report
+    print(f"📊 Entries: {report['entries_before']} -> {report['entries_after']} "
+          f"({report['occurrences_lost']:,}/{report['occurrences']:,} occurrences lost)")
+    print(f"⚡ Head: {head['before']['params']:,} -> {head['after']['params']:,} params, "
+          f"FLOPs -{head['flops_saved_ratio'] * 100:.1f}%, "
+          f"CPU {head['before']['cpu_ms_per_batch']:.2f} -> {head['after']['cpu_ms_per_batch']:.2f} ms/batch "
+          f"({head['cpu_speedup']}x)")
+
+
+if __name__ == "__main__":
+    main()
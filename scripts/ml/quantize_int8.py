@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗜️ Post-training INT8 Quantization (ONNX Runtime static quantization)
+inference.onnx (FP32) -> inference_int8.onnx โดย calibrate จากภาพใน rec_gt_val.txt
+
+ขั้นตอน:
+    1. สุ่มภาพ calibration N ภาพจาก label file (หรือ --per-class ภาพต่อ class ให้ครบทุกตัวอักษร)
+    2. preprocess แบบเดียวกับ ThaiOCRPredictor แล้วป้อนให้ quantize_static (QDQ, weight per-channel)
+    3. รัน validation set ทั้งไฟล์ผ่าน FP32 และ INT8 แล้วรายงาน
+       - exact match ของแต่ละโมเดล + ส่วนต่าง และสัดส่วนภาพที่ข้อความตรงกัน
+       - ขนาดไฟล์โมเดล
+       - latency ของ forward ต่อ batch (p50 / p99) ที่หลาย batch size
+
+โมเดล INT8 ใช้กับ ThaiOCRPredictor ได้เลย: ThaiOCRPredictor("<dir>/inference_int8.onnx", dict, engine="onnx")
+
+ใช้งาน:
+    python scripts/ml/quantize_int8.py models/sagemaker_trained/best_model <rec_gt_val.txt> --calibration-samples 300
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+sys.path.append(str(Path(__file__).resolve().parent))
+from label_index import LabelIndex
+from onnx_backend import ONNX_FILE, find_onnx_model
+from thai_ocr_predictor import DEFAULT_BATCH_SIZE, ThaiOCRPredictor
+
+INT8_FILE = "inference_int8.onnx"
+DEFAULT_CALIBRATION_SAMPLES = 200
+DEFAULT_BATCH_SIZES = [1, 8, 32, 64]
+LATENCY_REPEATS = 20
+REPORT_FILE = "int8_quantization_report.json"
+
+
+def calibration_lines(label_file: Path, samples: int, per_class: int = 0, seed: int = 0) -> List[int]:
+    """line ids สำหรับ calibration: สุ่ม samples บรรทัด หรือ per_class บรรทัดต่อ class"""
+    with LabelIndex(label_file) as index:
+        return index.stratified(per_class, seed) if per_class else index.sample(samples, seed)
+
+
+def _calibration_reader(input_name: str, batches: Sequence[np.ndarray]):
+    """CalibrationDataReader ที่ป้อน batch ที่ preprocess แล้วทีละ batch"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._feeds = iter([{input_name: batch} for batch in batches])
+
+        def get_next(self):
+            return next(self._feeds, None)
+
+    return _Reader()
+
+
+def quantize_model(fp32_model: Path, output: Path, batches: Sequence[np.ndarray], per_channel: bool = True,
+                   calibrate_method: str = "MinMax") -> Path:
+    """static quantization แบบ QDQ (activation uint8, weight int8)"""
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    except ImportError:
+        raise ImportError("onnxruntime is required for INT8 quantization: pip install onnxruntime")
+
+    input_name = ort.InferenceSession(str(fp32_model), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    model_input = fp32_model
+    try:
+        # shape inference + graph optimization ก่อน quantize (แนะนำโดย onnxruntime)
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        model_input = output.with_suffix(".pre.onnx")
+        quant_pre_process(str(fp32_model), str(model_input))
+    except Exception as e:
+        print(f"⚠️ quant_pre_process skipped: {e}")
+        model_input = fp32_model
+
+    try:
+        quantize_static(str(model_input), str(output), _calibration_reader(input_name, batches),
+                        quant_format=QuantFormat.QDQ, per_channel=per_channel,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        calibrate_method=getattr(CalibrationMethod, calibrate_method))
+    finally:
+        if model_input != fp32_model:
+            Path(model_input).unlink(missing_ok=True)
+    return output
+
+
+def evaluate(predictor: ThaiOCRPredictor, images: Sequence[Path], labels: Sequence[str]) -> Dict:
+    """exact match บนภาพทั้งหมด"""
+    predictions = [text for text, _ in predictor.predict(list(images))]
+    correct = sum(p == l for p, l in zip(predictions, labels))
+    return {"predictions": predictions, "correct": correct,
+            "accuracy": correct / len(labels) if labels else 0.0}
+
+
+def measure_latency(forward, sample: np.ndarray, batch_sizes: Sequence[int],
+                    repeats: int = LATENCY_REPEATS) -> Dict[int, Dict]:
+    """latency ของ forward ต่อ batch (warm up 1 รอบต่อ batch size)"""
+    results = {}
+    for batch_size in batch_sizes:
+        batch = np.ascontiguousarray(np.repeat(sample[None], batch_size, axis=0))
+        forward(batch)
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            forward(batch)
+            timings.append((time.perf_counter() - started) * 1000)
+        p50 = float(np.percentile(timings, 50))
+        results[batch_size] = {"p50_ms": p50, "p99_ms": float(np.percentile(timings, 99)),
+                               "images_per_second": batch_size / (p50 / 1000) if p50 else 0.0}
+    return results
+
+
+class Int8Quantizer:
+    """quantize + เปรียบเทียบ FP32 กับ INT8 บน validation set"""
+
+    def __init__(self, model_dir: Path, label_file: Path, dict_path: Path,
+                 image_shape: Optional[List[int]] = None, use_space_char: bool = False,
+                 batch_size: int = DEFAULT_BATCH_SIZE, cpu_threads: Optional[int] = None):
+        self.model_dir = Path(model_dir)
+        self.label_file = Path(label_file)
+        self.fp32_model = find_onnx_model(self.model_dir)
+        self.int8_model = self.fp32_model.parent / INT8_FILE
+        self.options = dict(dict_path=dict_path, image_shape=image_shape, use_space_char=use_space_char,
+                            batch_size=batch_size, cpu_threads=cpu_threads, engine="onnx")
+        self.fp32 = ThaiOCRPredictor(self.fp32_model, **self.options)
+
+    def load_samples(self, ids: Optional[Sequence[int]] = None):
+        with LabelIndex(self.label_file) as index:
+            lines = index.lines(ids) if ids is not None else index.head(len(index))
+        return [self.label_file.parent / path for path, _ in lines], [label for _, label in lines]
+
+    def quantize(self, calibration_samples: int = DEFAULT_CALIBRATION_SAMPLES, per_class: int = 0,
+                 calibrate_method: str = "MinMax", seed: int = 0) -> Path:
+        images, _ = self.load_samples(calibration_lines(self.label_file, calibration_samples, per_class, seed))
+        batch_size = self.options["batch_size"]
+        batches = [np.stack([self.fp32.preprocess(image) for image in images[start:start + batch_size]])
+                   for start in range(0, len(images), batch_size)]
+        print(f"🗜️ Calibrating on {len(images)} images ({calibrate_method}) -> {self.int8_model}")
+        started = time.perf_counter()
+        quantize_model(self.fp32_model, self.int8_model, batches, calibrate_method=calibrate_method)
+        print(f"✅ Quantized in {time.perf_counter() - started:.1f}s")
+        return self.int8_model
+
+    def compare(self, max_samples: int = 0, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES) -> Dict:
+        images, labels = self.load_samples()
+        if max_samples:
+            images, labels = images[:max_samples], labels[:max_samples]
+
+        int8 = ThaiOCRPredictor(self.int8_model, **self.options)
+        report = {"images": len(images), "models": {}}
+        results = {}
+        try:
+            for name, predictor, path in (("fp32", self.fp32, self.fp32_model), ("int8", int8, self.int8_model)):
+                results[name] = evaluate(predictor, images, labels)
+                sample = predictor.preprocess(images[0])
+                report["models"][name] = {
+                    "path": str(path),
+                    "size_mb": path.stat().st_size / 1024 / 1024,
+                    "accuracy": results[name]["accuracy"],
+                    "latency": measure_latency(predictor.forward, sample, batch_sizes),
+                }
+        finally:
+            int8.close()
+
+        same = sum(a == b for a, b in zip(results["fp32"]["predictions"], results["int8"]["predictions"]))
+        report["accuracy_delta"] = report["models"]["int8"]["accuracy"] - report["models"]["fp32"]["accuracy"]
+        report["prediction_agreement"] = same / len(images) if images else 0.0
+        report["size_ratio"] = report["models"]["int8"]["size_mb"] / report["models"]["fp32"]["size_mb"]
+        return report
+
+    def close(self):
+        self.fp32.close()
+
+
+def print_report(report: Dict):
+    fp32, int8 = report["models"]["fp32"], report["models"]["int8"]
+    print(f"\n📊 FP32 vs INT8 on {report['images']:,} images")
+    print(f"   Accuracy : {fp32['accuracy']:.2%} -> {int8['accuracy']:.2%} ({report['accuracy_delta']:+.2%}), "
+          f"same prediction {report['prediction_agreement']:.2%}")
+    print(f"   Size     : {fp32['size_mb']:.2f} MB -> {int8['size_mb']:.2f} MB ({report['size_ratio']:.0%})")
+    print(f"   {'batch':>5}  {'fp32 p50':>9}  {'fp32 p99':>9}  {'int8 p50':>9}  {'int8 p99':>9}  {'speedup':>7}")
+    for batch_size, a in fp32["latency"].items():
+        b = int8["latency"][batch_size]
+        speedup = a["p50_ms"] / b["p50_ms"] if b["p50_ms"] else 0.0
+        print(f"   {batch_size:>5}  {a['p50_ms']:>7.2f}ms  {a['p99_ms']:>7.2f}ms  "
+              f"{b['p50_ms']:>7.2f}ms  {b['p99_ms']:>7.2f}ms  {speedup:>6.2f}x")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🗜️ INT8 post-training quantization of the ONNX recognition model")
+    parser.add_argument("model_dir", help=f"Directory with {ONNX_FILE} (or the .onnx file)")
+    parser.add_argument("label_file", help="rec_gt_val.txt (calibration + evaluation)")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--image-shape", type=str, default="3,32,100")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--calibration-samples", type=int, default=DEFAULT_CALIBRATION_SAMPLES)
+    parser.add_argument("--per-class", type=int, default=0, help="> 0: calibrate on N images per class instead")
+    parser.add_argument("--calibrate-method", choices=["MinMax", "Entropy", "Percentile"], default="MinMax")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-samples", type=int, default=0, help="Evaluation samples (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--latency-batch-sizes", type=str, default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--cpu-threads", type=int, default=None)
+    parser.add_argument("--skip-quantize", action="store_true", help=f"Only compare an existing {INT8_FILE}")
+    parser.add_argument("--report", type=str, default=REPORT_FILE)
+
+    args = parser.parse_args()
+
+    quantizer = Int8Quantizer(args.model_dir, args.label_file, args.dict,
+                              [int(v) for v in args.image_shape.split(",")], args.use_space_char,
+                              args.batch_size, args.cpu_threads)
+    try:
+        if not args.skip_quantize:
+            quantizer.quantize(args.calibration_samples, args.per_class, args.calibrate_method, args.seed)
+        report = quantizer.compare(args.max_samples, [int(v) for v in args.latency_batch_sizes.split(",")])
+    finally:
+        quantizer.close()
+
+    print_report(report)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗃️ Content-addressed Result Cache
+เก็บผล recognition ต่อภาพใน SQLite โดยใช้ key = (hash ของ weight, hash ของ inference config, hash ของภาพ)
+
+- ภาพ/โมเดล/config เดิม -> ได้ผลจาก cache โดยไม่ต้อง infer (ไม่ต้องโหลดโมเดลถ้า hit ทั้งหมด)
+- เปลี่ยน weight, config (รวม dictionary และ engine) หรือเนื้อหาภาพ -> key ใหม่ จึง miss เอง
+  ไม่ต้องล้าง cache ด้วยมือ (ผลเก่ายังอยู่ เผื่อสลับกลับ; ลบได้ด้วย clear)
+- hash ของไฟล์จำไว้ตาม (path, size, mtime_ns) เหมือน index ของ git: ไฟล์ที่ไม่เปลี่ยนไม่ต้องอ่านซ้ำ
+
+CachedPredictor ห่อ predictor ใดก็ได้ที่มี predict_batch (ThaiOCRPredictor / InferRecRunner)
+ส่งเฉพาะภาพที่ miss ไป infer แล้วรวมผลกลับตามลำดับเดิม
+
+ใช้งาน:
+    python scripts/ml/result_cache.py stats
+    python scripts/ml/result_cache.py clear --keep-latest
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_CACHE_FILE = Path(__file__).resolve().parents[2] / "evaluation_cache.sqlite"
+HASH_CHUNK = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    model TEXT NOT NULL, config TEXT NOT NULL, image TEXT NOT NULL,
+    text TEXT NOT NULL, confidence REAL NOT NULL, created REAL NOT NULL DEFAULT (julianday('now')),
+    PRIMARY KEY (model, config, image)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _digest() -> "hashlib.blake2b":
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data: bytes) -> str:
+    h = _digest()
+    h.update(data)
+    return h.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    h = _digest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def weight_files(model_dir: Path, engine: str = "paddle") -> List[Path]:
+    """ไฟล์ที่กำหนดผลของโมเดล: inference.pdmodel/json + inference.pdiparams หรือ .onnx"""
+    if engine == "onnx":
+        from onnx_backend import find_onnx_model
+        return [find_onnx_model(Path(model_dir))]
+    from thai_ocr_predictor import find_model_files
+    return list(find_model_files(Path(model_dir)))
+
+
+def _canonical_config(config_file: Path) -> bytes:
+    """config ที่ parse แล้วเรียง key (แก้ comment / ช่องว่างไม่ทำให้ miss); ไม่มี yaml ใช้ไฟล์ดิบ"""
+    raw = Path(config_file).read_bytes()
+    try:
+        import yaml
+        return json.dumps(yaml.safe_load(raw), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    except Exception:
+        return raw
+
+
+def run_keys(model_digests: Sequence[str], config_file: Optional[Path] = None,
+             extra_digests: Sequence[str] = (), **options) -> Tuple[str, str]:
+    """(model key, config key) จาก hash ของ weight files และ config + ไฟล์ประกอบ (เช่น dictionary) + options"""
+    h = _digest()
+    for digest in model_digests:
+        h.update(digest.encode())
+    model_key = h.hexdigest()
+
+    h = _digest()
+    if config_file is not None:
+        h.update(_canonical_config(config_file))
+    for digest in extra_digests:
+        h.update(digest.encode())
+    h.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return model_key, h.hexdigest()
+
+
+class ResultCache:
+    """SQLite cache ของผลต่อภาพสำหรับโมเดลและ config หนึ่งชุด"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.model_key = ""
+        self.config_key = ""
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- hashing -------------------------------------------------------------------------------
+
+    def file_digests(self, paths: Sequence[Path]) -> List[str]:
+        """hash เนื้อหาไฟล์ (อ่านซ้ำเฉพาะไฟล์ที่ size / mtime เปลี่ยน)"""
+        keys = [str(Path(p).resolve()) for p in paths]
+        stats = [os.stat(k) for k in keys]
+        known = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            known.update((row[0], row[1:]) for row in self.db.execute(
+                f"SELECT path, size, mtime_ns, digest FROM files WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk))
+
+        digests, fresh = [], []
+        for key, st in zip(keys, stats):
+            cached = known.get(key)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                digests.append(cached[2])
+                continue
+            digest = hash_file(Path(key))
+            digests.append(digest)
+            fresh.append((key, st.st_size, st.st_mtime_ns, digest))
+        if fresh:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", fresh)
+        return digests
+
+    def image_digests(self, images: Sequence) -> List[str]:
+        """path -> hash เนื้อหาไฟล์, ndarray -> hash ของ shape/dtype/ข้อมูล"""
+        digests: List[Optional[str]] = [None] * len(images)
+        paths = [(i, image) for i, image in enumerate(images) if not isinstance(image, np.ndarray)]
+        for (i, _), digest in zip(paths, self.file_digests([p for _, p in paths])):
+            digests[i] = digest
+        for i, image in enumerate(images):
+            if isinstance(image, np.ndarray):
+                digests[i] = hash_bytes(f"{image.shape}{image.dtype}".encode() + np.ascontiguousarray(image).tobytes())
+        return digests
+
+    def bind(self, model_files: Sequence[Path], config_file: Optional[Path] = None,
+             extra_files: Sequence[Path] = (), **options) -> "ResultCache":
+        """ตั้ง key ของโมเดล (weight files) และ config (config + ไฟล์ประกอบ เช่น dictionary + options)"""
+        self.model_key, self.config_key = run_keys(self.file_digests(model_files), config_file,
+                                                   self.file_digests(extra_files), **options)
+        return self
+
+    # ---- results -------------------------------------------------------------------------------
+
+    def get_many(self, digests: Sequence[str]) -> Dict[str, Tuple[str, float]]:
+        found = {}
+        unique = list(dict.fromkeys(digests))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            found.update((row[0], (row[1], row[2])) for row in self.db.execute(
+                f"SELECT image, text, confidence FROM results WHERE model = ? AND config = ? "
+                f"AND image IN ({','.join('?' * len(chunk))})", [self.model_key, self.config_key, *chunk]))
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Tuple[str, float]]]):
+        rows = [(self.model_key, self.config_key, digest, text, float(confidence))
+                for digest, (text, confidence) in items]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO results (model, config, image, text, confidence) "
+                                "VALUES (?, ?, ?, ?, ?)", rows)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        entries, keys = self.db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT model || config) FROM results").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "entries": entries, "model_config_pairs": keys, "path": str(self.path)}
+
+    def clear(self, keep_latest: bool = False) -> int:
+        """ลบผลทั้งหมด (keep_latest: เก็บเฉพาะคู่ model/config ที่เขียนล่าสุด)"""
+        with self.db:
+            if keep_latest:
+                deleted = self.db.execute(
+                    "DELETE FROM results WHERE model || config != "
+                    "(SELECT model || config FROM results ORDER BY created DESC LIMIT 1)").rowcount
+            else:
+                deleted = self.db.execute("DELETE FROM results").rowcount
+                self.db.execute("DELETE FROM files")
+        self.db.execute("VACUUM")
+        return deleted
+
+
+class CachedPredictor:
+    """ห่อ predictor: infer เฉพาะภาพที่ไม่มีใน cache
+
+    factory: สร้าง predictor เมื่อมี miss ครั้งแรก (hit ทั้งหมด = ไม่ต้องโหลดโมเดล)
+    ผลจาก predictor ที่ตั้ง last_error (เช่น infer_rec.py ล้มเหลว / timeout) จะไม่ถูกเก็บ
+    """
+
+    def __init__(self, cache: ResultCache, predictor=None, factory: Optional[Callable] = None):
+        if predictor is None and factory is None:
+            raise ValueError("predictor or factory is required")
+        self.cache = cache
+        self.predictor = predictor
+        self._factory = factory
+        self.last_error = ""
+
+    @property
+    def loaded(self) -> bool:
+        return self.predictor is not None
+
+    def _cached(self, images: Sequence, infer: Callable) -> List[Tuple[str, float]]:
+        images = list(images)
+        digests = self.cache.image_digests(images)
+        cached = self.cache.get_many(digests)
+        missing = [i for i, digest in enumerate(digests) if digest not in cached]
+        self.cache.hits += len(images) - len(missing)
+        self.cache.misses += len(missing)
+        self.last_error = ""
+
+        results = [cached.get(digest) for digest in digests]
+        if missing:
+            if self.predictor is None:
+                self.predictor = self._factory()
+            predictions = infer(self.predictor, [images[i] for i in missing])
+            self.last_error = getattr(self.predictor, "last_error", "") or ""
+            for i, prediction in zip(missing, predictions):
+                results[i] = prediction
+            if not self.last_error:
+                self.cache.put_many({digests[i]: results[i] for i in missing}.items())
+        return results
+
+    def predict_batch(self, images: Sequence) -> List[Tuple[str, float]]:
+        return self._cached(images, lambda predictor, batch: predictor.predict_batch(batch))
+
+    def predict(self, images: Sequence, batch_size: Optional[int] = None) -> List[Tuple[str, float]]:
+        """ทั้งชุด: lookup ครั้งเดียว แล้วส่งเฉพาะ miss ให้ predictor.predict (แบ่ง batch เอง)"""
+        return self._cached(images, lambda predictor, batch: predictor.predict(batch, batch_size))
+
+    def predict_one(self, image) -> Tuple[str, float]:
+        return self.predict_batch([image])[0]
+
+    def throughput(self) -> Dict:
+        timing = self.predictor.throughput() if self.loaded else {"images": 0}
+        return {**timing, "cache": self.cache.stats()}
+
+    @property
+    def load_seconds(self) -> float:
+        return getattr(self.predictor, "load_seconds", 0.0)
+
+    def close(self):
+        if self.loaded:
+            self.predictor.close()
+        self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🗃️ Inspect or clear the evaluation result cache")
+    parser.add_argument("action", choices=["stats", "clear"])
+    parser.add_argument("--cache", type=str, default=str(DEFAULT_CACHE_FILE))
+    parser.add_argument("--keep-latest", action="store_true", help="clear: keep the most recent model/config")
+
+    args = parser.parse_args()
+
+    with ResultCache(Path(args.cache)) as cache:
+        if args.action == "clear":
+            print(f"🧹 Removed {cache.clear(args.keep_latest):,} cached results")
+        stats = cache.stats()
+        print(f"🗃️ {stats['path']}: {stats['entries']:,} results for {stats['model_config_pairs']} model/config pairs")
+
+
+if __name__ == "__main__":
+    main()
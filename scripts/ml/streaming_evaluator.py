@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌊 Streaming Full-Validation Evaluation
+ประเมินทั้ง rec_gt_val.txt ทีละ batch แล้วต่อท้ายผลแต่ละภาพลงไฟล์ JSONL ทันทีที่เสร็จ
+
+- อ่าน label file ผ่าน LabelIndex (mmap) ทีละช่วงบรรทัด: ไม่โหลดทั้งไฟล์ / ไม่เก็บผลไว้ใน memory
+- metric สะสม (exact match, CER = edit รวม / ความยาว label รวม, confidence เฉลี่ย) เป็นตัวนับคงที่
+- แสดง progress ทุก --progress-seconds: จำนวนที่เสร็จ, accuracy, CER, images/s และ ETA
+- resume: ถ้า JSONL มีอยู่แล้ว อ่านผลเดิมครั้งเดียวเพื่อคืนค่าตัวนับ แล้วเริ่มต่อจากบรรทัดถัดจาก
+  บรรทัดสุดท้ายที่เขียนเสร็จ (บรรทัดที่เขียนค้างครึ่งเดียวตอนถูก kill จะถูกตัดทิ้ง)
+- ไฟล์ประกอบ <output>.meta.json เก็บ label file + model / config key ของ run ที่เขียน JSONL
+  ถ้าไม่ตรงกับ run ปัจจุบัน (หรือไม่มีไฟล์นี้) จะไม่ resume ต่อ ต้องใช้ --restart
+
+แต่ละบรรทัดของ JSONL:
+    {"line": 17, "image": "thai_data/val/..jpg", "label": "ก", "predicted": "ก", "confidence": 0.98,
+     "edit_distance": 0, "correct": true, "error": null}
+
+ใช้งาน:
+    python scripts/ml/streaming_evaluator.py models/sagemaker_trained/best_model <rec_gt_val.txt> --output val_results.jsonl
+    (รันคำสั่งเดิมซ้ำหลังถูกขัดจังหวะ = ทำต่อจากบรรทัดที่ค้าง; --restart เพื่อเริ่มใหม่)
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+sys.path.append(str(Path(__file__).resolve().parent))
+from label_index import LabelIndex
+from eval_metrics import edit_distances
+from thai_ocr_predictor import DEFAULT_BATCH_SIZE, ENGINES, ThaiOCRPredictor
+
+DEFAULT_OUTPUT = "val_results.jsonl"
+PROGRESS_SECONDS = 10.0
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(max(seconds, 0))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class RunningMetrics:
+    """ตัวนับสะสม (memory คงที่ไม่ว่าจะกี่ภาพ)"""
+
+    def __init__(self):
+        self.samples = 0
+        self.exact = 0
+        self.edits = 0
+        self.reference_characters = 0
+        self.confidence_sum = 0.0
+        self.errors = 0
+
+    def update(self, record: Dict):
+        self.samples += 1
+        self.exact += bool(record["correct"])
+        self.edits += record["edit_distance"]
+        self.reference_characters += len(record["label"])
+        self.confidence_sum += record["confidence"]
+        self.errors += record.get("error") is not None
+
+    @property
+    def accuracy(self) -> float:
+        return self.exact / self.samples if self.samples else 0.0
+
+    @property
+    def cer(self) -> float:
+        return self.edits / self.reference_characters if self.reference_characters else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "samples": self.samples,
+            "exact_matches": self.exact,
+            "accuracy": self.accuracy,
+            "cer": self.cer,
+            "character_edits": self.edits,
+            "reference_characters": self.reference_characters,
+            "average_confidence": self.confidence_sum / self.samples if self.samples else 0.0,
+            "errors": self.errors,
+        }
+
+
+def read_completed(output: Path) -> Iterator[Dict]:
+    """ผลที่เขียนเสร็จแล้วใน JSONL (ตัดบรรทัดสุดท้ายที่ไม่สมบูรณ์ทิ้งจากไฟล์)"""
+    if not output.exists():
+        return
+    valid_bytes = 0
+    with open(output, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            valid_bytes += len(raw)
+            yield record
+    if valid_bytes < output.stat().st_size:
+        with open(output, 'r+b') as f:
+            f.truncate(valid_bytes)
+
+
+class StreamingEvaluator:
+    """ประเมินทั้ง label file แบบ stream ลง JSONL พร้อม resume"""
+
+    def __init__(self, predictor, label_file: Path, output: Path = Path(DEFAULT_OUTPUT),
+                 batch_size: Optional[int] = None, progress_seconds: float = PROGRESS_SECONDS,
+                 run_info: Optional[Dict] = None, normalize: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            predictor: อะไรก็ได้ที่มี predict_batch (ThaiOCRPredictor, CachedPredictor, InferRecRunner)
+            batch_size: บรรทัดต่อรอบ (None = predictor.batch_size)
+            run_info: ค่าที่ต้องตรงกันจึง resume ได้ เช่น {"model": ..., "config": ...} จาก result_cache.run_keys
+            normalize: แปลงข้อความที่ทายก่อนให้คะแนน (None = ใช้ตามที่ทาย)
+        """
+        self.predictor = predictor
+        self.label_file = Path(label_file)
+        self.root = self.label_file.parent
+        self.output = Path(output)
+        self.meta_file = self.output.with_suffix(".meta.json")
+        self.batch_size = batch_size or getattr(predictor, "batch_size", DEFAULT_BATCH_SIZE)
+        self.progress_seconds = progress_seconds
+        self.run_info = dict(run_info or {})
+        self.normalize = normalize
+        self.metrics = RunningMetrics()
+
+    def header(self) -> Dict:
+        """ข้อมูลของ run นี้ที่เขียนลง meta_file (ผ่าน JSON แล้ว เพื่อเทียบกับไฟล์ได้ตรงๆ)"""
+        header = {"label_file": str(self.label_file.resolve()), "label_bytes": self.label_file.stat().st_size,
+                  **self.run_info}
+        return json.loads(json.dumps(header, sort_keys=True, default=str))
+
+    def resume_conflict(self) -> str:
+        """เหตุผลที่ resume ผลใน output ไม่ได้ ("" = resume ได้ หรือยังไม่มีผล)"""
+        if not self.output.exists() or not self.output.stat().st_size:
+            return ""
+        if not self.meta_file.exists():
+            return f"{self.output} has no {self.meta_file.name}; cannot tell which run wrote it"
+        with open(self.meta_file, 'r', encoding='utf-8') as f:
+            written = json.load(f)
+        header = self.header()
+        for key in sorted(set(header) | set(written)):
+            if written.get(key) != header.get(key):
+                return f"{self.output} was written with a different {key} ({written.get(key)!r}, now {header.get(key)!r})"
+        return ""
+
+    def resume_point(self) -> int:
+        """คืนค่าตัวนับจากผลเดิม แล้วคืนบรรทัดถัดไปที่ต้องทำ"""
+        self.metrics = RunningMetrics()
+        next_line = 0
+        for record in read_completed(self.output):
+            self.metrics.update(record)
+            next_line = max(next_line, record["line"] + 1)
+        return next_line
+
+    def evaluate_lines(self, start: int, lines: List) -> List[Dict]:
+        """predict บรรทัดหนึ่ง batch (batch ล้มเหลว -> ลองทีละภาพ เพื่อให้เหลือ error เฉพาะภาพที่เสีย)"""
+        paths = [self.root / rel_path for rel_path, _ in lines]
+        predictions, errors = [("", 0.0)] * len(lines), [None] * len(lines)
+        found = []
+        for i, path in enumerate(paths):
+            if path.exists():
+                found.append(i)
+            else:
+                errors[i] = "image not found"
+
+        try:
+            for i, prediction in zip(found, self.predictor.predict_batch([paths[i] for i in found])):
+                predictions[i] = prediction
+        except Exception:
+            for i in found:
+                try:
+                    predictions[i] = self.predictor.predict_batch([paths[i]])[0]
+                except Exception as e:
+                    errors[i] = str(e)
+        if found and getattr(self.predictor, "last_error", ""):
+            for i in found:
+                if not predictions[i][0]:
+                    errors[i] = self.predictor.last_error[-300:]
+
+        labels = [label for _, label in lines]
+        texts = [text for text, _ in predictions]
+        scored = [self.normalize(text) for text in texts] if self.normalize else texts
+        distances = edit_distances(scored, labels)
+        records = [{"line": start + i, "image": rel_path, "label": label, "predicted": text,
+                    "confidence": float(conf), "edit_distance": int(distance), "correct": text == label,
+                    "error": error}
+                   for i, ((rel_path, label), text, (_, conf), distance, error)
+                   in enumerate(zip(lines, scored, predictions, distances, errors))]
+        if self.normalize:
+            for record, text in zip(records, texts):
+                record["full_prediction"] = text
+        return records
+
+    def progress(self, done: int, total: int, processed: int, elapsed: float) -> str:
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else 0.0
+        return (f"⏳ {done:,}/{total:,} ({done / total if total else 1.0:.1%}) | "
+                f"acc {self.metrics.accuracy:.2%} | CER {self.metrics.cer:.2%} | "
+                f"{rate:,.1f} images/s | ETA {format_duration(eta)}")
+
+    def run(self, restart: bool = False, max_samples: int = 0) -> Dict:
+        """ประเมินจนจบไฟล์ (หรือ max_samples บรรทัดแรก) แล้วคืนสรุป
+
+        Raises:
+            ValueError: output มีผลของ run อื่น (ดู resume_conflict) และไม่ได้สั่ง restart
+        """
+        if restart:
+            for path in (self.output, self.meta_file):
+                if path.exists():
+                    path.unlink()
+        conflict = self.resume_conflict()
+        if conflict:
+            raise ValueError(f"{conflict}; use --restart to start over")
+        if not self.output.exists() or not self.output.stat().st_size:
+            with open(self.meta_file, 'w', encoding='utf-8') as f:
+                json.dump(self.header(), f, ensure_ascii=False, indent=2)
+        start = self.resume_point()
+        with LabelIndex(self.label_file) as index:
+            total = min(len(index), max_samples) if max_samples else len(index)
+            if start:
+                print(f"↩️ Resuming at line {start:,}/{total:,} ({self.metrics.samples:,} results in {self.output})")
+
+            started = last_report = time.perf_counter()
+            processed = reported = 0
+            with open(self.output, 'a', encoding='utf-8') as out:
+                for begin in range(start, total, self.batch_size):
+                    end = min(begin + self.batch_size, total)
+                    records = self.evaluate_lines(begin, index.lines(range(begin, end)))
+                    out.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                    out.flush()
+                    for record in records:
+                        self.metrics.update(record)
+                    processed += len(records)
+
+                    now = time.perf_counter()
+                    if now - last_report >= self.progress_seconds:
+                        print(self.progress(end, total, processed, now - started))
+                        last_report, reported = now, end
+                os.fsync(out.fileno())
+
+        elapsed = time.perf_counter() - started
+        if processed and reported < total:
+            print(self.progress(total, total, processed, elapsed))
+        return {
+            **self.metrics.as_dict(),
+            "total_lines": total,
+            "resumed_from": start,
+            "processed_this_run": processed,
+            "seconds": elapsed,
+            "images_per_second": processed / elapsed if elapsed > 0 else 0.0,
+            "output": str(self.output),
+        }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🌊 Stream a full validation-set evaluation to JSONL (resumable)")
+    parser.add_argument("model_dir", help="Exported inference model directory (or .onnx with --engine onnx)")
+    parser.add_argument("label_file", help="rec_gt_val.txt (images are resolved next to it)")
+    parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT)
+    parser.add_argument("--restart", action="store_true", help="Discard existing results instead of resuming")
+    parser.add_argument("--max-samples", type=int, default=0, help="Only the first N lines (0 = all)")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--config", type=str, default=None, help="PaddleOCR config for dictionary / image shape")
+    parser.add_argument("--image-shape", type=str, default="3,32,100")
+    parser.add_argument("--use-space-char", action="store_true")
+    parser.add_argument("--engine", choices=ENGINES, default="paddle")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--progress-seconds", type=float, default=PROGRESS_SECONDS)
+    parser.add_argument("--cache", type=str, default=None, help="Result cache (SQLite) to reuse earlier runs")
+
+    args = parser.parse_args()
+
+    dict_path, image_shape = args.dict, [int(v) for v in args.image_shape.split(",")]
+    use_space_char = args.use_space_char
+    if args.config:
+        from thai_ocr_predictor import resolve_rec_config
+        settings = resolve_rec_config(Path(args.config))
+        dict_path = settings["character_dict_path"] or dict_path
+        image_shape, use_space_char = settings["image_shape"], settings["use_space_char"]
+
+    def load():
+        return ThaiOCRPredictor(args.model_dir, dict_path, image_shape, use_space_char, args.batch_size,
+                                engine=args.engine)
+
+    from result_cache import CachedPredictor, ResultCache, hash_file, run_keys, weight_files
+    model_files = weight_files(Path(args.model_dir), args.engine)
+    config_file = Path(args.config) if args.config else None
+    options = {"engine": args.engine, "image_shape": image_shape, "use_space_char": use_space_char}
+    if args.cache:
+        cache = ResultCache(Path(args.cache)).bind(model_files, config_file, [Path(dict_path)], **options)
+        model_key, config_key = cache.model_key, cache.config_key
+    else:
+        cache = None
+        model_key, config_key = run_keys([hash_file(p) for p in model_files], config_file,
+                                         [hash_file(Path(dict_path))], **options)
+
+    evaluator = StreamingEvaluator(None, Path(args.label_file), Path(args.output), args.batch_size,
+                                   args.progress_seconds, {"model": model_key, "config": config_key})
+    conflict = "" if args.restart else evaluator.resume_conflict()
+    if conflict:
+        if cache is not None:
+            cache.close()
+        print(f"❌ {conflict}")
+        print("   Use --restart to discard it, or --output to write somewhere else")
+        sys.exit(1)
+
+    predictor = CachedPredictor(cache, factory=load) if cache is not None else load()
+    evaluator.predictor = predictor
+    try:
+        summary = evaluator.run(args.restart, args.max_samples)
+    finally:
+        predictor.close()
+
+    print(f"🎯 Exact match: {summary['exact_matches']:,}/{summary['samples']:,} ({summary['accuracy']:.2%}) | "
+          f"CER: {summary['cer']:.2%} | errors: {summary['errors']:,}")
+    print(f"📄 Results: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ Persistent Thai OCR Predictor
+โหลด recognition model ที่ export แล้ว (inference.pdmodel / inference.json + inference.pdiparams)
+ด้วย Paddle Inference ครั้งเดียว แล้ว predict ทีละ batch ในโปรเซสเดียวกัน
+
+แทนการเรียก `python tools/infer_rec.py` ทีละภาพ ซึ่งต้องเริ่ม interpreter, import paddle,
+parse config และโหลดโมเดลใหม่ทุกภาพ
+
+- รับภาพเป็น path หรือ numpy array (BGR, HxWxC แบบ cv2.imread)
+- preprocess แบบ RecResizeImg (resize รักษาอัตราส่วน + pad ขวา) ใน thread pool
+- decode แบบ CTCLabelDecode (greedy ทั้ง batch ด้วย CTCGreedyDecoder) หรือ CTCBeamSearchDecoder ที่ส่งเข้ามา
+- แยกเวลา preprocess / forward / decode
+- engine="onnx": forward ด้วย ONNX Runtime แทน (inference.onnx จาก onnx_backend.py)
+
+Export โมเดลก่อนใช้:
+    cd PaddleOCR && python tools/export_model.py -c ../configs/rec/thai_rec_export.yml
+
+ใช้งาน:
+    python scripts/ml/thai_ocr_predictor.py models/sagemaker_trained/best_model --labels <rec_gt_val.txt>
+"""
+
+import os
+import sys
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "thai-letters"))
+from compiled_dictionary import read_dictionary
+sys.path.append(str(Path(__file__).resolve().parent))
+from ctc_greedy_decoder import CTCGreedyDecoder
+
+DEFAULT_IMAGE_SHAPE = [3, 32, 100]
+DEFAULT_BATCH_SIZE = 32
+MODEL_FILES = ["inference.pdmodel", "inference.json"]
+PARAMS_FILE = "inference.pdiparams"
+ENGINES = ["paddle", "onnx"]
+EXPORT_HINT = "cd PaddleOCR && python tools/export_model.py -c ../configs/rec/thai_rec_export.yml"
+# cwd ที่ config ส่วนใหญ่เขียนให้ใช้ (character_dict_path: ../thai-letters/th_dict.txt)
+PADDLEOCR_DIR = Path(__file__).resolve().parents[2] / "PaddleOCR"
+
+ImageInput = Union[str, Path, np.ndarray]
+
+
+def find_model_files(model_dir: Path) -> Tuple[Path, Path]:
+    """หาไฟล์ model + params ของโมเดลที่ export แล้ว"""
+    model_dir = Path(model_dir)
+    params = model_dir / PARAMS_FILE
+    for name in MODEL_FILES:
+        model = model_dir / name
+        if model.exists() and params.exists():
+            return model, params
+    raise FileNotFoundError(f"No exported inference model in {model_dir} "
+                            f"(need {' or '.join(MODEL_FILES)} + {PARAMS_FILE}). Export it with: {EXPORT_HINT}")
+
+
+def read_image(path: Union[str, Path]) -> np.ndarray:
+    """อ่านภาพเป็น BGR แบบ DecodeImage (รองรับ path ภาษาไทยด้วย imdecode)"""
+    import cv2
+    img = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"cannot decode image: {path}")
+    return img
+
+
+def read_rec_config(config_path: Path) -> Dict:
+    """ค่าที่ predictor ต้องใช้จาก config ของ PaddleOCR: dictionary, space char, image shape"""
+    import yaml
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    global_config = config.get("Global", {})
+    image_shape = None
+    for section in ("Eval", "Train"):
+        transforms = config.get(section, {}).get("dataset", {}).get("transforms", []) or []
+        for op in transforms:
+            if isinstance(op, dict) and "RecResizeImg" in op:
+                image_shape = (op["RecResizeImg"] or {}).get("image_shape")
+                break
+        if image_shape:
+            break
+
+    return {
+        "character_dict_path": global_config.get("character_dict_path"),
+        "use_space_char": bool(global_config.get("use_space_char", False)),
+        "image_shape": list(image_shape) if image_shape else list(DEFAULT_IMAGE_SHAPE),
+    }
+
+
+def _resolve(path: str, roots: Sequence[Path]) -> Path:
+    """path สัมพัทธ์ใน config อาจอ้างจาก cwd ของ PaddleOCR หรือโฟลเดอร์ของ config"""
+    candidate = Path(path)
+    if candidate.is_absolute():
+        return candidate
+    for root in roots:
+        # normpath: PaddleOCR/ อาจยังไม่ถูก clone แต่ ../thai-letters มีอยู่แล้ว
+        joined = Path(os.path.normpath(Path(root) / candidate))
+        if joined.exists():
+            return joined
+    return candidate
+
+
+def resolve_rec_config(config_path: Path, base_dir: Optional[Path] = None) -> Dict:
+    """read_rec_config + character_dict_path ที่ resolve เป็นไฟล์แล้ว (None ถ้า config ไม่ได้กำหนด)
+
+    Args:
+        base_dir: cwd ที่ config ถูกเขียนให้ใช้ (None = PaddleOCR/ ของ repo)
+    """
+    settings = read_rec_config(Path(config_path))
+    if settings["character_dict_path"]:
+        roots = [base_dir or PADDLEOCR_DIR, Path(config_path).parent, Path.cwd()]
+        settings["character_dict_path"] = _resolve(settings["character_dict_path"], roots)
+    return settings
+
+
+def create_paddle_predictor(model_dir: Path, use_gpu: bool = False, cpu_threads: Optional[int] = None,
+                            enable_mkldnn: bool = False):
+    """สร้าง Paddle Inference predictor และคืนฟังก์ชัน forward(batch NCHW float32) -> probs (N, T, C)"""
+    try:
+        from paddle import inference
+    except ImportError:
+        raise ImportError("paddlepaddle is required for ThaiOCRPredictor: pip install paddlepaddle")
+
+    model_file, params_file = find_model_files(model_dir)
+    config = inference.Config(str(model_file), str(params_file))
+    if use_gpu:
+        config.enable_use_gpu(500, 0)
+    else:
+        config.disable_gpu()
+        config.set_cpu_math_library_num_threads(cpu_threads or os.cpu_count() or 1)
+        if enable_mkldnn:
+            config.enable_mkldnn()
+    config.switch_use_feed_fetch_ops(False)
+    config.switch_ir_optim(True)
+    config.enable_memory_optim()
+    config.disable_glog_info()
+
+    predictor = inference.create_predictor(config)
+    input_handle = predictor.get_input_handle(predictor.get_input_names()[0])
+    output_handle = predictor.get_output_handle(predictor.get_output_names()[0])
+
+    def forward(batch: np.ndarray) -> np.ndarray:
+        input_handle.reshape(list(batch.shape))
+        input_handle.copy_from_cpu(batch)
+        predictor.run()
+        return output_handle.copy_to_cpu()
+
+    return forward
+
+
+def ctc_greedy_decode(probs: np.ndarray, characters: List[str]) -> List[Tuple[str, float]]:
+    """CTCLabelDecode: argmax -> ยุบตัวซ้ำ -> ตัด blank, confidence = ค่าเฉลี่ย prob ของตัวที่เหลือ"""
+    return CTCGreedyDecoder(characters).decode_list(probs)
+
+
+class ThaiOCRPredictor:
+    """Recognition predictor ที่โหลดโมเดลครั้งเดียวและ predict เป็น batch"""
+
+    def __init__(self, model_dir: Path, dict_path: Path, image_shape: Optional[List[int]] = None,
+                 use_space_char: bool = False, batch_size: int = DEFAULT_BATCH_SIZE, use_gpu: bool = False,
+                 cpu_threads: Optional[int] = None, enable_mkldnn: bool = False, decoder=None,
+                 preprocess_workers: int = 4, forward=None, engine: str = "paddle"):
+        """
+        Args:
+            model_dir: โฟลเดอร์ของโมเดลที่ export (inference.pdmodel/json + inference.pdiparams)
+                       engine="onnx": โฟลเดอร์ที่มี inference.onnx หรือไฟล์ .onnx
+            image_shape: [C, H, W] ของ RecResizeImg ตอนเทรน
+            cpu_threads: cpu_math_library_num_threads ของ Paddle Inference
+            decoder: ตัว decode ที่มี .decode(probs) เช่น CTCBeamSearchDecoder (None = greedy)
+            forward: ฟังก์ชัน forward ที่สร้างไว้แล้ว (None = สร้างตาม engine)
+            engine: "paddle" (Paddle Inference) หรือ "onnx" (ONNX Runtime, ดู onnx_backend.py)
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+        self.model_dir = Path(model_dir)
+        self.dict_path = Path(dict_path)
+        self.image_shape = list(image_shape or DEFAULT_IMAGE_SHAPE)
+        self.batch_size = batch_size
+        self.use_space_char = use_space_char
+        self.decoder = decoder
+        self.characters = [""] + read_dictionary(self.dict_path, use_space_char)
+        self.greedy = CTCGreedyDecoder(self.characters)
+
+        started = time.perf_counter()
+        if forward is None and engine == "onnx":
+            from onnx_backend import create_onnx_predictor
+            forward = create_onnx_predictor(self.model_dir, use_gpu, cpu_threads)
+        self.forward = forward or create_paddle_predictor(self.model_dir, use_gpu, cpu_threads, enable_mkldnn)
+        self.engine = engine
+        self.load_seconds = time.perf_counter() - started
+        self._pool = ThreadPoolExecutor(max_workers=max(1, preprocess_workers))
+        self.timings = {"images": 0, "preprocess_ms": 0.0, "forward_ms": 0.0, "decode_ms": 0.0}
+
+    @classmethod
+    def from_config(cls, config_path: Path, model_dir: Path, base_dir: Optional[Path] = None, **kwargs):
+        """สร้างจาก config ของ PaddleOCR (character_dict_path, use_space_char, RecResizeImg.image_shape)
+
+        Args:
+            base_dir: cwd ที่ config ถูกเขียนให้ใช้ (ปกติคือโฟลเดอร์ PaddleOCR)
+        """
+        settings = resolve_rec_config(config_path, base_dir)
+        if not settings["character_dict_path"]:
+            raise ValueError(f"Global.character_dict_path missing in {config_path}")
+        kwargs.setdefault("image_shape", settings["image_shape"])
+        kwargs.setdefault("use_space_char", settings["use_space_char"])
+        return cls(model_dir, settings["character_dict_path"], **kwargs)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def preprocess(self, image: ImageInput) -> np.ndarray:
+        """RecResizeImg: resize ให้สูง H (กว้างไม่เกิน W) -> normalize [-1, 1] -> pad ขวาด้วย 0"""
+        import cv2
+        img = read_image(image) if isinstance(image, (str, Path)) else image
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        img_c, img_h, img_w = self.image_shape
+        h, w = img.shape[:2]
+        resized_w = min(img_w, int(math.ceil(img_h * w / float(h))))
+        resized = cv2.resize(img, (resized_w, img_h))
+
+        chw = np.zeros((img_c, img_h, img_w), dtype=np.float32)
+        chw[:, :, :resized_w] = resized.transpose((2, 0, 1))
+        chw[:, :, :resized_w] *= 2.0 / 255.0
+        chw[:, :, :resized_w] -= 1.0
+        return chw
+
+    def predict_batch(self, images: Sequence[ImageInput]) -> List[Tuple[str, float]]:
+        """predict ภาพหนึ่ง batch -> [(text, confidence)]"""
+        started = time.perf_counter()
+        batch = np.stack(list(self._pool.map(self.preprocess, images)))
+        preprocessed = time.perf_counter()
+        probs = np.asarray(self.forward(batch))
+        forwarded = time.perf_counter()
+        if self.decoder is not None:
+            results = [(r.text, r.confidence) for r in self.decoder.decode(probs)]
+        else:
+            results = self.greedy.decode_list(probs)
+        decoded = time.perf_counter()
+
+        self.timings["images"] += len(images)
+        self.timings["preprocess_ms"] += (preprocessed - started) * 1000
+        self.timings["forward_ms"] += (forwarded - preprocessed) * 1000
+        self.timings["decode_ms"] += (decoded - forwarded) * 1000
+        return results
+
+    def predict(self, images: Sequence[ImageInput], batch_size: Optional[int] = None) -> List[Tuple[str, float]]:
+        """predict ภาพทั้งหมดทีละ batch (ผลลัพธ์เรียงตาม input)"""
+        batch_size = batch_size or self.batch_size
+        results = []
+        for start in range(0, len(images), batch_size):
+            results.extend(self.predict_batch(images[start:start + batch_size]))
+        return results
+
+    def predict_one(self, image: ImageInput) -> Tuple[str, float]:
+        return self.predict_batch([image])[0]
+
+    def throughput(self) -> Dict:
+        """สรุปเวลาแยกขั้นตอนและ images/sec"""
+        images = max(self.timings["images"], 1)
+        total_ms = self.timings["preprocess_ms"] + self.timings["forward_ms"] + self.timings["decode_ms"]
+        return {
+            **self.timings,
+            "load_seconds": round(self.load_seconds, 3),
+            "ms_per_image": total_ms / images,
+            "images_per_second": self.timings["images"] / (total_ms / 1000) if total_ms else 0.0,
+        }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="⚡ Batch recognition with a persistent Paddle Inference predictor")
+    parser.add_argument("model_dir", help="Exported inference model directory")
+    parser.add_argument("--dict", type=str, default="thai-letters/th_dict.txt")
+    parser.add_argument("--config", type=str, default=None,
+                       help="PaddleOCR config to read dictionary / image shape from (overrides --dict)")
+    parser.add_argument("--image-shape", type=str, default="3,32,100", help="C,H,W of RecResizeImg")
+    parser.add_argument("--use-space-char", action="store_true")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--labels", type=str, help="rec_gt_*.txt; images are resolved next to it")
+    source.add_argument("--images", nargs="+", help="Image files")
+    parser.add_argument("--max-samples", type=int, default=0, help="0 = all")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--cpu-threads", type=int, default=None)
+    parser.add_argument("--use-gpu", action="store_true")
+    parser.add_argument("--mkldnn", action="store_true")
+    parser.add_argument("--engine", choices=ENGINES, default="paddle", help="onnx: ONNX Runtime (inference.onnx)")
+    parser.add_argument("--beam-width", type=int, default=0, help="> 0: lexicon-constrained beam search")
+
+    args = parser.parse_args()
+
+    options = dict(batch_size=args.batch_size, use_gpu=args.use_gpu, cpu_threads=args.cpu_threads,
+                   enable_mkldnn=args.mkldnn, engine=args.engine)
+    if args.config:
+        predictor = ThaiOCRPredictor.from_config(args.config, args.model_dir, **options)
+    else:
+        shape = [int(v) for v in args.image_shape.split(",")]
+        predictor = ThaiOCRPredictor(args.model_dir, args.dict, shape, args.use_space_char, **options)
+    if args.beam_width > 0:
+        from ctc_beam_search import CTCBeamSearchDecoder
+        predictor.decoder = CTCBeamSearchDecoder.from_files(predictor.dict_path, beam_width=args.beam_width,
+                                                            use_space_char=predictor.use_space_char)
+    print(f"📦 Model loaded in {predictor.load_seconds:.2f}s: {predictor.model_dir}")
+
+    if args.labels:
+        label_file = Path(args.labels)
+        samples = []
+        with open(label_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '\t' in line:
+                    rel_path, label = line.rstrip('\n').split('\t', 1)
+                    samples.append((label_file.parent / rel_path, label))
+    else:
+        samples = [(Path(p), None) for p in args.images]
+    if args.max_samples:
+        samples = samples[:args.max_samples]
+
+    with predictor:
+        results = predictor.predict([path for path, _ in samples])
+
+    labelled = [(r, label) for r, (_, label) in zip(results, samples) if label is not None]
+    if labelled:
+        correct = sum(text == label for (text, _), label in labelled)
+        print(f"🎯 Exact match: {correct}/{len(labelled)} ({correct / len(labelled):.1%})")
+    for (path, _), (text, conf) in list(zip(samples, results))[:5]:
+        print(f"   {path.name}: '{text}' ({conf:.4f})")
+
+    stats = predictor.throughput()
+    print(f"⏱️ {stats['images']} images: {stats['images_per_second']:.1f} images/s "
+          f"(preprocess {stats['preprocess_ms']:.0f} ms, forward {stats['forward_ms']:.0f} ms, "
+          f"decode {stats['decode_ms']:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
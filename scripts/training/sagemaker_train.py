@@ -32,6 +32,8 @@ def parse_hyperparameters():
     # SageMaker specific arguments
     parser.add_argument('--model-dir', type=str, default='/opt/ml/model')
     parser.add_argument('--train', type=str, default='/opt/ml/input/data/training')
+    parser.add_argument('--images', type=str,
+                        default=os.environ.get('SM_CHANNEL_IMAGES', '/opt/ml/input/data/images'))
     parser.add_argument('--config', type=str, default='thai_rec_sagemaker.yml')
     
     # Training hyperparameters
@@ -68,14 +70,30 @@ def update_config_for_sagemaker(config_path, args):
     config['Global']['use_gpu'] = False  # Disable GPU for CPU instance
     config['Global']['distributed'] = False  # Disable distributed training
     
-    # Update dataset paths
-    config['Train']['dataset']['data_dir'] = os.path.join(args.train, 'rec') + '/'
-    config['Train']['dataset']['label_file_list'] = [os.path.join(args.train, 'rec/rec_gt_train.txt')]
-    config['Train']['loader']['batch_size_per_card'] = args.batch_size
+    # Overlay dataset (thai-letters/overlay_dataset.py): training channel has only labels,
+    # images come from the parent's image store in the "images" channel
+    image_dir = os.path.join(args.train, 'rec')
+    overlay_file = os.path.join(args.train, 'overlay.json')
+    if os.path.exists(overlay_file):
+        with open(overlay_file, 'r', encoding='utf-8') as f:
+            overlay = json.load(f)
+        if not os.path.isdir(args.images):
+            raise FileNotFoundError(
+                f"Overlay dataset needs the parent images channel at {args.images} "
+                f"(parent: {overlay.get('parent_name')}, s3: {overlay.get('images_s3_uri')})")
+        image_dir = args.images
+        logger.info(f"Overlay dataset of {overlay.get('parent_name')}: images from {image_dir}")
     
-    config['Eval']['dataset']['data_dir'] = os.path.join(args.train, 'rec') + '/'
-    config['Eval']['dataset']['label_file_list'] = [os.path.join(args.train, 'rec/rec_gt_val.txt')]
-    config['Eval']['loader']['batch_size_per_card'] = args.batch_size
+    # Update dataset paths
+    for section, split in [('Train', 'train'), ('Eval', 'val')]:
+        dataset = config[section]['dataset']
+        if dataset['name'] == 'LMDBDataSet':
+            # LMDB layout from phase1_paddleocr_converter.py --format lmdb
+            dataset['data_dir'] = os.path.join(args.train, 'rec', 'lmdb', split) + '/'
+        else:
+            dataset['data_dir'] = image_dir.rstrip('/') + '/'
+            dataset['label_file_list'] = [os.path.join(args.train, f'rec/rec_gt_{split}.txt')]
+        config[section]['loader']['batch_size_per_card'] = args.batch_size
     
     # Update learning rate
     config['Optimizer']['lr']['learning_rate'] = args.learning_rate
@@ -10,11 +10,15 @@ Based on development-task.md Section 3:
 """
 
 import os
+import sys
 import shutil
 from pathlib import Path
 import logging
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent.parent.parent / "thai-letters"))
+from label_index import count_labels
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -220,13 +224,11 @@ python PaddleOCR/tools/train.py -c configs/rec/thai_rec_dev.yml
         val_labels = self.dataset_dir / "train_data" / "rec" / "rec_gt_val.txt"
         
         if train_labels.exists():
-            with open(train_labels, 'r', encoding='utf-8') as f:
-                train_count = len(f.readlines())
+            train_count = count_labels(train_labels)
             logger.info(f"  📊 Training samples: {train_count:,}")
         
         if val_labels.exists():
-            with open(val_labels, 'r', encoding='utf-8') as f:
-                val_count = len(f.readlines())
+            val_count = count_labels(val_labels)
             logger.info(f"  📊 Validation samples: {val_count:,}")
         
         return all_exist
@@ -9,6 +9,9 @@ import logging
 from pathlib import Path
 from botocore.exceptions import ClientError, NoCredentialsError
 
+# Local caches next to the data (label_index.py / compiled_dictionary.py sidecars); rebuilt on demand, never uploaded
+SKIP_SUFFIXES = {'.idx', '.trie'}
+
 def setup_logging():
     """Setup logging"""
     logging.basicConfig(
@@ -68,7 +71,7 @@ def upload_directory_to_s3(local_dir, bucket_name, s3_prefix):
     
     # Upload all files in directory
     for file_path in local_path.rglob('*'):
-        if file_path.is_file():
+        if file_path.is_file() and file_path.suffix not in SKIP_SUFFIXES:
             # Calculate relative path for S3 key
             relative_path = file_path.relative_to(local_path)
             s3_key = f"{s3_prefix}/{relative_path}".replace('\\', '/')
@@ -2,17 +2,29 @@
 """
 Test the numbers model with proper validation dataset
 Uses the numbers validation data (0-9) instead of Thai characters
+Inference runs in-process through ThaiOCRPredictor (model loaded once, batched),
+or with --backend subprocess through one tools/infer_rec.py call over a directory of images
+(--backend onnx: the same predictor on ONNX Runtime with inference.onnx)
+best_accuracy is exported with the numbers config into models/sagemaker_trained/numbers_inference/,
+so the exported head matches numbers_dict.txt (best_model/ is the Thai export)
 """
 
-import os
 import sys
-import subprocess
+import time
 import logging
 import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 
+sys.path.append(str(Path(__file__).parent / "scripts" / "ml"))
+from thai_ocr_predictor import ThaiOCRPredictor
+from onnx_backend import ONNX_FILE, export_inference_model, export_onnx
+from infer_rec_runner import DEFAULT_TIMEOUT, InferRecRunner
+from eval_metrics import compute_metrics
+from result_cache import DEFAULT_CACHE_FILE, CachedPredictor, ResultCache, hash_file, run_keys, weight_files
+from streaming_evaluator import StreamingEvaluator
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +39,9 @@ class NumbersModelTester:
         self.project_root = Path(__file__).parent
         self.paddleocr_dir = self.project_root / "PaddleOCR"
         self.model_dir = self.project_root / "models" / "sagemaker_trained"
+        self.checkpoint = self.model_dir / "best_accuracy"
+        # Exported with the numbers config (best_model/ is exported with the Thai dictionary)
+        self.inference_model_dir = self.model_dir / "numbers_inference"
         
         # Use the CORRECT validation data for numbers (0-9)
         self.validation_file = self.project_root / "thai-letters" / "datasets" / "converted" / "train_data_thai_paddleocr_0806_1433" / "train_data" / "rec" / "rec_gt_val.txt"
@@ -36,6 +51,12 @@ class NumbersModelTester:
         self.numbers_dict_file = self.project_root / "numbers_dict.txt"
         
         self.config_file = self.project_root / "numbers_inference_config.yml"
+        self.backend = "predictor"  # or "onnx" / "subprocess"
+        self.timeout = DEFAULT_TIMEOUT
+        self.batch_size = 64
+        self.verbose_samples = 20
+        self.predictor = None
+        self.cache_file = DEFAULT_CACHE_FILE  # None = no result cache
         
     def create_numbers_dictionary(self):
         """Create a simple numbers dictionary for 0-9"""
@@ -149,8 +170,20 @@ Eval:
             
         logger.info(f"✅ Created inference config: {self.config_file}")
         
-    def load_validation_data(self, max_samples: int = 15) -> List[Tuple[str, str]]:
-        """Load validation data with numbers (0-9)"""
+    def export_inference_model(self) -> Path:
+        """Export best_accuracy with the numbers config (again if the checkpoint is newer than the export)"""
+        params_file = self.inference_model_dir / "inference.pdiparams"
+        checkpoint_file = Path(f"{self.checkpoint}.pdparams")
+        if not params_file.exists() or params_file.stat().st_mtime < checkpoint_file.stat().st_mtime:
+            export_inference_model(self.config_file, self.checkpoint, self.inference_model_dir, self.paddleocr_dir)
+            logger.info(f"✅ Exported numbers inference model: {self.inference_model_dir}")
+        onnx_file = self.inference_model_dir / ONNX_FILE
+        if self.backend == "onnx" and (not onnx_file.exists() or onnx_file.stat().st_mtime < params_file.stat().st_mtime):
+            export_onnx(self.inference_model_dir)
+        return self.inference_model_dir
+
+    def load_validation_data(self, max_samples: int = 0) -> List[Tuple[str, str]]:
+        """Load validation data with numbers (0-9), max_samples 0 = all"""
         validation_data = []
         
         if not self.validation_file.exists():
@@ -161,7 +194,7 @@ Eval:
         
         with open(self.validation_file, 'r', encoding='utf-8') as f:
             for i, line in enumerate(f):
-                if i >= max_samples:
+                if max_samples and i >= max_samples:
                     break
                     
                 line = line.strip()
@@ -172,49 +205,61 @@ Eval:
         logger.info(f"✅ Loaded {len(validation_data)} validation samples")
         return validation_data
         
-    def test_single_image(self, image_path: str) -> Tuple[str, float]:
-        """Test a single image with the numbers model"""
-        full_image_path = self.validation_images_dir / image_path
+    def load_predictor(self):
+        """Load the exported model once (dictionary / image shape from the numbers config)"""
+        if self.backend == "subprocess":
+            return InferRecRunner(self.paddleocr_dir, self.config_file, timeout=self.timeout)
+        predictor = ThaiOCRPredictor.from_config(self.config_file, self.inference_model_dir,
+                                                 base_dir=self.paddleocr_dir, batch_size=self.batch_size,
+                                                 engine="onnx" if self.backend == "onnx" else "paddle")
+        logger.info(f"📦 Model loaded once in {predictor.load_seconds:.2f}s")
+        return predictor
+
+    def model_files(self) -> List[Path]:
+        """Files that determine the model's output for this backend (result cache / stream key)"""
+        if self.backend == "subprocess":
+            return [Path(f"{self.checkpoint}.pdparams")]
+        return weight_files(self.inference_model_dir, "onnx" if self.backend == "onnx" else "paddle")
+
+    def get_predictor(self):
+        """Predictor behind the result cache: the model is only loaded when some image is not cached"""
+        if self.predictor is None and self.cache_file is None:
+            self.predictor = self.load_predictor()
+        elif self.predictor is None:
+            cache = ResultCache(self.cache_file).bind(self.model_files(), self.config_file, [self.numbers_dict_file],
+                                                      backend=self.backend)
+            self.predictor = CachedPredictor(cache, factory=self.load_predictor)
+        return self.predictor
         
-        if not full_image_path.exists():
-            logger.error(f"❌ Image not found: {full_image_path}")
-            return "", 0.0
-            
-        # Run PaddleOCR inference
-        cmd = [
-            "python", str(self.paddleocr_dir / "tools" / "infer_rec.py"),
-            "-c", str(self.config_file),
-            "-o", f"Global.infer_img={full_image_path}"
-        ]
+    def test_images(self, image_paths: List[str]) -> List[Tuple[str, float]]:
+        """Predict many images in batches with one predictor"""
+        predictor = self.get_predictor()
+        results = [("", 0.0)] * len(image_paths)
+        found = []
+        for i, image_path in enumerate(image_paths):
+            full_image_path = self.validation_images_dir / image_path
+            if full_image_path.exists():
+                found.append((i, full_image_path))
+            else:
+                logger.error(f"❌ Image not found: {full_image_path}")
+                
+        step = len(found) if self.backend == "subprocess" else self.batch_size
+        for start in range(0, len(found), max(step, 1)):
+            batch = found[start:start + step]
+            try:
+                predictions = predictor.predict_batch([path for _, path in batch])
+            except Exception as e:
+                logger.error(f"❌ Error testing batch starting at {batch[0][1].name}: {e}")
+                continue
+            for (i, _), prediction in zip(batch, predictions):
+                results[i] = prediction
+            if getattr(predictor, "last_error", ""):
+                logger.warning(f"⚠️ infer_rec.py: {predictor.last_error[-300:]}")
+        return results
         
-        try:
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                cwd=str(self.paddleocr_dir),
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                # Parse output: "result: 5 0.9876543"
-                output = result.stdout.strip()
-                if "result:" in output:
-                    parts = output.split("result:")[-1].strip().split()
-                    if len(parts) >= 2:
-                        predicted_text = parts[0]
-                        confidence = float(parts[1]) if parts[1] != 'nan' else 0.0
-                        return predicted_text, confidence
-                        
-            logger.warning(f"⚠️ Inference failed for {image_path}: {result.stderr}")
-            return "", 0.0
-            
-        except subprocess.TimeoutExpired:
-            logger.error(f"❌ Timeout for {image_path}")
-            return "", 0.0
-        except Exception as e:
-            logger.error(f"❌ Error testing {image_path}: {e}")
-            return "", 0.0
+    def test_single_image(self, image_path: str) -> Tuple[str, float]:
+        """Test a single image with the numbers model"""
+        return self.test_images([image_path])[0]
             
     def run_batch_test(self, validation_data: List[Tuple[str, str]]) -> Dict[str, Any]:
         """Run batch testing with validation data"""
@@ -224,11 +269,15 @@ Eval:
         correct_predictions = 0
         total_processed = 0
         
-        for i, (img_path, ground_truth) in enumerate(validation_data, 1):
-            logger.info(f"[{i:2d}/{len(validation_data)}] Testing: {img_path}")
-            logger.info(f"   Ground Truth: '{ground_truth}'")
-            
-            predicted_text, confidence = self.test_single_image(img_path)
+        started = time.perf_counter()
+        predictions = self.test_images([img_path for img_path, _ in validation_data])
+        elapsed = time.perf_counter() - started
+        
+        for i, ((img_path, ground_truth), (predicted_text, confidence)) in enumerate(zip(validation_data, predictions), 1):
+            verbose = i <= self.verbose_samples
+            if verbose:
+                logger.info(f"[{i:2d}/{len(validation_data)}] Testing: {img_path}")
+                logger.info(f"   Ground Truth: '{ground_truth}'")
             
             if predicted_text:
                 total_processed += 1
@@ -248,16 +297,20 @@ Eval:
                 }
                 results.append(result)
                 
-                status = "✅" if is_correct else "❌"
-                logger.info(f"   {status} Predicted: '{predicted_text}'")
-                logger.info(f"   📊 Confidence: {confidence:.4f} | Char Acc: {char_accuracy:.1f}%")
+                if verbose:
+                    status = "✅" if is_correct else "❌"
+                    logger.info(f"   {status} Predicted: '{predicted_text}'")
+                    logger.info(f"   📊 Confidence: {confidence:.4f} | Char Acc: {char_accuracy:.1f}%")
                 
-            else:
+            elif verbose:
                 logger.warning(f"   ⚠️ Failed to get prediction")
                 
         # Calculate final metrics
         accuracy = correct_predictions / total_processed if total_processed > 0 else 0.0
         success_rate = total_processed / len(validation_data)
+        # CER over every sample (failed / empty predictions count as "")
+        metrics = compute_metrics([predicted_text for predicted_text, _ in predictions],
+                                  [ground_truth for _, ground_truth in validation_data])
         
         summary = {
             'timestamp': datetime.now().strftime('%Y%m%d_%H%M%S'),
@@ -267,8 +320,13 @@ Eval:
             'accuracy': accuracy,
             'success_rate': success_rate,
             'exact_match_rate': accuracy,  # Same as accuracy for single characters
+            'cer': metrics['cer'],
+            'elapsed_seconds': elapsed,
+            'images_per_second': len(validation_data) / elapsed if elapsed > 0 else 0.0,
             'results': results
         }
+        if isinstance(self.predictor, CachedPredictor):
+            summary['cache'] = self.predictor.cache.stats()
         
         return summary
         
@@ -292,6 +350,11 @@ Eval:
         print(f"  • Success rate: {summary['success_rate']:.1%}")
         print(f"  • Character accuracy: {summary['accuracy']:.1%}")
         print(f"  • Exact matches: {summary['correct_predictions']}/{summary['total_samples']}")
+        print(f"  • CER: {summary['cer']:.2%}")
+        print(f"  • Inference time: {summary['elapsed_seconds']:.2f}s ({summary['images_per_second']:.1f} images/s)")
+        if 'cache' in summary:
+            cache = summary['cache']
+            print(f"  • Result cache: {cache['hits']}/{cache['hits'] + cache['misses']} hits ({cache['hit_rate']:.1%})")
         
         print(f"\n🎯 PERFORMANCE ASSESSMENT:")
         if summary['success_rate'] > 0.9:
@@ -317,8 +380,11 @@ Eval:
             print(f"     Predicted: '{result['predicted']}'")
             print(f"     Conf: {result['confidence']:.4f} | Acc: {result['character_accuracy']:.1f}%")
             
-    def run_test(self):
-        """Run complete numbers model test"""
+    def run_test(self, max_samples: int = 0, stream: Path = None, restart: bool = False):
+        """Run complete numbers model test (max_samples 0 = whole validation file)
+
+        stream: append each result to this JSONL instead (resumable, constant memory)
+        """
         print(f"🚀 Numbers Model Tester for Thai OCR")
         print(f"{'=' * 60}")
         
@@ -329,10 +395,10 @@ Eval:
             logger.error(f"❌ PaddleOCR directory not found: {self.paddleocr_dir}")
             return
             
-        # Check if model files exist
-        best_accuracy_file = self.model_dir / "best_accuracy.pdparams"
-        if not best_accuracy_file.exists():
-            logger.error(f"❌ Model file not found: {best_accuracy_file}")
+        # The numbers checkpoint (exported below for the in-process backends)
+        checkpoint_file = Path(f"{self.checkpoint}.pdparams")
+        if not checkpoint_file.exists():
+            logger.error(f"❌ Model file not found: {checkpoint_file}")
             return
             
         if not self.validation_file.exists():
@@ -340,21 +406,51 @@ Eval:
             return
             
         logger.info(f"✅ PaddleOCR directory: {self.paddleocr_dir}")
-        logger.info(f"✅ Model file: {best_accuracy_file}")
+        logger.info(f"✅ Model file: {checkpoint_file}")
         logger.info(f"✅ Validation file: {self.validation_file}")
         
         # Create numbers dictionary and config
         self.create_numbers_dictionary()
         self.create_inference_config()
+        if self.backend != "subprocess":
+            try:
+                self.export_inference_model()
+            except (RuntimeError, ImportError) as e:
+                logger.error(f"❌ Export failed: {e}")
+                return
         
+        if stream:
+            # Results from another model / config / backend are never resumed into this stream
+            model_key, config_key = run_keys([hash_file(p) for p in self.model_files()], self.config_file,
+                                             [hash_file(self.numbers_dict_file)], backend=self.backend)
+            evaluator = StreamingEvaluator(None, self.validation_file, stream, self.batch_size,
+                                           run_info={"model": model_key, "config": config_key})
+            conflict = "" if restart else evaluator.resume_conflict()
+            if conflict:
+                logger.error(f"❌ {conflict}; use --restart to start over")
+                return
+
+            evaluator.predictor = self.get_predictor()
+            try:
+                summary = evaluator.run(restart, max_samples)
+            finally:
+                self.predictor.close()
+                self.predictor = None
+            print(f"\n🎯 Exact match: {summary['exact_matches']:,}/{summary['samples']:,} ({summary['accuracy']:.2%}) | "
+                  f"CER: {summary['cer']:.2%} | errors: {summary['errors']:,}")
+            print(f"📁 Results: {summary['output']}")
+            return
+            
         # Load validation data
-        validation_data = self.load_validation_data(max_samples=15)
+        validation_data = self.load_validation_data(max_samples=max_samples)
         if not validation_data:
             logger.error("❌ No validation data loaded")
             return
             
         # Run tests
         summary = self.run_batch_test(validation_data)
+        if self.predictor is not None:
+            self.predictor.close()
         
         # Save and display results
         self.save_results(summary)
@@ -365,8 +461,30 @@ Eval:
 
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Test the numbers model on its validation set")
+    parser.add_argument("--max-samples", type=int, default=0, help="Validation samples to test (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backend", choices=["predictor", "onnx", "subprocess"], default="predictor",
+                        help="predictor: Paddle Inference in-process; onnx: ONNX Runtime in-process; "
+                             "subprocess: one infer_rec.py call for all images")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Overall timeout in seconds for --backend subprocess")
+    parser.add_argument("--cache", type=str, default=str(DEFAULT_CACHE_FILE), help="Result cache (SQLite)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-infer every image")
+    parser.add_argument("--stream", type=str, default=None,
+                        help="Append each result to this JSONL as it completes (resumes an interrupted run)")
+    parser.add_argument("--restart", action="store_true", help="With --stream: start over instead of resuming")
+    args = parser.parse_args()
+    
     tester = NumbersModelTester()
-    tester.run_test()
+    tester.batch_size = args.batch_size
+    tester.backend = args.backend
+    tester.timeout = args.timeout
+    tester.cache_file = None if args.no_cache else Path(args.cache)
+    tester.run_test(max_samples=args.max_samples, stream=Path(args.stream) if args.stream else None,
+                    restart=args.restart)
 
 
 if __name__ == "__main__":
@@ -8,17 +8,29 @@ Uses:
 - Config: CRNN + MobileNetV3 (same as training)
 - Dictionary: thai-letters/th_dict.txt (880 chars)
 - Validation data: with ground truth labels
+- Inference: ThaiOCRPredictor (Paddle Inference, โหลดโมเดลครั้งเดียว predict เป็น batch)
+  --backend onnx: predictor เดียวกันบน ONNX Runtime (best_model/inference.onnx)
+  หรือ --backend subprocess: เรียก tools/infer_rec.py ครั้งเดียวกับโฟลเดอร์ภาพ (InferRecRunner)
 """
 
-import os
 import sys
-import subprocess
 import json
 import time
 from pathlib import Path
 from typing import List, Dict, Tuple
 import logging
 
+sys.path.append(str(Path(__file__).parent / "thai-letters"))
+from label_index import LabelIndex
+from compiled_dictionary import CompiledDictionary
+sys.path.append(str(Path(__file__).parent / "scripts" / "ml"))
+from thai_ocr_predictor import PARAMS_FILE, ThaiOCRPredictor
+from onnx_backend import ONNX_FILE
+from infer_rec_runner import DEFAULT_TIMEOUT, InferRecRunner
+from eval_metrics import compute_metrics, sample_metrics
+from result_cache import DEFAULT_CACHE_FILE, CachedPredictor, ResultCache, hash_file, run_keys, weight_files
+from streaming_evaluator import StreamingEvaluator
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,6 +45,12 @@ class SageMakerModelTester:
         self.config_file = self.project_root / "corrected_inference_config.yml"
         self.dict_file = self.project_root / "thai-letters" / "th_dict.txt"
         self.val_label_file = self.project_root / "thai-letters" / "datasets" / "converted" / "train_data_thai_paddleocr_0804_1144" / "train_data" / "rec" / "rec_gt_val.txt"
+        self.backend = "predictor"  # หรือ "onnx" / "subprocess"
+        self.timeout = DEFAULT_TIMEOUT
+        self.batch_size = 64
+        self.verbose_samples = 20
+        self.predictor = None
+        self.cache_file = DEFAULT_CACHE_FILE  # None = ไม่ใช้ result cache
         self.results = []
         
     def check_prerequisites(self) -> bool:
@@ -45,6 +63,10 @@ class SageMakerModelTester:
             (self.dict_file, "Thai dictionary"),
             (self.val_label_file, "Validation labels"),
         ]
+        if self.backend == "predictor":
+            checks.append((self.model_dir / PARAMS_FILE, "Exported inference model"))
+        elif self.backend == "onnx":
+            checks.append((self.model_dir / ONNX_FILE, "ONNX model"))
         
         all_good = True
         for path, description in checks:
@@ -62,33 +84,38 @@ class SageMakerModelTester:
         
         return all_good
     
-    def load_validation_data(self, max_samples: int = 20) -> List[Tuple[str, str]]:
-        """โหลดข้อมูล validation พร้อม ground truth"""
-        logger.info(f"📁 Loading validation data (max {max_samples} samples)...")
+    def load_validation_data(self, max_samples: int = 20, per_class: int = 0) -> List[Tuple[str, str]]:
+        """โหลดข้อมูล validation พร้อม ground truth
+        
+        Args:
+            max_samples: จำนวน sample สูงสุด (0 = ทั้งไฟล์)
+            per_class: ถ้า > 0 สุ่มแบบ stratified ไม่เกิน per_class ต่อตัวอักษร (ผ่าน label index)
+        """
+        logger.info(f"📁 Loading validation data (max {max_samples or 'all'} samples)...")
         
         validation_data = []
         
         try:
-            with open(self.val_label_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()[:max_samples]
+            # อ่านผ่าน sidecar index: ไม่ต้องโหลดทั้งไฟล์เพื่อเอาแค่ N บรรทัดแรก
+            with LabelIndex(self.val_label_file) as index:
+                logger.info(f"📊 Validation file: {len(index):,} samples, {len(index.classes):,} classes")
+                max_samples = max_samples or len(index)
+                if per_class > 0:
+                    lines = index.lines(index.stratified(per_class)[:max_samples])
+                else:
+                    lines = index.head(max_samples)
                 
-            for line in lines:
-                line = line.strip()
-                if '\t' in line:
-                    # Format: image_path\tground_truth_text
-                    parts = line.split('\t', 1)
-                    if len(parts) == 2:
-                        rel_image_path, ground_truth = parts
-                        
-                        # Convert relative path to absolute
-                        # rel_image_path format: thai_data/val/346_01.jpg
-                        full_image_path = self.project_root / "thai-letters" / "datasets" / "converted" / "train_data_thai_paddleocr_0804_1144" / "train_data" / "rec" / rel_image_path
+            for rel_image_path, ground_truth in lines:
+                if ground_truth:
+                    # Convert relative path to absolute
+                    # rel_image_path format: thai_data/val/346_01.jpg
+                    full_image_path = self.val_label_file.parent / rel_image_path
+                    
+                    if full_image_path.exists():
+                        validation_data.append((str(full_image_path), ground_truth))
+                    else:
+                        logger.warning(f"Image not found: {full_image_path}")
                         
-                        if full_image_path.exists():
-                            validation_data.append((str(full_image_path), ground_truth))
-                        else:
-                            logger.warning(f"Image not found: {full_image_path}")
-                            
             logger.info(f"✅ Loaded {len(validation_data)} validation samples")
             
             # Show first few samples
@@ -226,116 +253,70 @@ Eval:
         logger.info(f"✅ Config created: {test_config_file}")
         return str(test_config_file)
     
-    def run_inference_on_image(self, image_path: str, config_file: str) -> Dict:
-        """รัน inference บนภาพเดียว"""
-        
+    def load_predictor(self, config_file: str):
+        """โหลดโมเดลครั้งเดียวแล้วใช้ซ้ำทุกภาพ (dictionary / image shape อ่านจาก config)"""
+        if self.backend == "subprocess":
+            return InferRecRunner(self.paddleocr_dir, config_file, timeout=self.timeout)
+        predictor = ThaiOCRPredictor.from_config(config_file, self.model_dir, base_dir=self.paddleocr_dir,
+                                                 batch_size=self.batch_size,
+                                                 engine="onnx" if self.backend == "onnx" else "paddle")
+        logger.info(f"📦 Model loaded once in {predictor.load_seconds:.2f}s")
+        return predictor
+
+    def model_files(self) -> List[Path]:
+        """ไฟล์ที่กำหนดผลของโมเดลตาม backend (ใช้เป็น key ของ result cache และ stream)"""
+        if self.backend == "subprocess":
+            return [self.model_dir / "model.pdparams"]
+        return weight_files(self.model_dir, "onnx" if self.backend == "onnx" else "paddle")
+
+    def get_predictor(self, config_file: str):
+        """predictor ที่ใช้ result cache: โหลดโมเดลเฉพาะเมื่อมีภาพที่ยังไม่เคย infer กับโมเดล/config นี้"""
+        if self.predictor is None and self.cache_file is None:
+            self.predictor = self.load_predictor(config_file)
+        elif self.predictor is None:
+            cache = ResultCache(self.cache_file).bind(self.model_files(), Path(config_file), [self.dict_file],
+                                                      backend=self.backend)
+            self.predictor = CachedPredictor(cache, factory=lambda: self.load_predictor(config_file))
+        return self.predictor
+
+    def run_inference(self, image_paths: List[str], config_file: str) -> List[Dict]:
+        """รัน inference ทุกภาพเป็น batch ผ่าน predictor ตัวเดียว (subprocess: เรียก infer_rec.py รอบเดียว)"""
         try:
-            # Build command - use relative paths from PaddleOCR directory
-            rel_config = os.path.relpath(config_file, self.paddleocr_dir)
-            rel_image = os.path.relpath(image_path, self.paddleocr_dir)
-            
-            cmd = [
-                "python", "tools/infer_rec.py",
-                "-c", rel_config,
-                "-o", f"Global.infer_img={rel_image}"
-            ]
-            
-            logger.debug(f"Running: {' '.join(cmd)} (cwd: {self.paddleocr_dir})")
-            
-            # Run inference
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=str(self.paddleocr_dir),
-                timeout=30
-            )
-            
-            # Parse result
-            if result.returncode == 0 and "result:" in result.stdout:
-                # Extract prediction from output
-                for line in result.stdout.split('\n'):
-                    if "result:" in line:
-                        # Format: "result: predicted_text confidence_score"
-                        result_part = line.split("result:")[1].strip()
-                        
-                        # Try to split text and confidence
-                        parts = result_part.rsplit(' ', 1)
-                        if len(parts) == 2:
-                            predicted_text, confidence_str = parts
-                            try:
-                                confidence = float(confidence_str)
-                            except ValueError:
-                                predicted_text = result_part
-                                confidence = 0.0
-                        else:
-                            predicted_text = result_part
-                            confidence = 0.0
-                        
-                        # สำหรับ single character เอาแค่ตัวแรก
-                        if predicted_text:
-                            single_char = predicted_text[0] if predicted_text else ""
-                            
-                            return {
-                                "success": True,
-                                "predicted_text": single_char,  # เปลี่ยนเป็น single char
-                                "full_prediction": predicted_text,  # เก็บ full prediction ไว้ด้วย
-                                "confidence": confidence,
-                                "raw_output": result.stdout
-                            }
-            
-            return {
-                "success": False,
-                "error": result.stderr if result.stderr else "No result found in output",
-                "raw_output": result.stdout,
-                "returncode": result.returncode
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Inference timeout (30s)",
-                "raw_output": ""
-            }
+            predictor = self.get_predictor(config_file)
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "raw_output": ""
-            }
+            return [{"success": False, "error": str(e), "raw_output": ""} for _ in image_paths]
+
+        results = []
+        step = len(image_paths) if self.backend == "subprocess" else self.batch_size
+        for start in range(0, len(image_paths), max(step, 1)):
+            batch = image_paths[start:start + step]
+            try:
+                predictions = predictor.predict_batch(batch)
+            except Exception as e:
+                results.extend({"success": False, "error": str(e), "raw_output": ""} for _ in batch)
+                continue
+
+            for predicted_text, confidence in predictions:
+                if predicted_text:
+                    results.append({
+                        "success": True,
+                        "predicted_text": predicted_text[0],  # สำหรับ single character เอาแค่ตัวแรก
+                        "full_prediction": predicted_text,  # เก็บ full prediction ไว้ด้วย
+                        "confidence": confidence,
+                        "raw_output": f"result: {predicted_text}\t{confidence}"
+                    })
+                else:
+                    error = getattr(predictor, "last_error", "") or "Empty prediction"
+                    results.append({"success": False, "error": error, "raw_output": ""})
+        return results
+
+    def run_inference_on_image(self, image_path: str, config_file: str) -> Dict:
+        """รัน inference บนภาพเดียว"""
+        return self.run_inference([image_path], config_file)[0]
     
     def calculate_accuracy(self, predicted: str, ground_truth: str) -> Dict:
-        """คำนวณความแม่นยำ"""
-        
-        # Character-level accuracy
-        char_correct = 0
-        max_len = max(len(predicted), len(ground_truth))
-        
-        if max_len == 0:
-            char_accuracy = 1.0 if predicted == ground_truth else 0.0
-        else:
-            for i in range(min(len(predicted), len(ground_truth))):
-                if i < len(predicted) and i < len(ground_truth):
-                    if predicted[i] == ground_truth[i]:
-                        char_correct += 1
-            char_accuracy = char_correct / max_len
-        
-        # Exact match
-        exact_match = predicted == ground_truth
-        
-        # Edit distance (simple)
-        edit_distance = abs(len(predicted) - len(ground_truth))
-        for i in range(min(len(predicted), len(ground_truth))):
-            if predicted[i] != ground_truth[i]:
-                edit_distance += 1
-        
-        return {
-            "character_accuracy": char_accuracy,
-            "exact_match": exact_match,
-            "edit_distance": edit_distance,
-            "predicted_length": len(predicted),
-            "ground_truth_length": len(ground_truth)
-        }
+        """คำนวณความแม่นยำ (Levenshtein distance จริง ดู eval_metrics.sample_metrics)"""
+        return sample_metrics([predicted], [ground_truth])[0]
     
     def run_batch_test(self, max_samples: int = 10) -> Dict:
         """รันการทดสอบแบบ batch"""
@@ -359,19 +340,28 @@ Eval:
         print(f"🧪 TESTING {len(validation_data)} SAMPLES")
         print(f"{'='*80}")
         
-        for i, (image_path, ground_truth) in enumerate(validation_data):
-            print(f"\n[{i+1:2d}/{len(validation_data)}] Testing: {Path(image_path).name}")
-            print(f"   Ground Truth: '{ground_truth}'")
-            
-            # Run inference
-            inference_result = self.run_inference_on_image(image_path, config_file)
+        # Run inference (ทั้งชุดในครั้งเดียว)
+        started = time.perf_counter()
+        inference_results = self.run_inference([image_path for image_path, _ in validation_data], config_file)
+        elapsed = time.perf_counter() - started
+        
+        # metric ของทุกภาพในครั้งเดียว (ภาพที่ล้มเหลวนับเป็นข้อความว่าง)
+        predictions = [r["predicted_text"] if r["success"] else "" for r in inference_results]
+        ground_truths = [ground_truth for _, ground_truth in validation_data]
+        all_metrics = sample_metrics(predictions, ground_truths)
+        
+        for i, ((image_path, ground_truth), inference_result) in enumerate(zip(validation_data, inference_results)):
+            verbose = i < self.verbose_samples
+            if verbose:
+                print(f"\n[{i+1:2d}/{len(validation_data)}] Testing: {Path(image_path).name}")
+                print(f"   Ground Truth: '{ground_truth}'")
             
             # Calculate accuracy if successful
             if inference_result["success"]:
                 successful_inferences += 1
                 predicted_text = inference_result["predicted_text"]
                 
-                accuracy_metrics = self.calculate_accuracy(predicted_text, ground_truth)
+                accuracy_metrics = all_metrics[i]
                 
                 total_character_accuracy += accuracy_metrics["character_accuracy"]
                 if accuracy_metrics["exact_match"]:
@@ -388,9 +378,10 @@ Eval:
                 }
                 
                 # Status icon
-                status_icon = "✅" if accuracy_metrics["exact_match"] else "⚠️"
-                print(f"   {status_icon} Predicted: '{predicted_text}'")
-                print(f"   📊 Confidence: {inference_result['confidence']:.4f} | Char Acc: {accuracy_metrics['character_accuracy']:.1%}")
+                if verbose:
+                    status_icon = "✅" if accuracy_metrics["exact_match"] else "⚠️"
+                    print(f"   {status_icon} Predicted: '{predicted_text}'")
+                    print(f"   📊 Confidence: {inference_result['confidence']:.4f} | Char Acc: {accuracy_metrics['character_accuracy']:.1%}")
                 
             else:
                 result = {
@@ -402,12 +393,16 @@ Eval:
                     "success": False
                 }
                 
-                print(f"   ❌ ERROR: {inference_result['error'][:60]}...")
-                if inference_result.get('raw_output'):
-                    print(f"      Raw output: {inference_result['raw_output'][:100]}...")
+                if verbose:
+                    print(f"   ❌ ERROR: {inference_result['error'][:60]}...")
+                    if inference_result.get('raw_output'):
+                        print(f"      Raw output: {inference_result['raw_output'][:100]}...")
             
             results.append(result)
         
+        if len(validation_data) > self.verbose_samples:
+            print(f"\n... and {len(validation_data) - self.verbose_samples} more samples")
+        
         # Calculate overall metrics
         avg_character_accuracy = total_character_accuracy / max(successful_inferences, 1)
         exact_match_rate = exact_matches / len(validation_data)
@@ -419,15 +414,48 @@ Eval:
             "success_rate": success_rate,
             "average_character_accuracy": avg_character_accuracy,
             "exact_match_rate": exact_match_rate,
-            "exact_matches": exact_matches
+            "exact_matches": exact_matches,
+            "elapsed_seconds": elapsed,
+            "images_per_second": len(validation_data) / elapsed if elapsed > 0 else 0.0
         }
+        with CompiledDictionary(self.dict_file) as dictionary:
+            metrics = compute_metrics(predictions, ground_truths, dictionary)
+        summary.update({key: metrics[key] for key in ("cer", "wer", "macro_recall", "top_confusions")})
+        per_class = metrics["per_class"]
+        if self.predictor is not None:
+            summary["timing"] = self.predictor.throughput()
         
         return {
             "summary": summary,
+            "per_class": per_class,
             "detailed_results": results,
             "config_used": config_file
         }
     
+    def run_stream_test(self, output: Path, max_samples: int = 0, restart: bool = False) -> Dict:
+        """ประเมินทั้ง validation file แบบ stream ลง JSONL (resume ได้, ไม่เก็บผลใน memory)"""
+        config_file = self.create_inference_config()
+        model_key, config_key = run_keys([hash_file(p) for p in self.model_files()], Path(config_file),
+                                         [hash_file(self.dict_file)], backend=self.backend)
+        # ให้คะแนนแบบเดียวกับ run_batch_test: single character เอาแค่ตัวแรก
+        evaluator = StreamingEvaluator(None, self.val_label_file, output, self.batch_size,
+                                       run_info={"model": model_key, "config": config_key, "scoring": "first character"},
+                                       normalize=lambda text: text[:1])
+        conflict = "" if restart else evaluator.resume_conflict()
+        if conflict:
+            return {"error": f"{conflict}; use --restart to start over"}
+
+        evaluator.predictor = self.get_predictor(config_file)
+        try:
+            summary = evaluator.run(restart, max_samples)
+        finally:
+            self.predictor.close()
+            self.predictor = None
+        summary["config_used"] = config_file
+        with open(Path(output).with_suffix(".summary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+    
     def print_summary_report(self, test_results: Dict):
         """แสดงรายงานสรุป"""
         print("\n" + "="*80)
@@ -447,6 +475,11 @@ Eval:
         print(f"  • Average character accuracy: {summary['average_character_accuracy']:.1%}")
         print(f"  • Exact match rate: {summary['exact_match_rate']:.1%}")
         print(f"  • Exact matches: {summary['exact_matches']}/{summary['total_samples']}")
+        print(f"  • CER: {summary['cer']:.1%} | WER: {summary['wer']:.1%} | Macro recall: {summary['macro_recall']:.1%}")
+        print(f"  • Inference time: {summary['elapsed_seconds']:.2f}s ({summary['images_per_second']:.1f} images/s)")
+        cache = summary.get("timing", {}).get("cache")
+        if cache:
+            print(f"  • Result cache: {cache['hits']}/{cache['hits'] + cache['misses']} hits ({cache['hit_rate']:.1%})")
         
         # Performance assessment
         print(f"\n🎯 PERFORMANCE ASSESSMENT:")
@@ -482,6 +515,11 @@ Eval:
         if len(successful_results) > 8:
             print(f"  ... and {len(successful_results) - 8} more successful predictions")
         
+        if summary.get("top_confusions"):
+            print(f"\n🔀 TOP CONFUSIONS:")
+            for item in summary["top_confusions"][:5]:
+                print(f"  • '{item['reference']}' -> '{item['predicted']}': {item['count']}")
+        
         failed_results = [r for r in test_results["detailed_results"] if not r["success"]]
         if failed_results:
             print(f"\n❌ FAILED PREDICTIONS:")
@@ -527,20 +565,51 @@ Eval:
 
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="🧪 Test SageMaker trained Thai OCR model")
+    parser.add_argument("--max-samples", type=int, default=0, help="Validation samples to test (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backend", choices=["predictor", "onnx", "subprocess"], default="predictor",
+                        help="predictor: Paddle Inference in-process; onnx: ONNX Runtime in-process; "
+                             "subprocess: one infer_rec.py call for all images")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Overall timeout in seconds for --backend subprocess")
+    parser.add_argument("--cache", type=str, default=str(DEFAULT_CACHE_FILE), help="Result cache (SQLite)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-infer every image")
+    parser.add_argument("--stream", type=str, default=None,
+                        help="Append each result to this JSONL as it completes (resumes an interrupted run)")
+    parser.add_argument("--restart", action="store_true", help="With --stream: start over instead of resuming")
+    args = parser.parse_args()
+    
     print("🚀 SageMaker Thai OCR Model Tester")
     print("=" * 60)
     
     tester = SageMakerModelTester()
+    tester.batch_size = args.batch_size
+    tester.backend = args.backend
+    tester.timeout = args.timeout
+    tester.cache_file = None if args.no_cache else Path(args.cache)
     
     # Check prerequisites
     if not tester.check_prerequisites():
         print("❌ Prerequisites check failed. Please ensure all required files exist.")
         return
     
+    if args.stream:
+        summary = tester.run_stream_test(Path(args.stream), args.max_samples, args.restart)
+        if "error" in summary:
+            print(f"❌ {summary['error']}")
+            return
+        print(f"\n🎯 Exact match: {summary['exact_matches']:,}/{summary['samples']:,} ({summary['accuracy']:.2%}) | "
+              f"CER: {summary['cer']:.2%} | errors: {summary['errors']:,}")
+        print(f"📄 Results: {summary['output']}")
+        return
+    
     print("\n🧪 Starting model testing...")
     
     # Run batch test
-    test_results = tester.run_batch_test(max_samples=15)
+    test_results = tester.run_batch_test(max_samples=args.max_samples)
     
     # Print summary
     tester.print_summary_report(test_results)
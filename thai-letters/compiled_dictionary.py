@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔤 Compiled Character Dictionary
+คอมไพล์ th_dict.txt ครั้งเดียวเป็น sidecar (<dict>.trie หรือ <dict>.space.trie เมื่อ use_space_char) แล้วอ่านผ่าน mmap:
+
+    - id -> string   : offsets + UTF-8 blob (id = ลำดับบรรทัดแบบเดียวกับ PaddleOCR, CTC id = id + 1)
+    - string -> id   : hash index (FNV-1a 64, open addressing)
+    - codepoint trie : ตาราง transition แบบ dense (node x codepoint class)
+
+Tokenizer แบบ greedy longest-match ทำงานทีละ batch ด้วย numpy
+(ทุกตำแหน่งเดิน trie พร้อมกัน) ใช้ร่วมกันได้ทั้ง converter, validator และ evaluation
+
+หมายเหตุ: CTCLabelEncode ของ PaddleOCR encode ทีละ codepoint
+ใช้ encode_batch(..., greedy=False) ถ้าต้องการผลแบบเดียวกับตอน train
+
+Format (little-endian, แต่ละ section จัด align 8 bytes):
+    header  : magic(8) source_size(u64) source_mtime_ns(u64) use_space(u64)
+              entries(u64) nodes(u64) alphabet(u64) hash_size(u64) blob_len(u64)
+    offsets : u32[entries + 1]
+    blob    : UTF-8 ของทุก entry ต่อกัน
+    alphabet: u32[alphabet]                 codepoint ที่มีใน dictionary (เรียง), class = index + 1
+    trans   : i32[nodes x (alphabet + 1)]  child node (-1 = ไม่มี), class 0 = codepoint นอก dictionary
+    entry   : i32[nodes]                    entry id ที่จบที่ node (-1 = ไม่มี)
+    hash    : i32[hash_size]                entry id (-1 = ช่องว่าง)
+
+ใช้งาน:
+    python compiled_dictionary.py th_dict.txt --tokenize "ก็ได้"
+    python compiled_dictionary.py th_dict.txt --benchmark rec_gt_train.txt
+"""
+
+import os
+import sys
+import mmap
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, List, NamedTuple
+
+import numpy as np
+
+TRIE_SUFFIX = ".trie"
+SPACE_TRIE_SUFFIX = ".space.trie"
+_MAGIC = b"THDICT01"
+_HEADER = struct.Struct("<8sQQQQQQQQ")
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+_MASK64 = (1 << 64) - 1
+
+# ตัวคั่นระหว่าง label ใน batch (ไม่มีทางอยู่ใน dictionary เพราะ dictionary แยกบรรทัดด้วย \n)
+_SEPARATOR = "\n"
+
+
+def trie_path(dict_path: Path, use_space_char: bool = False) -> Path:
+    """path ของ sidecar (แยกไฟล์ตาม use_space_char: ผู้ใช้ทั้งสองแบบไม่คอมไพล์ทับกันไปมา)"""
+    return Path(f"{dict_path}{SPACE_TRIE_SUFFIX if use_space_char else TRIE_SUFFIX}")
+
+
+def _fnv1a(data: bytes) -> int:
+    h = _FNV_OFFSET
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & _MASK64
+    return h
+
+
+def _align(n: int) -> int:
+    return (n + 7) // 8 * 8
+
+
+def read_dictionary(dict_path: Path, use_space_char: bool = False) -> List[str]:
+    """อ่าน dictionary แบบเดียวกับ BaseRecLabelEncode ของ PaddleOCR (1 บรรทัด = 1 entry)"""
+    with open(dict_path, 'rb') as f:
+        entries = [line.decode('utf-8').strip("\n").strip("\r\n") for line in f]
+    if use_space_char:
+        entries.append(" ")
+    return entries
+
+
+def compile_dictionary(dict_path: Path, use_space_char: bool = False, write: bool = True) -> bytes:
+    """คอมไพล์ dictionary เป็น artifact
+
+    entry ที่ซ้ำกัน: ตัวหลังชนะ (เหมือน dict ของ PaddleOCR)
+
+    Args:
+        write: บันทึกเป็น sidecar (ไฟล์ชั่วคราวชื่อไม่ซ้ำในโฟลเดอร์เดียวกัน แล้ว os.replace)
+
+    Returns:
+        เนื้อหาของ artifact
+    """
+    dict_path = Path(dict_path)
+    st = os.stat(dict_path)
+    entries = read_dictionary(dict_path, use_space_char)
+
+    encoded = [entry.encode('utf-8') for entry in entries]
+    offsets = np.zeros(len(entries) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = b"".join(encoded)
+
+    alphabet = np.array(sorted({ord(c) for entry in entries for c in entry}), dtype=np.uint32)
+    classes = {int(cp): i + 1 for i, cp in enumerate(alphabet)}
+
+    # trie: children[node] = {class: child}
+    children = [{}]
+    node_entry = [-1]
+    for entry_id, entry in enumerate(entries):
+        if not entry:
+            continue
+        node = 0
+        for c in entry:
+            cls = classes[ord(c)]
+            child = children[node].get(cls)
+            if child is None:
+                child = len(children)
+                children[node][cls] = child
+                children.append({})
+                node_entry.append(-1)
+            node = child
+        node_entry[node] = entry_id
+
+    trans = np.full((len(children), len(alphabet) + 1), -1, dtype=np.int32)
+    for node, edges in enumerate(children):
+        for cls, child in edges.items():
+            trans[node, cls] = child
+    node_entry = np.array(node_entry, dtype=np.int32)
+
+    hash_size = 1
+    while hash_size < max(2 * len(entries), 8):
+        hash_size *= 2
+    table = np.full(hash_size, -1, dtype=np.int32)
+    slots = {}
+    for entry_id, data in enumerate(encoded):
+        if not data:
+            continue
+        slot = _fnv1a(data) & (hash_size - 1)
+        while table[slot] >= 0 and slots[slot] != data:
+            slot = (slot + 1) & (hash_size - 1)
+        table[slot] = entry_id
+        slots[slot] = data
+
+    header = _HEADER.pack(_MAGIC, st.st_size, st.st_mtime_ns, int(use_space_char), len(entries),
+                          len(children), len(alphabet), hash_size, len(blob))
+    sections = [header, offsets.tobytes(), blob, alphabet.tobytes(), trans.tobytes(),
+                node_entry.tobytes(), table.tobytes()]
+    data = b"".join(section + b"\0" * (_align(len(section)) - len(section)) for section in sections)
+
+    if write:
+        target = trie_path(dict_path, use_space_char)
+        try:
+            # mkstemp: หลาย process คอมไพล์พร้อมกันได้โดยไม่เขียนไฟล์ .tmp เดียวกัน
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{target.name}.", suffix=".tmp", dir=target.parent)
+        except OSError:
+            # โฟลเดอร์อ่านอย่างเดียว: ใช้ artifact ในหน่วยความจำแทน
+            return data
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    return data
+
+
+class Tokens(NamedTuple):
+    """ผลของ encode_batch
+
+    ids            : i32[units]  entry id ของแต่ละหน่วย (-1 = codepoint นอก dictionary)
+    offsets        : i64[labels + 1]  หน่วยของ label i อยู่ที่ ids[offsets[i]:offsets[i + 1]]
+    codepoints     : u32[units]  codepoint แรกของแต่ละหน่วย (ใช้รายงาน OOV)
+    """
+    ids: np.ndarray
+    offsets: np.ndarray
+    codepoints: np.ndarray
+
+
+class CompiledDictionary:
+    """🔤 dictionary ที่คอมไพล์แล้ว (mmap) + greedy longest-match tokenizer"""
+
+    def __init__(self, dict_path: Path, use_space_char: bool = False, write: bool = True):
+        """
+        Args:
+            dict_path: th_dict.txt (1 บรรทัด = 1 entry)
+            use_space_char: เพิ่ม " " ท้าย dictionary แบบ Global.use_space_char ของ PaddleOCR
+            write: บันทึก artifact ที่คอมไพล์ใหม่เป็น sidecar (.trie / .space.trie)
+        """
+        self.dict_path = Path(dict_path)
+        self.use_space_char = use_space_char
+        self._map = None
+        self._fh = None
+
+        data = self._open_artifact()
+        if data is None:
+            data = compile_dictionary(self.dict_path, use_space_char, write=write)
+            if write and self._is_fresh(trie_path(self.dict_path, use_space_char)):
+                data = self._open_artifact()
+        self._parse(data)
+        self._units = None
+        self._single_chars = None
+
+    def _is_fresh(self, path: Path) -> bool:
+        """artifact ตรงกับ size + mtime ของ dictionary และ use_space_char หรือไม่"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+        except OSError:
+            return False
+        if len(header) != _HEADER.size:
+            return False
+        magic, size, mtime_ns, use_space, *_ = _HEADER.unpack(header)
+        st = os.stat(self.dict_path)
+        return (magic == _MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns
+                and use_space == int(self.use_space_char))
+
+    def _open_artifact(self):
+        path = trie_path(self.dict_path, self.use_space_char)
+        if not self._is_fresh(path):
+            return None
+        self._fh = open(path, 'rb')
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _parse(self, data):
+        _, _, _, _, entries, nodes, alphabet, hash_size, blob_len = _HEADER.unpack_from(data, 0)
+        pos = _align(_HEADER.size)
+
+        def take(dtype, count):
+            nonlocal pos
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=pos)
+            pos += _align(count * np.dtype(dtype).itemsize)
+            return array
+
+        self.offsets = take(np.uint32, entries + 1)
+        self._blob_pos = pos
+        self._data = data
+        pos += _align(blob_len)
+        self.alphabet = take(np.uint32, alphabet)
+        self.trans = take(np.int32, nodes * (alphabet + 1)).reshape(nodes, alphabet + 1)
+        self.node_entry = take(np.int32, nodes)
+        self.hash_table = take(np.int32, hash_size)
+
+        # ความยาวสูงสุดของ entry = ความลึกของ trie
+        depth, frontier = 0, np.array([0])
+        while True:
+            children = self.trans[frontier, 1:]
+            frontier = children[children >= 0]
+            if not len(frontier):
+                break
+            depth += 1
+        self.max_length = depth
+        # ตาราง codepoint -> class (ช่องสุดท้าย = 0 สำหรับ codepoint ที่เกิน)
+        self._class_table = np.zeros(int(self.alphabet.max()) + 2 if len(self.alphabet) else 1, dtype=np.int64)
+        self._class_table[self.alphabet] = np.arange(1, len(self.alphabet) + 1)
+        # per-codepoint (แบบ CTCLabelEncode): class -> entry id ของ entry ที่มี codepoint เดียว
+        root = self.trans[0]
+        self._class_entry = np.where(root >= 0, self.node_entry[np.maximum(root, 0)], -1).astype(np.int32)
+
+    def close(self):
+        """ปิด mmap และไฟล์"""
+        # numpy views ต้องถูกปล่อยก่อนปิด mmap
+        self.offsets = self.alphabet = self.trans = self.node_entry = self.hash_table = None
+        self._data = None
+        for handle in [self._map, self._fh]:
+            if handle is not None:
+                handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def unit(self, entry_id: int) -> str:
+        """entry id -> string"""
+        if not 0 <= entry_id < len(self):
+            raise IndexError(entry_id)
+        start = self._blob_pos + int(self.offsets[entry_id])
+        end = self._blob_pos + int(self.offsets[entry_id + 1])
+        return bytes(self._data[start:end]).decode('utf-8')
+
+    @property
+    def units(self) -> List[str]:
+        """ทุก entry ตามลำดับ id"""
+        if self._units is None:
+            self._units = [self.unit(i) for i in range(len(self))]
+        return self._units
+
+    def id_of(self, unit: str) -> int:
+        """string -> entry id (-1 ถ้าไม่มี) ผ่าน hash index"""
+        data = unit.encode('utf-8')
+        if not data:
+            return -1
+        mask = len(self.hash_table) - 1
+        slot = _fnv1a(data) & mask
+        while True:
+            entry_id = int(self.hash_table[slot])
+            if entry_id < 0:
+                return -1
+            start = self._blob_pos + int(self.offsets[entry_id])
+            end = self._blob_pos + int(self.offsets[entry_id + 1])
+            if self._data[start:end] == data:
+                return entry_id
+            slot = (slot + 1) & mask
+
+    def __contains__(self, unit: str) -> bool:
+        return self.id_of(unit) >= 0
+
+    @property
+    def single_chars(self) -> frozenset:
+        """codepoint ที่มี entry ของตัวเอง (ชุดที่ CTCLabelEncode encode ได้)"""
+        if self._single_chars is None:
+            self._single_chars = frozenset(u for u in self.units if len(u) == 1)
+        return self._single_chars
+
+    def unknown_chars(self, label: str) -> List[str]:
+        """codepoint ใน label ที่ CTCLabelEncode จะตัดทิ้ง (เรียง, ไม่ซ้ำ)"""
+        single = self.single_chars
+        return sorted({c for c in label if c not in single})
+
+    def _classes(self, codepoints: np.ndarray) -> np.ndarray:
+        """codepoint -> class (0 = นอก dictionary)"""
+        return self._class_table[np.minimum(codepoints, len(self._class_table) - 1)]
+
+    def encode_batch(self, labels: Iterable[str], greedy: bool = True) -> Tokens:
+        """แบ่งหลาย label เป็นหน่วยของ dictionary พร้อมกัน
+
+        Args:
+            greedy: True = longest match ผ่าน trie, False = ทีละ codepoint แบบ CTCLabelEncode
+        """
+        labels = list(labels)
+        text = _SEPARATOR.join(labels) + _SEPARATOR
+        codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        is_sep = codepoints == ord(_SEPARATOR)
+        classes = self._classes(codepoints)
+        classes[is_sep] = 0
+        n = len(codepoints)
+
+        if greedy:
+            # เดิน trie จากทุกตำแหน่งพร้อมกัน จำ match ที่ยาวที่สุด
+            match_len = np.zeros(n, dtype=np.int64)
+            match_id = np.full(n, -1, dtype=np.int32)
+            walking = np.arange(n)
+            node = np.zeros(n, dtype=np.int64)
+            for depth in range(1, self.max_length + 1):
+                pos = walking + depth - 1
+                inside = pos < n
+                walking, node, pos = walking[inside], node[inside], pos[inside]
+                node = self.trans[node, classes[pos]]
+                ok = node >= 0
+                walking, node = walking[ok], node[ok]
+                if not len(walking):
+                    break
+                entry = self.node_entry[node]
+                hit = entry >= 0
+                match_len[walking[hit]] = depth
+                match_id[walking[hit]] = entry[hit]
+
+            # greedy: match ไม่ข้ามตัวคั่น ทุก label จึงเริ่มที่จุดต้นของตัวเองเสมอ
+            # เดินทุก label พร้อมกัน (จำนวนรอบ = จำนวนหน่วยของ label ที่ยาวที่สุด)
+            step = np.maximum(match_len, 1)
+            cursor = np.concatenate([[0], np.nonzero(is_sep)[0][:-1] + 1])
+            visited = np.zeros(n, dtype=bool)
+            while len(cursor):
+                cursor = cursor[~is_sep[cursor]]
+                visited[cursor] = True
+                cursor = cursor + step[cursor]
+            starts = np.nonzero(visited)[0]
+        else:
+            match_id = self._class_entry[classes]
+            starts = np.nonzero(~is_sep)[0]
+
+        # label ของแต่ละหน่วย = จำนวนตัวคั่นก่อนหน้า
+        label_of = np.cumsum(is_sep)[starts]
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(label_of, minlength=len(labels)))
+        return Tokens(match_id[starts].astype(np.int32), offsets, codepoints[starts])
+
+    def encode(self, label: str, greedy: bool = True) -> List[int]:
+        """label -> entry ids (-1 = codepoint นอก dictionary)"""
+        return self.encode_batch([label], greedy).ids.tolist()
+
+    def split(self, label: str) -> List[str]:
+        """label -> หน่วยของ dictionary (codepoint นอก dictionary แยกเป็นหน่วยเดี่ยว)"""
+        tokens = self.encode_batch([label])
+        return [self.unit(i) if i >= 0 else chr(cp) for i, cp in zip(tokens.ids.tolist(), tokens.codepoints.tolist())]
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🔤 Compile a character dictionary and tokenize labels against it")
+    parser.add_argument("dict_path", type=str, help="th_dict.txt")
+    parser.add_argument("--use-space-char", action="store_true", help="Append ' ' like Global.use_space_char")
+    parser.add_argument("--tokenize", type=str, default=None, help="Print the dictionary units of a label")
+    parser.add_argument("--benchmark", type=str, default=None,
+                       help="Tokenize every label of a label file (path<TAB>label) and report throughput")
+
+    args = parser.parse_args()
+
+    if not Path(args.dict_path).exists():
+        print(f"❌ Dictionary not found: {args.dict_path}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    with CompiledDictionary(args.dict_path, args.use_space_char) as dictionary:
+        print(f"🔤 {args.dict_path}: {len(dictionary)} entries, {len(dictionary.alphabet)} codepoints, "
+              f"{len(dictionary.trans)} trie nodes, max length {dictionary.max_length} "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+        print(f"📁 Artifact: {trie_path(args.dict_path, args.use_space_char)}")
+
+        if args.tokenize is not None:
+            units = dictionary.split(args.tokenize)
+            ids = dictionary.encode(args.tokenize)
+            print(" | ".join(f"{u}({i})" for u, i in zip(units, ids)))
+
+        if args.benchmark:
+            with open(args.benchmark, 'r', encoding='utf-8') as f:
+                labels = [line.rstrip('\r\n').split('\t', 1)[-1] for line in f if line.strip()]
+            chars = sum(len(label) for label in labels)
+            started = time.perf_counter()
+            tokens = dictionary.encode_batch(labels)
+            elapsed = time.perf_counter() - started
+            oov = int((tokens.ids < 0).sum())
+            print(f"⚡ {len(labels):,} labels / {chars:,} chars -> {len(tokens.ids):,} units in {elapsed:.3f}s "
+                  f"({chars / max(elapsed, 1e-9) / 1e6:.1f}M chars/s, {oov:,} OOV)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📖 Streaming Corpus Builder
+สร้าง corpus ขนาดใหญ่ (หลายล้านคำ) ด้วยหน่วยความจำคงที่
+
+- สร้างคำสังเคราะห์จาก character n-gram model ที่เรียนจาก thai_corpus.txt
+  (สุ่มทีละ batch ด้วย numpy: Walker alias table ต่อ context)
+- กำจัดคำซ้ำด้วย blocked Bloom filter (numpy array หรือไฟล์ memmap บนดิสก์)
+  หรือ set ของคำ (ตรงเป๊ะ แต่ใช้หน่วยความจำตามจำนวนและความยาวคำ)
+- เขียนลงไฟล์แยกตามความยาวคำ (length bucket) เป็น chunk ละ chunk_size บรรทัด
+  ต่อ bucket ตามลำดับความยาวจะได้ th_corpus.txt ที่เรียงตามความยาวโดยไม่ต้อง sort
+
+ใช้งาน:
+    python corpus_builder.py <output_dir> --size 1000000
+    python corpus_builder.py <output_dir> --size 5000000 --order 4 --bloom-file corpus.bloom
+"""
+
+import sys
+import json
+import math
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+DEDUP_MODES = ["bloom", "set"]
+
+# ตัวอักษรพิเศษสำหรับต้น/ท้ายคำใน n-gram model
+_BOS = "\x02"
+_EOS = "\x03"
+
+
+def _is_thai(word: str) -> bool:
+    return any('฀' <= c <= '๿' for c in word)
+
+
+def read_words(corpus_file: Path, max_len: int = 20) -> Iterator[str]:
+    """อ่านคำจาก corpus ทีละบรรทัด"""
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word and len(word) <= max_len:
+                yield word
+
+
+def _mix64(z: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _alias_tables(probs: np.ndarray):
+    """Walker alias tables ต่อแถว (สุ่มได้ O(1) ต่อครั้ง)"""
+    rows, cols = probs.shape
+    alias_prob = np.ones((rows, cols), dtype=np.float64)
+    alias = np.tile(np.arange(cols, dtype=np.int32), (rows, 1))
+    for r in range(rows):
+        scaled = (probs[r] * cols).tolist()
+        small = [i for i in range(cols) if scaled[i] < 1.0]
+        large = [i for i in range(cols) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            alias_prob[r, s] = scaled[s]
+            alias[r, s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+    return alias_prob, alias
+
+
+class CharNgramModel:
+    """character n-gram model (order = จำนวนตัวอักษรรวมตัวที่ทำนาย)
+
+    context ที่เคยเห็นทั้งหมดอยู่ในตาราง dense:
+        alias_prob, alias -> ความน่าจะเป็นของตัวอักษรถัดไปหลัง context ctx (Walker alias)
+        next_ctx[ctx, v] -> context ใหม่หลังต่อด้วย v
+    ทำให้สุ่มหลายพันคำพร้อมกันได้ด้วย numpy
+    """
+
+    def __init__(self, order: int = 3):
+        if order < 2:
+            raise ValueError("order must be >= 2")
+        self.order = order
+        self.vocab = []
+        self.alias_prob = None
+        self.alias = None
+        self.next_ctx = None
+        self.start_ctx = 0
+
+    def fit(self, words: Iterable[str]) -> "CharNgramModel":
+        """นับ n-gram จากคำภาษาไทย"""
+        k = self.order - 1
+        counts = {}
+        for word in words:
+            if not _is_thai(word):
+                continue
+            padded = _BOS * k + word + _EOS
+            for i in range(k, len(padded)):
+                context = padded[i - k:i]
+                nxt = counts.setdefault(context, {})
+                nxt[padded[i]] = nxt.get(padded[i], 0) + 1
+
+        if not counts:
+            raise ValueError("No Thai words to train the n-gram model")
+
+        self.vocab = sorted({c for nxt in counts.values() for c in nxt})
+        char_ids = {c: i for i, c in enumerate(self.vocab)}
+        contexts = sorted(counts)
+        context_ids = {c: i for i, c in enumerate(contexts)}
+
+        probs = np.zeros((len(contexts), len(self.vocab)), dtype=np.float64)
+        next_ctx = np.zeros((len(contexts), len(self.vocab)), dtype=np.int32)
+        for context, nxt in counts.items():
+            row = context_ids[context]
+            for char, count in nxt.items():
+                col = char_ids[char]
+                probs[row, col] = count
+                if char != _EOS:
+                    # context ที่ไม่เคยเห็นจะไม่มีทางถูกสุ่มไปถึง (ความน่าจะเป็นเป็น 0)
+                    next_ctx[row, col] = context_ids.get((context + char)[-k:], 0)
+
+        probs /= probs.sum(axis=1, keepdims=True)
+        self.alias_prob, self.alias = _alias_tables(probs)
+        self.next_ctx = next_ctx
+        self._alias_prob_flat = self.alias_prob.ravel()
+        self._alias_flat = self.alias.astype(np.int64).ravel()
+        self._next_ctx_flat = next_ctx.astype(np.int64).ravel()
+        self.start_ctx = context_ids[_BOS * k]
+        self._eos = char_ids[_EOS]
+        self._codepoints = np.array([ord(c) for c in self.vocab], dtype=np.uint32)
+        return self
+
+    def sample(self, n: int, rng: np.random.Generator, min_len: int = 2, max_len: int = 12) -> np.ndarray:
+        """สุ่มคำ n คำ คืน numpy array ของ str
+
+        คำที่สั้นกว่า min_len หรือยาวเกิน max_len ถูกทิ้ง จึงอาจได้น้อยกว่า n
+        """
+        vocab_size = len(self.vocab)
+        chars = np.zeros((n, max_len), dtype=np.int32)
+        lengths = np.full(n, -1, dtype=np.int32)   # -1 = ยังไม่จบคำ
+
+        # เก็บเฉพาะคำที่ยังสุ่มอยู่ (active) เพื่อไม่ต้องสแกนทั้ง batch ทุก step
+        active = np.arange(n)
+        ctx = np.full(n, self.start_ctx, dtype=np.int64)
+        for step in range(max_len + 1):
+            if not len(active):
+                break
+            # alias method: สุ่มคอลัมน์แบบ uniform แล้วเลือกคอลัมน์นั้นหรือ alias ของมัน
+            u = rng.random(len(active)) * vocab_size
+            column = u.astype(np.int64)
+            flat = ctx * vocab_size + column
+            picked = np.where(u - column < self._alias_prob_flat[flat], column, self._alias_flat[flat])
+
+            ended = picked == self._eos
+            lengths[active[ended]] = step
+            if step == max_len:
+                break
+            cont = ~ended
+            active, ctx, picked = active[cont], ctx[cont], picked[cont]
+            chars[active, step] = picked
+            ctx = self._next_ctx_flat[ctx * vocab_size + picked]
+
+        # ยังไม่จบคำเมื่อครบ max_len = คำถูกตัด ไม่ใช้
+        keep = lengths >= min_len
+        codepoints = self._codepoints[chars[keep]]
+        codepoints[np.arange(max_len)[None, :] >= lengths[keep][:, None]] = 0
+        # UCS-4 ที่ลงท้ายด้วย 0 = str ที่สั้นกว่าความกว้างของ dtype
+        return np.ascontiguousarray(codepoints).view(f"<U{max_len}").ravel()
+
+
+class BloomFilter:
+    """Blocked Bloom filter: ทุก bit ของคำหนึ่งอยู่ใน block 64-bit เดียวกัน
+
+    ตรวจ/เพิ่มได้ด้วย gather + OR ครั้งเดียวต่อคำ (แทน k ครั้ง)
+    เก็บใน numpy array หรือไฟล์ memmap ถ้าระบุ path
+    """
+
+    MAX_HASHES = 10   # ใช้ h2 ทีละ 6 bit
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4, path: Optional[Path] = None):
+        # ขยาย 1.5 เท่าเพื่อชดเชย false positive ที่สูงขึ้นของแบบ blocked
+        num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2) * 1.5)
+        self.num_blocks = max(1, num_bits // 64)
+        self.num_hashes = min(self.MAX_HASHES, max(1, round(-math.log2(error_rate))))
+        if path:
+            path = Path(path)
+            size = self.num_blocks * 8
+            mode = 'r+' if path.exists() and path.stat().st_size == size else 'w+'
+            self.blocks = np.memmap(path, dtype=np.uint64, mode=mode, shape=(self.num_blocks,))
+        else:
+            self.blocks = np.zeros(self.num_blocks, dtype=np.uint64)
+
+    def _masks(self, h2: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(h2), dtype=np.uint64)
+        for i in range(self.num_hashes):
+            mask |= np.uint64(1) << ((h2 >> np.uint64(6 * i)) & np.uint64(63))
+        return mask
+
+    def contains_add(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        """คืน mask ว่าเคยเห็นแล้ว แล้วเพิ่มทั้ง batch เข้า filter"""
+        block = h1 % np.uint64(self.num_blocks)
+        mask = self._masks(h2)
+        seen = (self.blocks[block] & mask) == mask
+        np.bitwise_or.at(self.blocks, block[~seen], mask[~seen])
+        return seen
+
+    def flush(self):
+        if isinstance(self.blocks, np.memmap):
+            self.blocks.flush()
+
+
+class CorpusBuilder:
+    """📖 เขียน corpus แบบ streaming: dedup -> length bucket -> chunk files"""
+
+    def __init__(self, output_dir: Path, dedup: str = "bloom", capacity: int = 10_000_000,
+                 error_rate: float = 1e-4, bloom_file: Path = None, chunk_size: int = 100_000):
+        """
+        Args:
+            output_dir: โฟลเดอร์ของ chunk files (corpus_len{NN}_{MMMM}.txt)
+            dedup: bloom (หน่วยความจำคงที่, อาจตัดคำใหม่ทิ้งได้ตาม error_rate) หรือ set (ตรงเป๊ะ)
+            capacity: จำนวนคำที่คาดว่าจะใส่ (กำหนดขนาด Bloom filter)
+            bloom_file: เก็บ Bloom filter เป็นไฟล์ memmap (ใช้ต่อข้ามรอบได้)
+            chunk_size: จำนวนบรรทัดต่อ chunk file
+        """
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"dedup must be one of {DEDUP_MODES}, got {dedup!r}")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.dedup = dedup
+        self.chunk_size = chunk_size
+        self.bloom = BloomFilter(capacity, error_rate, bloom_file) if dedup == "bloom" else None
+        self.seen = set() if dedup == "set" else None
+
+        self._handles = {}    # length -> (file, lines in current chunk)
+        self.chunks = {}      # length -> [chunk file names]
+        self.counts = {}      # length -> words
+        self.total = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def _codes(words) -> np.ndarray:
+        """คำ -> ตาราง codepoint (n, ความยาวสูงสุด) เติม 0 ท้ายคำ"""
+        words = np.asarray(words, dtype=str)
+        width = words.dtype.itemsize // 4
+        return np.ascontiguousarray(words).view(np.uint32).reshape(len(words), max(width, 1)), words
+
+    @staticmethod
+    def _digests(codes: np.ndarray):
+        """hash 2 ชุด (64-bit) ต่อคำ: splitmix64 ทีละ 2 codepoints แล้วแตก h2 จาก h1
+
+        ข้ามคู่ที่เป็น 0 ผลจึงไม่ขึ้นกับความกว้างของ batch
+        (Bloom filter บนดิสก์ใช้ต่อข้ามรอบได้)
+        """
+        if codes.shape[1] % 2:
+            codes = np.hstack([codes, np.zeros((len(codes), 1), dtype=np.uint32)])
+        pairs = np.ascontiguousarray(codes).view(np.uint64)
+        h1 = np.full(len(codes), 0x9E3779B97F4A7C15, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for column in pairs.T:
+                h1 = np.where(column != 0, _mix64(h1 ^ column), h1)
+            h2 = _mix64(h1 ^ np.uint64(0xD1B54A32D192ED03))
+        return h1, h2
+
+    def add_batch(self, words) -> int:
+        """เพิ่มคำทั้ง batch (list หรือ numpy array ของ str) คืนจำนวนคำใหม่"""
+        if len(words) == 0:
+            return 0
+        codes, words = self._codes(words)
+        if self.bloom is not None:
+            h1, h2 = self._digests(codes)
+
+        # คำซ้ำภายใน batch: เก็บตัวแรก (set เทียบตัวคำเอง ไม่ใช่ digest)
+        _, first = np.unique(h1 if self.bloom is not None else words, return_index=True)
+        keep = np.zeros(len(words), dtype=bool)
+        keep[first] = True
+
+        if self.bloom is not None:
+            seen = self.bloom.contains_add(h1[first], h2[first])
+            keep[first[seen]] = False
+        else:
+            for i in first:
+                word = str(words[i])
+                if word in self.seen:
+                    keep[i] = False
+                else:
+                    self.seen.add(word)
+
+        lengths = (codes[keep] != 0).sum(axis=1)
+        new_words = words[keep]
+        for length in np.unique(lengths):
+            self._write(int(length), new_words[lengths == length].tolist())
+
+        added = int(keep.sum())
+        self.duplicates += len(words) - added
+        return added
+
+    def add(self, words: Iterable[str], batch_size: int = 50_000) -> int:
+        """เพิ่มคำจาก iterable (ทีละ batch)"""
+        added = 0
+        batch = []
+        for word in words:
+            batch.append(word)
+            if len(batch) >= batch_size:
+                added += self.add_batch(batch)
+                batch = []
+        return added + self.add_batch(batch)
+
+    def _write(self, length: int, words: List[str]):
+        """เขียนคำความยาวเดียวกันลง chunk ของ bucket (เปิด chunk ใหม่เมื่อเต็ม)"""
+        while words:
+            handle = self._handles.get(length)
+            if handle is None or handle[1] >= self.chunk_size:
+                if handle is not None:
+                    handle[0].close()
+                name = f"corpus_len{length:02d}_{len(self.chunks.get(length, [])):04d}.txt"
+                self.chunks.setdefault(length, []).append(name)
+                handle = [open(self.output_dir / name, 'w', encoding='utf-8'), 0]
+                self._handles[length] = handle
+
+            part, words = words[:self.chunk_size - handle[1]], words[self.chunk_size - handle[1]:]
+            handle[0].write("\n".join(part) + "\n")
+            handle[1] += len(part)
+            self.counts[length] = self.counts.get(length, 0) + len(part)
+            self.total += len(part)
+
+    def close(self) -> Dict:
+        """ปิดไฟล์และเขียน corpus_manifest.json"""
+        for handle, _ in self._handles.values():
+            handle.close()
+        self._handles = {}
+        if self.bloom is not None:
+            self.bloom.flush()
+
+        manifest = {
+            "total": self.total,
+            "duplicates_skipped": self.duplicates,
+            "dedup": self.dedup,
+            "buckets": {str(length): {"words": self.counts[length], "chunks": self.chunks[length]}
+                        for length in sorted(self.counts)}
+        }
+        with open(self.output_dir / "corpus_manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+    def merge(self, target_file: Path):
+        """ต่อทุก chunk ตามลำดับความยาว -> ไฟล์เดียวที่เรียงตามความยาว"""
+        with open(target_file, 'wb') as out:
+            for length in sorted(self.chunks):
+                for name in self.chunks[length]:
+                    with open(self.output_dir / name, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+
+
+def build_corpus(output_dir: Path, seed_words: Iterable[str], target_size: int,
+                 order: int = 3, min_len: int = 2, max_len: int = 12, dedup: str = "bloom",
+                 bloom_file: Path = None, chunk_size: int = 100_000, seed: int = 42,
+                 batch_size: int = 50_000, max_rounds: int = 1000) -> CorpusBuilder:
+    """สร้าง corpus: คำจริงทั้งหมด + คำสังเคราะห์จาก n-gram จนครบ target_size
+
+    Returns:
+        CorpusBuilder ที่ปิดแล้ว (ดู .total, .chunks, merge())
+    """
+    seed_words = list(seed_words)
+    builder = CorpusBuilder(output_dir, dedup=dedup, capacity=max(target_size, len(seed_words)) * 2,
+                            bloom_file=bloom_file, chunk_size=chunk_size)
+    builder.add(seed_words)
+
+    model = CharNgramModel(order).fit(seed_words)
+    rng = np.random.default_rng(seed)
+    stale_rounds = 0
+    for _ in range(max_rounds):
+        if builder.total >= target_size:
+            break
+        need = target_size - builder.total
+        words = model.sample(min(batch_size, need * 2), rng, min_len, max_len)
+        added = builder.add_batch(words[:need] if len(words) > need else words)
+        # model สร้างคำใหม่ไม่ได้แล้ว (corpus เล็ก / order สูง)
+        stale_rounds = stale_rounds + 1 if added == 0 else 0
+        if stale_rounds >= 5:
+            break
+
+    builder.close()
+    return builder
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="📖 Build a large deduplicated Thai corpus")
+    parser.add_argument("output_dir", type=str, help="Directory for length-bucketed chunk files")
+    parser.add_argument("--seed-corpus", type=str, default=str(Path(__file__).parent / "thai_corpus.txt"),
+                       help="Real words to include and to train the n-gram model (default: thai_corpus.txt)")
+    parser.add_argument("--size", type=int, default=1_000_000, help="Target number of unique words")
+    parser.add_argument("--order", type=int, default=3, help="Character n-gram order (default: 3)")
+    parser.add_argument("--min-len", type=int, default=2)
+    parser.add_argument("--max-len", type=int, default=12)
+    parser.add_argument("--dedup", type=str, default="bloom", choices=DEDUP_MODES)
+    parser.add_argument("--bloom-file", type=str, default=None,
+                       help="Keep the Bloom filter on disk (memmap) instead of in memory")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Lines per chunk file")
+    parser.add_argument("--merge", type=str, default=None,
+                       help="Also write all words, sorted by length, to this file (e.g. th_corpus.txt)")
+    parser.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+
+    if not Path(args.seed_corpus).exists():
+        print(f"❌ Seed corpus not found: {args.seed_corpus}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    builder = build_corpus(Path(args.output_dir), read_words(Path(args.seed_corpus)), args.size,
+                           order=args.order, min_len=args.min_len, max_len=args.max_len,
+                           dedup=args.dedup, bloom_file=args.bloom_file, chunk_size=args.chunk_size,
+                           seed=args.seed)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Corpus: {builder.total:,} unique words in {elapsed:.1f}s "
+          f"({builder.duplicates:,} duplicates skipped, {args.dedup})")
+    for length in sorted(builder.counts):
+        print(f"  • len {length:2d}: {builder.counts[length]:>10,} words in {len(builder.chunks[length])} chunk(s)")
+
+    if args.merge:
+        builder.merge(Path(args.merge))
+        print(f"📁 Merged corpus: {args.merge}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧬 Near-Duplicate & Train/Val Leakage Detection
+หาภาพที่เกือบซ้ำกันด้วย perceptual hash (dHash / pHash 64-bit)
+
+- คำนวณ hash ใน process pool (ส่งงานเป็น chunk)
+- ภาพที่ hash ตรงกันเป๊ะ รวมกลุ่มด้วย dict ก่อน (generator สร้างภาพซ้ำเยอะมาก)
+- hash ที่ไม่ซ้ำเก็บใน multi-index hash (Norouzi et al.): แบ่ง 64 bit เป็น m ส่วน ยาว ~log2(N) bit
+  ถ้า Hamming distance <= r จะมีอย่างน้อย 1 ส่วนที่ต่างกันไม่เกิน s = r // m bit (pigeonhole)
+  จึงเทียบเฉพาะคู่ที่อยู่ใกล้กันในส่วนนั้น (ส่วนยาว = bucket เล็ก) แทนการเทียบทุกคู่
+  หาคู่ทั้งหมดครั้งเดียวหลัง hash เสร็จด้วย numpy แทนการ query ทีละภาพ
+- รวมคู่ที่ใกล้กันเป็น cluster ด้วย union-find
+
+รายงาน:
+    leakage        -> cluster ที่มีทั้ง train และ val ใน dataset เดียวกัน
+    cross_dataset  -> cluster ที่มีภาพจากหลาย dataset
+    label_conflict -> ภาพเกือบเหมือนกันแต่ label ต่างกัน
+
+ใช้งาน:
+    python dataset_dedup.py <dataset_dir> [<dataset_dir> ...] --max-distance 4
+    python dataset_dedup.py <converted_dir> --remove leakage
+    python dataset_dedup.py --benchmark 1000000     # เวลาหาคู่ของ index เทียบกับจำนวน hash
+"""
+
+import os
+import sys
+import json
+import time
+from array import array
+from collections import deque
+from itertools import combinations
+from math import comb
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent))
+from dataset_integrity_checker import detect_layout, iter_label_samples
+
+REPORT_FILE = "dedup_report.json"
+HASH_METHODS = ["dhash", "phash"]
+REMOVE_MODES = ["leakage", "all"]
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def _dct_matrix(n: int):
+    """DCT-II matrix (n x n) สำหรับ pHash"""
+    import numpy as np
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+def image_hash(img, method: str = "dhash") -> int:
+    """perceptual hash 64-bit ของภาพ PIL
+
+    dhash: ย่อเป็น 9x8 grayscale แล้วเทียบ pixel ที่อยู่ติดกันในแนวนอน
+    phash: ย่อเป็น 32x32 -> DCT -> 8x8 ความถี่ต่ำ เทียบกับ median
+    """
+    import numpy as np
+    from PIL import Image
+
+    gray = img.convert("L")
+    if method == "dhash":
+        pixels = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    elif method == "phash":
+        pixels = np.asarray(gray.resize((32, 32), Image.BILINEAR), dtype=np.float64)
+        dct = _dct_matrix(32)
+        low = (dct @ pixels @ dct.T)[:8, :8].flatten()
+        bits = low > np.median(low[1:])
+    else:
+        raise ValueError(f"Unknown hash method: {method}")
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hash_images(paths: List[str], method: str = "dhash") -> List[Tuple[str, int]]:
+    """hash ภาพ 1 chunk (รันใน worker process) คืน None ถ้าเปิดไม่ได้"""
+    from PIL import Image
+
+    results = []
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                results.append((path, image_hash(img, method)))
+        except Exception:
+            results.append((path, None))
+    return results
+
+
+def _popcount_array(values):
+    """popcount ของ uint64 array"""
+    import numpy as np
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class MultiIndexHash:
+    """multi-index hashing: หาทุกคู่ที่ Hamming distance <= max_distance
+
+    แบ่ง hash เป็น m ส่วน ค้นแต่ละส่วนด้วยรัศมี s = r // m (ทุกค่าที่ต่างไม่เกิน s bit)
+    เลือก m ที่ (probe ต่อ hash) x (ขนาด bucket เฉลี่ย) ต่ำสุด: ส่วนยาว ~log2(N) bit
+    ทำให้งานต่อ hash แทบไม่โตตาม N ถ้า hash กระจายดี (hash ที่กระจุกกันมาก bucket ก็ใหญ่ตาม)
+    """
+
+    DIRECT_BITS = 24   # ส่วนที่ยาวไม่เกินนี้ใช้ตาราง bucket ขนาด 2^width แทน searchsorted
+
+    def __init__(self, max_distance: int = 4, bits: int = 64, block_size: int = 1 << 17):
+        self.max_distance = max_distance
+        self.bits = bits
+        self.block_size = block_size
+        self.hashes = array('Q')
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, value: int) -> int:
+        """เพิ่ม hash คืน id"""
+        self.hashes.append(value)
+        return len(self.hashes) - 1
+
+    def layout(self, count: int) -> Tuple[List[Tuple[int, int]], int]:
+        """([(shift, width), ...], รัศมีต่อส่วน) ที่ต้นทุนโดยประมาณต่ำสุดสำหรับ hash count ตัว"""
+        def cost(chunks):
+            width, radius = self.bits // chunks, self.max_distance // chunks
+            probes = sum(comb(width, k) for k in range(radius + 1))
+            return chunks * probes * (1 + count / 2 ** width)
+
+        chunks = min(range(1, self.bits + 1), key=cost)
+        widths = [self.bits // chunks + (1 if i < self.bits % chunks else 0) for i in range(chunks)]
+        slices, shift = [], self.bits
+        for width in widths:
+            shift -= width
+            slices.append((shift, width))
+        return slices, self.max_distance // chunks
+
+    def _candidates(self, keys, width: int, radius: int) -> Iterator[Tuple]:
+        """คู่ (a, b) ที่ส่วนนี้ต่างกันไม่เกิน radius bit ทีละก้อน (a < b)"""
+        import numpy as np
+
+        count = len(keys)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = None
+        if width <= self.DIRECT_BITS:
+            starts = np.zeros((1 << width) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(keys, minlength=1 << width), out=starts[1:])
+        flips = [sum(1 << b for b in bits) for k in range(radius + 1) for bits in combinations(range(width), k)]
+
+        # query ตามลำดับค่า และ probe ทีละ flip: ค่าที่ xor แล้วยังเรียงเป็นช่วงๆ จึงอ่านตารางแทบต่อเนื่อง
+        for begin in range(0, count, self.block_size):
+            query_keys = sorted_keys[begin:begin + self.block_size]
+            queries = order[begin:begin + self.block_size]
+            for flip in flips:
+                probes = query_keys ^ flip
+                if starts is not None:
+                    lo = starts[probes]
+                    sizes = starts[probes + 1] - lo
+                else:
+                    lo = np.searchsorted(sorted_keys, probes, side="left")
+                    sizes = np.searchsorted(sorted_keys, probes, side="right") - lo
+                total = int(sizes.sum())
+                if not total:
+                    continue
+                # ขยายช่วง [lo, lo+size) ของทุก probe เป็นตำแหน่งเดียวใน order
+                offsets = np.repeat(lo - (np.cumsum(sizes) - sizes), sizes) + np.arange(total)
+                a, b = np.repeat(queries, sizes), order[offsets]
+                keep = a < b
+                yield a[keep], b[keep]
+
+    def pairs(self):
+        """คืน (ids_a, ids_b, distances) เป็น numpy array ของทุกคู่ a < b ที่ distance <= max_distance"""
+        import numpy as np
+
+        hashes = np.frombuffer(self.hashes, dtype=np.uint64) if len(self.hashes) else np.zeros(0, np.uint64)
+        count = len(hashes)
+        slices, radius = self.layout(count)
+
+        found = []
+        for shift, width in slices:
+            keys = ((hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)).astype(np.int64)
+            for a, b in self._candidates(keys, width, radius):
+                # ตรวจ distance เต็มทันที (popcount แบบ vector ถูกกว่าเก็บ candidate ไว้นับ)
+                close = _popcount_array(hashes[a] ^ hashes[b]) <= self.max_distance
+                found.append(a[close] * count + b[close])
+
+        # คู่เดียวกันอาจถูกพบจากหลายส่วน
+        keys = np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+        a, b = keys // count, keys % count
+        return a, b, _popcount_array(hashes[a] ^ hashes[b]).astype(np.int64)
+
+
+def benchmark_index(size: int, max_distance: int = 4, seed: int = 0) -> Dict:
+    """สุ่ม hash (ครึ่งหนึ่งเป็นสำเนาที่พลิก <= max_distance bit) แล้วจับเวลา pairs()"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 1 << 63, size - size // 2, dtype=np.uint64) * np.uint64(2) + \
+        rng.integers(0, 2, size - size // 2, dtype=np.uint64)
+    copies = base[rng.integers(0, len(base), size // 2)]
+    for _ in range(max_distance):
+        copies ^= np.uint64(1) << rng.integers(0, 64, len(copies), dtype=np.uint64)
+    index = MultiIndexHash(max_distance)
+    index.hashes = array('Q', np.concatenate([base, copies]).tobytes())
+    started = time.perf_counter()
+    a, _, _ = index.pairs()
+    slices, radius = index.layout(size)
+    return {"hashes": size, "pairs": len(a), "seconds": time.perf_counter() - started,
+            "chunks": len(slices), "chunk_radius": radius}
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = array('l')
+
+    def add(self) -> int:
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # root ที่เก่ากว่าเป็นตัวแทน (ภาพแรกที่พบถูกเก็บไว้ตอน --remove)
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+class DatasetDeduplicator:
+    """🧬 หา near-duplicate ภายใน dataset และข้าม dataset"""
+
+    def __init__(self, dataset_dirs: List[str], method: str = "dhash", max_distance: int = 4,
+                 workers: int = None, chunk_size: int = 256):
+        """
+        Args:
+            dataset_dirs: raw หรือ converted dataset (หลายอันได้ ลำดับมีผลตอน --remove)
+            method: dhash (เร็ว) หรือ phash (ทนต่อการเปลี่ยนแสง/blur มากกว่า)
+            max_distance: Hamming distance สูงสุดที่นับว่า "เกือบซ้ำ" (จาก 64 bit)
+            workers: จำนวน process (default: CPU count)
+            chunk_size: จำนวนภาพต่อ 1 งานของ worker
+        """
+        if method not in HASH_METHODS:
+            raise ValueError(f"method must be one of {HASH_METHODS}, got {method!r}")
+
+        self.dataset_dirs = [Path(d) for d in dataset_dirs]
+        self.layouts = [detect_layout(d) for d in self.dataset_dirs]
+        self.method = method
+        self.max_distance = max_distance
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+        # ข้อมูลต่อภาพ (index เดียวกัน)
+        self.samples = []          # (dataset_idx, split, label_file, line, image, label)
+        self.sample_hashes = array('Q')
+        self.unreadable = set()
+        self.clusters = _UnionFind()
+        self.index = MultiIndexHash(max_distance)
+        self._exact = {}           # hash -> sample id แรกที่มี hash นี้
+        self._unique_owner = []    # id ใน index -> sample id
+        self.stats = {"images": 0, "unreadable": 0, "unique_hashes": 0, "near_pairs": 0}
+
+    def _iter_samples(self) -> Iterator[Tuple[int, str, str, int, str, str]]:
+        for dataset_idx, (dataset_dir, layout) in enumerate(zip(self.dataset_dirs, self.layouts)):
+            for label_file, line_no, image_path, label in iter_label_samples(dataset_dir, layout):
+                if label is None:
+                    continue
+                split = label_file.replace("rec_gt_", "").replace(".txt", "") \
+                    if label_file.startswith("rec_gt_") else "raw"
+                yield dataset_idx, split, label_file, line_no, image_path, label
+
+    def _add(self, sample: Tuple, value: Optional[int]):
+        """เพิ่มภาพ: hash ซ้ำเป๊ะรวม cluster ทันที, hash ใหม่เข้า index"""
+        sample_id = self.clusters.add()
+        self.samples.append(sample)
+        self.sample_hashes.append(value or 0)
+        self.stats["images"] += 1
+
+        if value is None:
+            self.unreadable.add(sample_id)
+            self.stats["unreadable"] += 1
+            return
+
+        first = self._exact.get(value)
+        if first is not None:
+            self.clusters.union(first, sample_id)
+            return
+        self._exact[value] = sample_id
+
+        self.index.add(value)
+        self._unique_owner.append(sample_id)
+        self.stats["unique_hashes"] += 1
+
+    def link_near_duplicates(self):
+        """หาคู่ hash ที่ใกล้กันจาก index ครั้งเดียว แล้วรวม cluster"""
+        ids_a, ids_b, _ = self.index.pairs()
+        owner = self._unique_owner
+        for a, b in zip(ids_a.tolist(), ids_b.tolist()):
+            self.clusters.union(owner[a], owner[b])
+        self.stats["near_pairs"] = len(ids_a)
+
+    def run(self) -> Dict:
+        """hash ทุกภาพ แล้วสร้าง cluster"""
+        print(f"🧬 Hashing {len(self.dataset_dirs)} dataset(s) with {self.method} "
+              f"(max distance {self.max_distance}/64, {self.workers} workers)")
+        started = time.perf_counter()
+
+        pending = {}
+        chunk = []
+        in_flight = deque()
+        max_in_flight = self.workers * 2
+
+        def collect(future):
+            for path, value in future.result():
+                for sample in pending.pop(path):
+                    self._add(sample, value)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit(paths):
+                in_flight.append(executor.submit(hash_images, paths, self.method))
+                while len(in_flight) >= max_in_flight:
+                    collect(in_flight.popleft())
+
+            for sample in self._iter_samples():
+                image_path = sample[4]
+                if image_path in pending:
+                    pending[image_path].append(sample)
+                    continue
+                pending[image_path] = [sample]
+                chunk.append(image_path)
+                if len(chunk) >= self.chunk_size:
+                    submit(chunk)
+                    chunk = []
+
+            if chunk:
+                submit(chunk)
+            while in_flight:
+                collect(in_flight.popleft())
+
+        self.link_near_duplicates()
+        elapsed = time.perf_counter() - started
+        self.stats["elapsed_seconds"] = round(elapsed, 3)
+        self.stats["images_per_sec"] = round(self.stats["images"] / max(elapsed, 1e-9), 1)
+        return self.build_report()
+
+    def duplicate_groups(self) -> List[List[int]]:
+        """cluster ที่มีมากกว่า 1 ภาพ (sample id เรียงตามลำดับที่พบ)"""
+        groups = {}
+        for sample_id in range(len(self.samples)):
+            if sample_id in self.unreadable:
+                continue
+            groups.setdefault(self.clusters.find(sample_id), []).append(sample_id)
+        return [members for members in groups.values() if len(members) > 1]
+
+    def build_report(self) -> Dict:
+        """สรุป cluster และจำนวน sample ที่รั่ว/ซ้ำ"""
+        clusters = []
+        summary = {"duplicate_clusters": 0, "duplicate_images": 0, "leakage_clusters": 0,
+                   "leaked_val_images": 0, "cross_dataset_clusters": 0, "label_conflict_clusters": 0}
+
+        for members in self.duplicate_groups():
+            samples = [self.samples[i] for i in members]
+            splits_by_dataset = {}
+            for dataset_idx, split, *_ in samples:
+                splits_by_dataset.setdefault(dataset_idx, set()).add(split)
+            leakage = any({"train", "val"} <= splits for splits in splits_by_dataset.values())
+            cross_dataset = len(splits_by_dataset) > 1
+            labels = sorted({s[5] for s in samples})
+
+            summary["duplicate_clusters"] += 1
+            summary["duplicate_images"] += len(members) - 1
+            if leakage:
+                summary["leakage_clusters"] += 1
+                summary["leaked_val_images"] += sum(1 for s in samples if s[1] == "val")
+            summary["cross_dataset_clusters"] += int(cross_dataset)
+            summary["label_conflict_clusters"] += int(len(labels) > 1)
+
+            clusters.append({
+                "size": len(members),
+                "leakage": leakage,
+                "cross_dataset": cross_dataset,
+                "labels": labels,
+                "members": [{"dataset": str(self.dataset_dirs[s[0]]), "split": s[1],
+                             "image": s[4], "label": s[5],
+                             "distance": _popcount(self.sample_hashes[i] ^ self.sample_hashes[members[0]])}
+                            for i, s in zip(members, samples)]
+            })
+
+        clusters.sort(key=lambda c: (not c["leakage"], not c["cross_dataset"], -c["size"]))
+        return {
+            "datasets": [str(d) for d in self.dataset_dirs],
+            "method": self.method,
+            "max_distance": self.max_distance,
+            "summary": {**self.stats, **summary},
+            "clusters": clusters
+        }
+
+    def samples_to_remove(self, mode: str = "leakage") -> List[int]:
+        """sample id ที่จะลบออกจาก label files
+
+        leakage: ลบภาพ val ที่ซ้ำกับ train ของ dataset เดียวกัน
+                 และภาพที่ซ้ำกับ dataset ก่อนหน้า (dataset แรกเก็บไว้)
+        all:     เก็บภาพแรกของแต่ละ cluster ลบที่เหลือทั้งหมด
+        """
+        if mode not in REMOVE_MODES:
+            raise ValueError(f"mode must be one of {REMOVE_MODES}, got {mode!r}")
+
+        remove = []
+        for members in self.duplicate_groups():
+            if mode == "all":
+                remove.extend(members[1:])
+                continue
+            first_dataset = min(self.samples[i][0] for i in members)
+            train_datasets = {self.samples[i][0] for i in members if self.samples[i][1] == "train"}
+            for i in members:
+                dataset_idx, split = self.samples[i][:2]
+                if dataset_idx != first_dataset or (split == "val" and dataset_idx in train_datasets):
+                    remove.append(i)
+        return remove
+
+    def remove_from_label_files(self, sample_ids: List[int]) -> Dict[str, int]:
+        """ลบบรรทัดของ sample ออกจาก label files (เขียน .tmp แล้ว os.replace)
+
+        ไฟล์ภาพไม่ถูกลบ: label file เป็นตัวกำหนดว่า sample ไหนถูกใช้
+        """
+        lines_by_file = {}
+        for i in sample_ids:
+            dataset_idx, split, label_file, line_no, *_ = self.samples[i]
+            if self.layouts[dataset_idx] == "raw":
+                path = self.dataset_dirs[dataset_idx] / label_file
+            else:
+                path = self.dataset_dirs[dataset_idx] / "train_data" / "rec" / label_file
+            lines_by_file.setdefault(path, set()).add(line_no)
+
+        removed = {}
+        for path, line_numbers in lines_by_file.items():
+            tmp_path = f"{path}.tmp"
+            with open(path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+                for line_no, line in enumerate(src, 1):
+                    if line_no not in line_numbers:
+                        dst.write(line)
+            os.replace(tmp_path, path)
+            removed[str(path)] = len(line_numbers)
+            print(f"🗑️ Removed {len(line_numbers):,} lines from {path}")
+        return removed
+
+
+def print_summary(report: Dict):
+    """แสดงผลสรุป"""
+    s = report["summary"]
+    print(f"✅ Hashed {s['images']:,} images in {s['elapsed_seconds']:.1f}s "
+          f"({s['images_per_sec']:,.0f} images/sec), {s['unique_hashes']:,} unique hashes")
+    if s["unreadable"]:
+        print(f"⚠️ Unreadable images: {s['unreadable']:,}")
+    print(f"🧬 Duplicate clusters: {s['duplicate_clusters']:,} ({s['duplicate_images']:,} redundant images)")
+    print(f"  • Train/val leakage: {s['leakage_clusters']:,} clusters, {s['leaked_val_images']:,} val images")
+    print(f"  • Cross-dataset: {s['cross_dataset_clusters']:,} clusters")
+    print(f"  • Label conflicts: {s['label_conflict_clusters']:,} clusters")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🧬 Find near-duplicate images and train/val leakage")
+    parser.add_argument("dataset_dirs", type=str, nargs="*",
+                       help="Raw (images/ + labels.txt) or converted dataset directories")
+    parser.add_argument("--method", type=str, default="dhash", choices=HASH_METHODS,
+                       help="Perceptual hash (default: dhash)")
+    parser.add_argument("--max-distance", type=int, default=4,
+                       help="Max Hamming distance (out of 64 bits) to count as near-duplicate (default: 4)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Worker processes (default: CPU count)")
+    parser.add_argument("--remove", type=str, default=None, choices=REMOVE_MODES,
+                       help="Drop duplicates from the label files: leakage (val copies of train images and "
+                            "copies of earlier datasets) or all (keep one image per cluster)")
+    parser.add_argument("--report", type=str, default=None,
+                       help=f"Report path (default: <first dataset>/{REPORT_FILE})")
+
+    parser.add_argument("--benchmark", type=int, default=0,
+                       help="Time the near-duplicate search on N synthetic hashes (and N/100, N/10)")
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for size in (args.benchmark // 100, args.benchmark // 10, args.benchmark):
+            if size < 2:
+                continue
+            result = benchmark_index(size, args.max_distance)
+            print(f"⏱️ {result['hashes']:>10,} hashes: {result['seconds']:.2f}s, {result['pairs']:,} pairs "
+                  f"({result['chunks']} chunks, radius {result['chunk_radius']})")
+        return
+    if not args.dataset_dirs:
+        parser.error("dataset_dirs or --benchmark is required")
+
+    for dataset_dir in args.dataset_dirs:
+        if not Path(dataset_dir).exists():
+            print(f"❌ Dataset directory not found: {dataset_dir}")
+            sys.exit(1)
+
+    dedup = DatasetDeduplicator(args.dataset_dirs, args.method, args.max_distance, args.workers)
+    report = dedup.run()
+    print_summary(report)
+
+    if args.remove:
+        report["removed"] = dedup.remove_from_label_files(dedup.samples_to_remove(args.remove))
+
+    report_path = Path(args.report) if args.report else Path(args.dataset_dirs[0]) / REPORT_FILE
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 Dedup report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🩺 Dataset Integrity Checker
+ตรวจ dataset ก่อนส่งขึ้น SageMaker: ภาพเสีย, ขนาดผิด, จำนวน channel ผิด, label นอก dictionary
+
+รองรับ 2 layout:
+    raw        -> images/ + labels.txt (+ dataset_details.json)
+    converted  -> train_data/rec/rec_gt_{train,val}.txt + thai_data/
+
+อ่าน label แบบ streaming และตรวจภาพใน process pool (ส่งงานเป็น chunk
+จำกัดจำนวนงานค้าง เพื่อให้หน่วยความจำคงที่แม้มีภาพหลายแสนภาพ)
+
+ใช้งาน:
+    python dataset_integrity_checker.py <dataset_dir>
+    python dataset_integrity_checker.py <dataset_dir> --header-only --expected-size 128x96
+"""
+
+import os
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+REPORT_FILE = "integrity_report.json"
+
+# PIL mode -> จำนวน channel
+MODE_CHANNELS = {"1": 1, "L": 1, "P": 1, "I": 1, "F": 1, "I;16": 1,
+                 "LA": 2, "RGB": 3, "YCbCr": 3, "LAB": 3, "HSV": 3,
+                 "RGBA": 4, "CMYK": 4}
+
+# ค่าเดียวกับ Global.max_text_length ใน config ของโปรเจค
+DEFAULT_MAX_TEXT_LENGTH = 25
+
+# ปัญหาของตัวภาพ (ไฟล์ใช้ไม่ได้) - ที่เหลือเป็นปัญหาของ label / บรรทัดใน label file
+IMAGE_ISSUES = {"missing", "corrupt", "size", "channels"}
+
+
+def load_dictionary(dict_path: Path, use_space_char: bool = True):
+    """โหลด character dictionary แบบ compiled (sidecar .trie ดู compiled_dictionary.py)
+
+    PaddleOCR encode label ทีละ character: entry ที่ยาวเกิน 1 ตัวจะไม่มีวัน match
+    """
+    from compiled_dictionary import CompiledDictionary
+    return CompiledDictionary(dict_path, use_space_char)
+
+
+def check_label(label: str, dictionary,
+                max_text_length: int = DEFAULT_MAX_TEXT_LENGTH) -> List[str]:
+    """ตรวจ label ตามพฤติกรรมของ CTCLabelEncode
+
+    - ตัวอักษรที่ไม่อยู่ใน dictionary จะถูกตัดทิ้งเงียบ ๆ ตอน train
+    - label ที่ encode แล้วว่าง หรือยาวเกิน max_text_length จะทำให้ sample ถูกทิ้ง
+    """
+    issues = []
+    if not label:
+        return ["empty_label"]
+    if len(label) > max_text_length:
+        issues.append("label_too_long")
+    unknown = dictionary.unknown_chars(label)
+    if unknown:
+        if len(unknown) == len(set(label)):
+            issues.append("label_unencodable")
+        issues.append("unknown_chars:" + "".join(unknown))
+    return issues
+
+
+def check_images(paths: List[str], expected_size: Optional[Tuple[int, int]] = None,
+                 expected_channels: Optional[int] = None,
+                 decode: bool = True) -> List[Tuple[str, List[str], Optional[List[int]], Optional[str]]]:
+    """ตรวจภาพ 1 chunk (รันใน worker process)
+
+    Returns:
+        [(path, issues, [width, height], mode), ...]
+    """
+    from PIL import Image
+
+    results = []
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                size = list(img.size)
+                mode = img.mode
+                if decode:
+                    # decode ทั้งภาพ: จับไฟล์ที่ถูกตัดท้าย / ข้อมูลเสียกลางไฟล์
+                    img.load()
+        except FileNotFoundError:
+            results.append((path, ["missing"], None, None))
+            continue
+        except Exception as e:
+            results.append((path, [f"corrupt:{type(e).__name__}"], None, None))
+            continue
+
+        issues = []
+        if expected_size and tuple(size) != tuple(expected_size):
+            issues.append(f"size:{size[0]}x{size[1]}")
+        if expected_channels and MODE_CHANNELS.get(mode) != expected_channels:
+            issues.append(f"channels:{mode}")
+        results.append((path, issues, size, mode))
+    return results
+
+
+def detect_layout(dataset_dir: Path) -> str:
+    """raw (images/ + labels.txt) หรือ converted (train_data/rec/)"""
+    dataset_dir = Path(dataset_dir)
+    if (dataset_dir / "labels.txt").exists():
+        return "raw"
+    if (dataset_dir / "train_data" / "rec").exists():
+        return "converted"
+    raise FileNotFoundError(f"Not a raw or converted dataset: {dataset_dir}")
+
+
+def label_file_paths(dataset_dir: Path, layout: str) -> List[Tuple[Path, Path, bool]]:
+    """label files ของ dataset: [(label_file, image_root, flat), ...]
+
+    flat = ใช้แค่ชื่อไฟล์ใน label (labels.txt ของ raw dataset)
+    """
+    dataset_dir = Path(dataset_dir)
+    if layout == "raw":
+        return [(dataset_dir / "labels.txt", dataset_dir / "images", True)]
+    # overlay dataset: label อยู่ที่นี่ แต่ภาพอยู่ใน dataset ต้นทาง
+    from overlay_dataset import resolve_image_root
+    rec_dir = dataset_dir / "train_data" / "rec"
+    image_root = resolve_image_root(dataset_dir)
+    return [(rec_dir / f"rec_gt_{split}.txt", image_root, False)
+            for split in ["train", "val"]
+            if (rec_dir / f"rec_gt_{split}.txt").exists()]
+
+
+def iter_label_samples(dataset_dir: Path, layout: str) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+    """อ่าน label files แบบ streaming
+
+    Yields:
+        (label_file, line_no, image_path, label) โดย label = None ถ้าบรรทัดผิด format
+    """
+    for label_file, image_root, flat in label_file_paths(dataset_dir, layout):
+        with open(label_file, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.rstrip('\r\n')
+                if not line.strip():
+                    continue
+                if '\t' not in line:
+                    yield label_file.name, line_no, "", None
+                    continue
+                rel_path, label = line.split('\t', 1)
+                image_path = image_root / (Path(rel_path).name if flat else rel_path)
+                yield label_file.name, line_no, str(image_path), label
+
+
+class DatasetIntegrityChecker:
+    """🩺 ตรวจความสมบูรณ์ของ dataset ด้วย process pool"""
+
+    def __init__(self, dataset_dir: str, dict_path: str = None,
+                 expected_size: Tuple[int, int] = None, expected_channels: int = None,
+                 decode: bool = True, workers: int = None, chunk_size: int = 256,
+                 max_text_length: int = DEFAULT_MAX_TEXT_LENGTH):
+        """
+        Args:
+            dataset_dir: raw dataset หรือ converted dataset
+            dict_path: th_dict.txt (default: ของ dataset หรือ thai-letters/th_dict.txt)
+            expected_size: (width, height) ที่คาดหวัง (default: จาก dataset_details.json ถ้ามี)
+            expected_channels: จำนวน channel ที่คาดหวัง (None = ไม่ตรวจ)
+            decode: decode ทั้งภาพ (False = อ่านแค่ header เร็วกว่าแต่จับไฟล์ถูกตัดท้ายไม่ได้)
+            workers: จำนวน process (default: CPU count)
+            chunk_size: จำนวนภาพต่อ 1 งานของ worker
+            max_text_length: ความยาว label สูงสุด (Global.max_text_length)
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.layout = detect_layout(self.dataset_dir)
+        self.dict_path = Path(dict_path) if dict_path else self._find_dictionary()
+        self.dictionary = load_dictionary(self.dict_path) if self.dict_path else None
+        self.expected_size = tuple(expected_size) if expected_size else self._details_image_size()
+        self.expected_channels = expected_channels
+        self.decode = decode
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_text_length = max_text_length
+
+        self.bad_samples = []
+        self.stats = {
+            "total": 0,
+            "bad": 0,
+            "issues": {},
+            "sizes": {},
+            "modes": {},
+            "duplicate_entries": 0
+        }
+
+    def _find_dictionary(self) -> Optional[Path]:
+        """หา th_dict.txt ของ dataset ก่อน แล้วค่อยใช้ของ thai-letters/"""
+        candidates = [
+            self.dataset_dir / "train_data" / "th_dict.txt",
+            self.dataset_dir / "th_dict.txt",
+            Path(__file__).parent / "th_dict.txt"
+        ]
+        for path in candidates:
+            if path.exists():
+                return path
+        return None
+
+    def _details_image_size(self) -> Optional[Tuple[int, int]]:
+        """อ่าน image_size จาก dataset_details.json ของ generator"""
+        details_file = self.dataset_dir / "dataset_details.json"
+        if not details_file.exists():
+            return None
+        try:
+            with open(details_file, 'r', encoding='utf-8') as f:
+                size = json.load(f).get("configuration", {}).get("image_size")
+            return tuple(size) if size else None
+        except (ValueError, AttributeError):
+            return None
+
+    def iter_samples(self) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+        """อ่าน label files แบบ streaming (ดู iter_label_samples)"""
+        return iter_label_samples(self.dataset_dir, self.layout)
+
+    def _record(self, sample: Dict, issues: List[str]):
+        """เก็บผลของ 1 sample"""
+        self.stats["total"] += 1
+        if not issues:
+            return
+        self.stats["bad"] += 1
+        for issue in issues:
+            kind = issue.split(":", 1)[0]
+            self.stats["issues"][kind] = self.stats["issues"].get(kind, 0) + 1
+        self.bad_samples.append({**sample, "issues": issues})
+
+    def run(self) -> Dict:
+        """ตรวจทั้ง dataset
+
+        Returns:
+            report dict (ดู write_report)
+        """
+        print(f"🩺 Checking {self.layout} dataset: {self.dataset_dir}")
+        print(f"  📚 Dictionary: {self.dict_path or 'not found (labels not checked)'}")
+        print(f"  📐 Expected size: {self.expected_size or 'any'} | "
+              f"Channels: {self.expected_channels or 'any'} | "
+              f"{'Full decode' if self.decode else 'Header only'} | Workers: {self.workers}")
+
+        started = time.perf_counter()
+        seen = set()
+        pending = {}
+        chunk = []
+        in_flight = deque()
+        max_in_flight = self.workers * 2
+
+        def collect(future):
+            for path, image_issues, size, mode in future.result():
+                sample, label_issues = pending.pop(path)
+                if size:
+                    key = f"{size[0]}x{size[1]}"
+                    self.stats["sizes"][key] = self.stats["sizes"].get(key, 0) + 1
+                    self.stats["modes"][mode] = self.stats["modes"].get(mode, 0) + 1
+                self._record(sample, label_issues + image_issues)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit(paths):
+                in_flight.append(executor.submit(check_images, paths, self.expected_size,
+                                                 self.expected_channels, self.decode))
+                while len(in_flight) >= max_in_flight:
+                    collect(in_flight.popleft())
+
+            for label_file, line_no, image_path, label in self.iter_samples():
+                sample = {"label_file": label_file, "line": line_no, "image": image_path, "label": label}
+                if label is None:
+                    self._record(sample, ["bad_format"])
+                    continue
+
+                label_issues = []
+                if self.dictionary is not None:
+                    label_issues = check_label(label, self.dictionary, self.max_text_length)
+
+                if image_path in seen or image_path in pending:
+                    # ภาพเดียวกันถูกอ้างซ้ำ: ตรวจ label อย่างเดียว
+                    self.stats["duplicate_entries"] += 1
+                    self._record(sample, label_issues + ["duplicate_entry"])
+                    continue
+                seen.add(image_path)
+
+                pending[image_path] = (sample, label_issues)
+                chunk.append(image_path)
+                if len(chunk) >= self.chunk_size:
+                    submit(chunk)
+                    chunk = []
+
+            if chunk:
+                submit(chunk)
+            while in_flight:
+                collect(in_flight.popleft())
+
+        elapsed = time.perf_counter() - started
+        self.stats["elapsed_seconds"] = round(elapsed, 3)
+        self.stats["images_per_sec"] = round(self.stats["total"] / max(elapsed, 1e-9), 1)
+        self.bad_samples.sort(key=lambda s: (s["label_file"], s["line"]))
+
+        return self.build_report()
+
+    def build_report(self) -> Dict:
+        """รวม config, สถิติ และรายการ sample ที่มีปัญหา"""
+        return {
+            "dataset": str(self.dataset_dir),
+            "layout": self.layout,
+            "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {
+                "dictionary": str(self.dict_path) if self.dict_path else None,
+                "expected_size": list(self.expected_size) if self.expected_size else None,
+                "expected_channels": self.expected_channels,
+                "decode": self.decode,
+                "max_text_length": self.max_text_length
+            },
+            "summary": self.stats,
+            "bad_samples": self.bad_samples
+        }
+
+    def bad_image_names(self) -> Set[str]:
+        """ชื่อไฟล์ภาพที่ตัวภาพมีปัญหา (ใช้กรองตอนแปลง dataset)
+
+        ไม่รวม sample ที่มีแค่ปัญหาของ label หรือบรรทัดซ้ำ: ภาพยังใช้ได้ (ดู label_issue_samples)
+        """
+        return {Path(s["image"]).name for s in self.bad_samples
+                if s["image"] and any(issue.split(":", 1)[0] in IMAGE_ISSUES for issue in s["issues"])}
+
+    def label_issue_samples(self) -> List[Dict]:
+        """sample ที่ภาพปกติแต่ label มีปัญหา (ตัวอักษรนอก dictionary, ยาวเกิน, บรรทัดซ้ำ, ...)"""
+        return [s for s in self.bad_samples
+                if not any(issue.split(":", 1)[0] in IMAGE_ISSUES for issue in s["issues"])]
+
+    def print_summary(self):
+        """แสดงผลสรุป"""
+        s = self.stats
+        print(f"✅ Checked {s['total']:,} samples in {s.get('elapsed_seconds', 0):.1f}s "
+              f"({s.get('images_per_sec', 0):,.0f} samples/sec)")
+        if s["sizes"]:
+            top_sizes = sorted(s["sizes"].items(), key=lambda x: -x[1])[:3]
+            print(f"  📐 Sizes: " + ", ".join(f"{k} ({v:,})" for k, v in top_sizes))
+        if s["bad"]:
+            print(f"❌ Bad samples: {s['bad']:,}")
+            for kind, count in sorted(s["issues"].items(), key=lambda x: -x[1]):
+                print(f"  • {kind}: {count:,}")
+        else:
+            print("🎉 No problems found")
+
+    def write_report(self, report_path: Path = None) -> Path:
+        """บันทึก report เป็น JSON (default: <dataset>/integrity_report.json)"""
+        report_path = Path(report_path) if report_path else self.dataset_dir / REPORT_FILE
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(self.build_report(), f, ensure_ascii=False, indent=2)
+        print(f"📄 Integrity report: {report_path}")
+        return report_path
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    """'128x96' -> (128, 96)"""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🩺 Check a Thai OCR dataset for corrupt images and bad labels")
+    parser.add_argument("dataset_dir", type=str,
+                       help="Raw dataset (images/ + labels.txt) or converted dataset directory")
+    parser.add_argument("--dict", type=str, default=None,
+                       help="Character dictionary (default: dataset's th_dict.txt, then thai-letters/th_dict.txt)")
+    parser.add_argument("--expected-size", type=_parse_size, default=None,
+                       help="Expected image size WxH (default: image_size from dataset_details.json)")
+    parser.add_argument("--channels", type=int, default=None,
+                       help="Expected channel count, e.g. 3 for RGB (default: not checked)")
+    parser.add_argument("--header-only", action="store_true",
+                       help="Only parse image headers (faster, misses truncated files)")
+    parser.add_argument("--max-text-length", type=int, default=DEFAULT_MAX_TEXT_LENGTH,
+                       help=f"Global.max_text_length of the training config (default: {DEFAULT_MAX_TEXT_LENGTH})")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", type=str, default=None,
+                       help=f"Report path (default: <dataset_dir>/{REPORT_FILE})")
+
+    args = parser.parse_args()
+
+    if not Path(args.dataset_dir).exists():
+        print(f"❌ Dataset directory not found: {args.dataset_dir}")
+        sys.exit(1)
+
+    checker = DatasetIntegrityChecker(
+        dataset_dir=args.dataset_dir,
+        dict_path=args.dict,
+        expected_size=args.expected_size,
+        expected_channels=args.channels,
+        decode=not args.header_only,
+        workers=args.workers,
+        max_text_length=args.max_text_length
+    )
+    checker.run()
+    checker.print_summary()
+    checker.write_report(args.report)
+
+    sys.exit(1 if checker.stats["bad"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 Label Coverage Analyzer
+อ่าน rec_gt_*.txt และ labels.txt ทุกไฟล์ใต้ datasets/ แบบขนาน แล้วตัดคำด้วย compiled dictionary:
+
+    - coverage  : entry ใน dictionary ที่ไม่เคยปรากฏใน label เลย
+    - OOV       : codepoint ที่ไม่อยู่ใน dictionary + ตัวอย่าง label
+    - histogram : จำนวนต่อ entry แยกตาม dataset/split + ความเบ้ของ class distribution
+
+ไฟล์ใหญ่ถูกแบ่งเป็นช่วง byte (chunk) ให้ worker process อ่านเอง
+แต่ละ chunk คืน numpy bincount แล้วรวมกันที่ process หลัก (หน่วยความจำคงที่)
+
+ใช้งาน:
+    python label_coverage_analyzer.py
+    python label_coverage_analyzer.py datasets/converted --mode ctc --report coverage.json
+"""
+
+import os
+import sys
+import re
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+from compiled_dictionary import CompiledDictionary
+
+REPORT_FILE = "label_coverage_report.json"
+MODES = ["greedy", "ctc"]
+LABEL_FILE_PATTERNS = ["rec_gt_*.txt", "labels.txt"]
+MAX_OOV_EXAMPLES = 20
+MAX_LABEL_LENGTH = 64   # histogram ความยาว label (หน่วย) ตัดที่ค่านี้
+
+_LABEL_RE = re.compile(r"^[^\t\n]*\t([^\r\n]*)", re.MULTILINE)
+
+# dictionary ของแต่ละ worker process (เปิดครั้งเดียวต่อ process)
+_DICTIONARIES = {}
+
+
+def _dictionary(dict_path: str, use_space_char: bool) -> CompiledDictionary:
+    key = (dict_path, use_space_char)
+    if key not in _DICTIONARIES:
+        _DICTIONARIES[key] = CompiledDictionary(dict_path, use_space_char)
+    return _DICTIONARIES[key]
+
+
+def _dataset_name(directory: Path, root: Path) -> str:
+    """ชื่อ dataset = path ของโฟลเดอร์เทียบกับ root (ชื่อโฟลเดอร์ซ้ำกันใต้ parent ต่างกันจึงไม่ถูกรวม)"""
+    relative = directory.relative_to(root)
+    return relative.as_posix() if relative.parts else root.resolve().name
+
+
+def find_label_files(root: Path) -> List[Tuple[Path, str, str]]:
+    """label files ทั้งหมดใต้ root: [(path, dataset, split), ...]
+
+    rec_gt_<split>.txt -> dataset = โฟลเดอร์เหนือ train_data/ (เทียบกับ root), split = <split>
+    labels.txt         -> dataset = โฟลเดอร์ของไฟล์ (เทียบกับ root), split = raw
+    """
+    root = Path(root)
+    found = []
+    for pattern in LABEL_FILE_PATTERNS:
+        for path in sorted(root.rglob(pattern)):
+            if path.name == "labels.txt":
+                found.append((path, _dataset_name(path.parent, root), "raw"))
+            else:
+                split = path.stem[len("rec_gt_"):]
+                directory = path.parents[2] if path.parent.name == "rec" else path.parent
+                found.append((path, _dataset_name(directory, root), split))
+    return found
+
+
+def split_ranges(path: Path, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """แบ่งไฟล์เป็นช่วง byte (worker ปรับขอบเองให้ตรงต้นบรรทัด)"""
+    size = path.stat().st_size
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)] or [(0, 0)]
+
+
+def _read_labels(path: str, start: int, end: int) -> List[str]:
+    """label ของบรรทัดที่ *เริ่ม* ในช่วง [start, end)"""
+    with open(path, 'rb') as f:
+        if start:
+            # บรรทัดที่คาบเกี่ยว start เป็นของ chunk ก่อนหน้า
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        data = f.read(max(end - position, 0)) if position < end else b""
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+    # label = ทุกอย่างหลัง tab แรก (บรรทัดที่ไม่มี tab ถูกข้าม)
+    return _LABEL_RE.findall(data.decode('utf-8', errors='replace'))
+
+
+def analyze_chunk(path: str, start: int, end: int, dict_path: str,
+                  use_space_char: bool = False, mode: str = "greedy") -> Dict:
+    """ตัดคำ label 1 chunk (รันใน worker process)
+
+    Returns:
+        {"labels", "units", "counts" (int64[entries]), "oov": {codepoint: count},
+         "oov_labels", "oov_examples", "lengths" (int64[MAX_LABEL_LENGTH + 1])}
+    """
+    dictionary = _dictionary(dict_path, use_space_char)
+    labels = _read_labels(path, start, end)
+    tokens = dictionary.encode_batch(labels, greedy=(mode == "greedy"))
+
+    known = tokens.ids >= 0
+    counts = np.bincount(tokens.ids[known], minlength=len(dictionary)).astype(np.int64)
+
+    oov_cps, oov_counts = np.unique(tokens.codepoints[~known], return_counts=True)
+    # label ที่มี OOV: นับจากตำแหน่งหน่วย OOV -> label ผ่าน offsets
+    oov_label_ids = np.unique(np.searchsorted(tokens.offsets, np.nonzero(~known)[0], side='right') - 1)
+
+    unit_lengths = np.minimum(np.diff(tokens.offsets), MAX_LABEL_LENGTH)
+    return {
+        "labels": len(labels),
+        "units": int(len(tokens.ids)),
+        "counts": counts,
+        "oov": dict(zip(oov_cps.tolist(), oov_counts.tolist())),
+        "oov_labels": int(len(oov_label_ids)),
+        "oov_examples": [labels[i] for i in oov_label_ids[:MAX_OOV_EXAMPLES].tolist()],
+        "lengths": np.bincount(unit_lengths, minlength=MAX_LABEL_LENGTH + 1).astype(np.int64)
+    }
+
+
+def distribution_stats(counts: np.ndarray) -> Dict:
+    """ความเบ้ของ class distribution (เฉพาะ entry ที่ปรากฏ)"""
+    used = np.sort(counts[counts > 0]).astype(np.float64)
+    if not len(used):
+        return {"classes": 0}
+    total = used.sum()
+    p = used / total
+    # Gini: 0 = เท่ากันทุก class, เข้าใกล้ 1 = กระจุกที่ไม่กี่ class
+    ranks = np.arange(1, len(used) + 1)
+    gini = float((2 * ranks - len(used) - 1).dot(used) / (len(used) * total))
+    entropy = float(-(p * np.log2(p)).sum())
+    return {
+        "classes": int(len(used)),
+        "max": int(used[-1]),
+        "min": int(used[0]),
+        "median": float(np.median(used)),
+        "imbalance_ratio": round(float(used[-1] / used[0]), 2),
+        "gini": round(gini, 4),
+        "normalized_entropy": round(entropy / np.log2(len(used)), 4) if len(used) > 1 else 1.0
+    }
+
+
+class LabelCoverageAnalyzer:
+    """📊 coverage / OOV / histogram ของ label ทุกไฟล์เทียบกับ dictionary"""
+
+    def __init__(self, root: Path, dict_path: Path = None, mode: str = "greedy",
+                 use_space_char: bool = False, workers: int = None, chunk_bytes: int = 8 << 20):
+        """
+        Args:
+            root: โฟลเดอร์ที่มี dataset (ค้นหา label files แบบ recursive)
+            dict_path: th_dict.txt (default: thai-letters/th_dict.txt)
+            mode: greedy = longest match ของ dictionary, ctc = ทีละ codepoint แบบ CTCLabelEncode
+            chunk_bytes: ขนาดช่วงของไฟล์ต่อ 1 งาน
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.dict_path = Path(dict_path) if dict_path else Path(__file__).parent / "th_dict.txt"
+        self.mode = mode
+        self.use_space_char = use_space_char
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+
+        self.dictionary = CompiledDictionary(self.dict_path, use_space_char)
+        self.groups = {}     # "dataset:split" -> สถิติรวม
+        self.files = []
+        self.oov = {}
+        self.oov_examples = []
+        self.elapsed = 0.0
+
+    def _group(self, key: str) -> Dict:
+        if key not in self.groups:
+            self.groups[key] = {
+                "labels": 0, "units": 0, "oov_labels": 0,
+                "counts": np.zeros(len(self.dictionary), dtype=np.int64),
+                "lengths": np.zeros(MAX_LABEL_LENGTH + 1, dtype=np.int64)
+            }
+        return self.groups[key]
+
+    def _merge(self, key: str, result: Dict):
+        group = self._group(key)
+        for field in ["labels", "units", "oov_labels"]:
+            group[field] += result[field]
+        group["counts"] += result["counts"]
+        group["lengths"] += result["lengths"]
+        for cp, count in result["oov"].items():
+            self.oov[cp] = self.oov.get(cp, 0) + count
+        room = MAX_OOV_EXAMPLES - len(self.oov_examples)
+        if room > 0:
+            self.oov_examples.extend(result["oov_examples"][:room])
+
+    def run(self) -> Dict:
+        """อ่านทุก label file แบบขนาน"""
+        started = time.perf_counter()
+        label_files = find_label_files(self.root)
+        print(f"📊 {len(label_files)} label files under {self.root} | Mode: {self.mode} | Workers: {self.workers}")
+
+        max_in_flight = self.workers * 4
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for path, dataset, split in label_files:
+                key = f"{dataset}:{split}"
+                self.files.append({"path": str(path), "dataset": dataset, "split": split,
+                                   "bytes": path.stat().st_size})
+                for start, end in split_ranges(path, self.chunk_bytes):
+                    in_flight.append((key, executor.submit(analyze_chunk, str(path), start, end,
+                                                           str(self.dict_path), self.use_space_char,
+                                                           self.mode)))
+                    while len(in_flight) >= max_in_flight:
+                        key_done, future = in_flight.popleft()
+                        self._merge(key_done, future.result())
+            while in_flight:
+                key_done, future = in_flight.popleft()
+                self._merge(key_done, future.result())
+
+        self.elapsed = time.perf_counter() - started
+        return self.build_report()
+
+    def total_counts(self) -> np.ndarray:
+        total = np.zeros(len(self.dictionary), dtype=np.int64)
+        for group in self.groups.values():
+            total += group["counts"]
+        return total
+
+    def _histogram(self, counts: np.ndarray) -> Dict[str, int]:
+        ids = np.nonzero(counts)[0]
+        ids = ids[np.argsort(-counts[ids], kind='stable')]
+        return {self.dictionary.unit(int(i)): int(counts[i]) for i in ids}
+
+    def build_report(self) -> Dict:
+        """รวมผลเป็น dict (JSON)"""
+        total = self.total_counts()
+        units = self.dictionary.units
+        matchable = np.array([bool(u) for u in units])
+        unused = [units[i] for i in np.nonzero(matchable & (total == 0))[0]]
+        labels = sum(g["labels"] for g in self.groups.values())
+
+        return {
+            "root": str(self.root),
+            "dictionary": str(self.dict_path),
+            "mode": self.mode,
+            "entries": int(matchable.sum()),
+            "labels": labels,
+            "units": sum(g["units"] for g in self.groups.values()),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "labels_per_sec": round(labels / max(self.elapsed, 1e-9), 1),
+            "files": self.files,
+            "coverage": {
+                "used_entries": int((matchable & (total > 0)).sum()),
+                "ratio": round(float((matchable & (total > 0)).sum() / max(matchable.sum(), 1)), 4),
+                "unused_entries": unused
+            },
+            "oov": {
+                "labels_with_oov": sum(g["oov_labels"] for g in self.groups.values()),
+                "codepoints": [{"char": chr(cp), "codepoint": f"U+{cp:04X}", "count": count}
+                               for cp, count in sorted(self.oov.items(), key=lambda x: -x[1])],
+                "examples": self.oov_examples
+            },
+            "distribution": distribution_stats(total[matchable]),
+            "splits": {
+                key: {
+                    "labels": g["labels"],
+                    "units": g["units"],
+                    "labels_with_oov": g["oov_labels"],
+                    "distribution": distribution_stats(g["counts"][matchable]),
+                    "label_length_histogram": np.trim_zeros(g["lengths"], 'b').tolist(),
+                    "histogram": self._histogram(g["counts"])
+                }
+                for key, g in sorted(self.groups.items())
+            }
+        }
+
+    def print_summary(self, report: Dict):
+        """แสดงผลสรุป"""
+        print(f"✅ {report['labels']:,} labels / {report['units']:,} units in {report['elapsed_seconds']:.1f}s "
+              f"({report['labels_per_sec']:,.0f} labels/sec)")
+        coverage = report["coverage"]
+        print(f"  📚 Coverage: {coverage['used_entries']:,}/{report['entries']:,} entries "
+              f"({coverage['ratio'] * 100:.1f}%), {len(coverage['unused_entries']):,} never used")
+        oov = report["oov"]
+        if oov["codepoints"]:
+            top = ", ".join(f"{c['char']!r} {c['codepoint']} ({c['count']:,})" for c in oov["codepoints"][:10])
+            print(f"  ⚠️ OOV: {oov['labels_with_oov']:,} labels | {top}")
+        dist = report["distribution"]
+        if dist.get("classes"):
+            print(f"  📈 Distribution: imbalance {dist['imbalance_ratio']}x, gini {dist['gini']}, "
+                  f"normalized entropy {dist['normalized_entropy']}")
+        for key, split in report["splits"].items():
+            print(f"  • {key}: {split['labels']:,} labels, {split['distribution'].get('classes', 0):,} classes")
+
+    def write_report(self, report: Dict, report_path: Path = None) -> Path:
+        """บันทึก report เป็น JSON (default: <root>/label_coverage_report.json)"""
+        report_path = Path(report_path) if report_path else self.root / REPORT_FILE
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Coverage report: {report_path}")
+        return report_path
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="📊 Dictionary coverage, OOV and class histograms of all label files")
+    parser.add_argument("root", type=str, nargs="?", default=str(Path(__file__).parent / "datasets"),
+                       help="Directory searched recursively for rec_gt_*.txt and labels.txt (default: thai-letters/datasets)")
+    parser.add_argument("--dict", type=str, default=None, help="Character dictionary (default: thai-letters/th_dict.txt)")
+    parser.add_argument("--mode", type=str, default="greedy", choices=MODES,
+                       help="greedy: longest dictionary match; ctc: per codepoint like PaddleOCR's CTCLabelEncode")
+    parser.add_argument("--use-space-char", action="store_true", help="Append ' ' to the dictionary")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=int, default=8, help="File range per task in MB (default: 8)")
+    parser.add_argument("--report", type=str, default=None,
+                       help=f"Report path (default: <root>/{REPORT_FILE})")
+
+    args = parser.parse_args()
+
+    if not Path(args.root).exists():
+        print(f"❌ Directory not found: {args.root}")
+        sys.exit(1)
+
+    analyzer = LabelCoverageAnalyzer(args.root, args.dict, args.mode, args.use_space_char,
+                                     args.workers, args.chunk_mb << 20)
+    report = analyzer.run()
+    analyzer.print_summary(report)
+    analyzer.write_report(report, args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗂️ Offset-Indexed Label Files
+sidecar index (<label_file>.idx) สำหรับ rec_gt_*.txt / labels.txt
+สร้างครั้งเดียวต่อ label file แล้วอ่านผ่าน mmap:
+
+    - นับบรรทัด O(1)
+    - อ่านบรรทัดที่ i แบบ random access
+    - slice ต่อ class (CSR: class_starts + line ids เรียงตาม class)
+    - สุ่ม sample / stratified subset โดยไม่ต้องอ่านทั้งไฟล์
+
+Index ถูกสร้างใหม่อัตโนมัติเมื่อ size หรือ mtime ของ label file เปลี่ยน
+
+Format (little-endian):
+    header   : magic(8) source_size(u64) source_mtime_ns(u64) lines(u64) classes(u64) names_len(u64)
+    offsets  : u64[lines + 1]   byte offset ของแต่ละบรรทัด (ตัวสุดท้าย = ขนาดไฟล์)
+    starts   : u64[classes + 1] ช่วงของแต่ละ class ใน by_class
+    by_class : u32[lines]       line id เรียงตาม class (ภายใน class เรียงตามลำดับในไฟล์)
+    names    : JSON list ของชื่อ class (UTF-8)
+
+ใช้งาน:
+    python label_index.py <label_file> [--sample 20] [--class ก]
+"""
+
+import os
+import sys
+import json
+import mmap
+import random
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_SUFFIX = ".idx"
+_MAGIC = b"TLIDX01\0"
+_HEADER = struct.Struct("<8sQQQQQ")
+
+
+def index_path(label_file: Path) -> Path:
+    """path ของ sidecar index"""
+    return Path(f"{label_file}{INDEX_SUFFIX}")
+
+
+def build_index(label_file: Path, write: bool = True) -> bytes:
+    """อ่าน label file 1 รอบ (binary) แล้วสร้าง index
+
+    บรรทัดที่ไม่มี tab (เช่น บรรทัดว่าง) ไม่ถูกนับ
+
+    Args:
+        write: บันทึกเป็น sidecar (.idx.tmp แล้ว os.replace)
+
+    Returns:
+        เนื้อหาของ index
+    """
+    label_file = Path(label_file)
+    st = os.stat(label_file)
+
+    offsets = []
+    class_ids = []
+    class_lookup = {}
+    position = 0
+    with open(label_file, 'rb') as f:
+        for raw in f:
+            tab = raw.find(b'\t')
+            if tab >= 0:
+                label = raw[tab + 1:].rstrip(b'\r\n').decode('utf-8')
+                offsets.append(position)
+                class_ids.append(class_lookup.setdefault(label, len(class_lookup)))
+            position += len(raw)
+
+    offsets.append(position)
+    offsets = np.array(offsets, dtype=np.uint64)
+    class_ids = np.array(class_ids, dtype=np.uint32)
+
+    order = np.argsort(class_ids, kind='stable').astype(np.uint32)
+    counts = np.bincount(class_ids, minlength=len(class_lookup)).astype(np.uint64)
+    starts = np.concatenate([np.zeros(1, np.uint64), np.cumsum(counts, dtype=np.uint64)])
+
+    names = json.dumps(list(class_lookup), ensure_ascii=False).encode('utf-8')
+    header = _HEADER.pack(_MAGIC, st.st_size, st.st_mtime_ns, len(class_ids), len(class_lookup), len(names))
+    data = header + offsets.tobytes() + starts.tobytes() + order.tobytes() + names
+
+    if write:
+        target = index_path(label_file)
+        try:
+            # mkstemp: หลาย process สร้าง index เดียวกันพร้อมกันได้โดยไม่เขียนไฟล์ .tmp เดียวกัน
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{target.name}.", suffix=".tmp", dir=target.parent)
+        except OSError:
+            # โฟลเดอร์อ่านอย่างเดียว: ใช้ index ในหน่วยความจำแทน
+            return data
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    return data
+
+
+class LabelIndex:
+    """🗂️ random access ไปยัง label file ผ่าน sidecar index + mmap"""
+
+    def __init__(self, label_file: Path, write: bool = True):
+        """
+        Args:
+            label_file: rec_gt_*.txt หรือ labels.txt (บรรทัด: path<TAB>label)
+            write: บันทึก index ที่สร้างใหม่เป็น sidecar (.idx)
+        """
+        self.label_file = Path(label_file)
+        self._index_map = None
+        self._label_map = None
+        self._label_fh = None
+        self._index_fh = None
+
+        data = self._open_index()
+        if data is None:
+            data = build_index(self.label_file, write=write)
+            if write and self._is_fresh(index_path(self.label_file)):
+                data = self._open_index()
+        self._parse(data)
+
+        self._label_fh = open(self.label_file, 'rb')
+        size = os.fstat(self._label_fh.fileno()).st_size
+        self._label_map = mmap.mmap(self._label_fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _is_fresh(self, path: Path) -> bool:
+        """index ตรงกับ size + mtime ของ label file ปัจจุบันหรือไม่"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+        except OSError:
+            return False
+        if len(header) != _HEADER.size:
+            return False
+        magic, size, mtime_ns, *_ = _HEADER.unpack(header)
+        st = os.stat(self.label_file)
+        return magic == _MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns
+
+    def _open_index(self):
+        """mmap sidecar index ถ้ายังใช้ได้"""
+        path = index_path(self.label_file)
+        if not self._is_fresh(path):
+            return None
+        self._index_fh = open(path, 'rb')
+        self._index_map = mmap.mmap(self._index_fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._index_map
+
+    def _parse(self, data):
+        _, _, _, lines, classes, names_len = _HEADER.unpack_from(data, 0)
+        pos = _HEADER.size
+        self.offsets = np.frombuffer(data, dtype=np.uint64, count=lines + 1, offset=pos)
+        pos += (lines + 1) * 8
+        self.class_starts = np.frombuffer(data, dtype=np.uint64, count=classes + 1, offset=pos)
+        pos += (classes + 1) * 8
+        self.by_class = np.frombuffer(data, dtype=np.uint32, count=lines, offset=pos)
+        pos += lines * 4
+        self.classes = json.loads(bytes(data[pos:pos + names_len]).decode('utf-8'))
+        self._class_ids = {name: i for i, name in enumerate(self.classes)}
+
+    def close(self):
+        """ปิด mmap และไฟล์"""
+        # numpy views ต้องถูกปล่อยก่อนปิด mmap
+        self.offsets = self.class_starts = self.by_class = None
+        for handle in [self._index_map, self._label_map, self._index_fh, self._label_fh]:
+            if handle is not None and hasattr(handle, "close"):
+                handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.by_class)
+
+    def line(self, i: int) -> Tuple[str, str]:
+        """(path, label) ของบรรทัดที่ i (นับเฉพาะบรรทัดที่มี tab)"""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start = int(self.offsets[i])
+        end = self._label_map.find(b'\n', start)
+        raw = self._label_map[start:end if end >= 0 else len(self._label_map)]
+        img_path, label = raw.rstrip(b'\r').decode('utf-8').split('\t', 1)
+        return img_path, label
+
+    def __getitem__(self, i: int) -> Tuple[str, str]:
+        return self.line(i)
+
+    def lines(self, ids) -> List[Tuple[str, str]]:
+        """อ่านหลายบรรทัดตาม line id"""
+        return [self.line(int(i)) for i in ids]
+
+    def head(self, n: int) -> List[Tuple[str, str]]:
+        """n บรรทัดแรก"""
+        return self.lines(range(min(n, len(self))))
+
+    def class_counts(self) -> Dict[str, int]:
+        """จำนวน sample ต่อ class"""
+        counts = np.diff(self.class_starts)
+        return {name: int(count) for name, count in zip(self.classes, counts)}
+
+    def class_lines(self, label: str) -> np.ndarray:
+        """line ids ของ class (เรียงตามลำดับในไฟล์)"""
+        class_id = self._class_ids.get(label)
+        if class_id is None:
+            return np.zeros(0, dtype=np.uint32)
+        # คัดลอกออกจาก mmap เพื่อให้ close() ได้แม้ผู้เรียกยังถือ array ไว้
+        return self.by_class[int(self.class_starts[class_id]):int(self.class_starts[class_id + 1])].copy()
+
+    def sample(self, n: int, seed: Optional[int] = 0) -> List[int]:
+        """สุ่ม n line ids (ไม่ซ้ำ)"""
+        return sorted(random.Random(seed).sample(range(len(self)), min(n, len(self))))
+
+    def stratified(self, per_class: int = 1, seed: Optional[int] = 0) -> List[int]:
+        """สุ่มไม่เกิน per_class line ids ต่อ class"""
+        rng = random.Random(seed)
+        picked = []
+        for class_id in range(len(self.classes)):
+            start, end = int(self.class_starts[class_id]), int(self.class_starts[class_id + 1])
+            count = min(per_class, end - start)
+            picked.extend(int(self.by_class[start + j]) for j in rng.sample(range(end - start), count))
+        return sorted(picked)
+
+
+def count_labels(label_file: Path) -> int:
+    """จำนวน sample ใน label file (ใช้ index ถ้ามี)"""
+    with LabelIndex(label_file) as index:
+        return len(index)
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🗂️ Build / query the offset index of a label file")
+    parser.add_argument("label_file", type=str, help="rec_gt_*.txt or labels.txt")
+    parser.add_argument("--sample", type=int, default=0, help="Print N random lines")
+    parser.add_argument("--per-class", type=int, default=0, help="Print a stratified subset with N lines per class")
+    parser.add_argument("--class", dest="label", type=str, default=None, help="Print the lines of one class")
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if not Path(args.label_file).exists():
+        print(f"❌ Label file not found: {args.label_file}")
+        sys.exit(1)
+
+    with LabelIndex(args.label_file) as index:
+        print(f"🗂️ {args.label_file}: {len(index):,} samples, {len(index.classes):,} classes")
+        top = sorted(index.class_counts().items(), key=lambda x: -x[1])[:10]
+        print("  📊 Top classes: " + ", ".join(f"{name} ({count:,})" for name, count in top))
+
+        ids = []
+        if args.sample:
+            ids = index.sample(args.sample, args.seed)
+        elif args.per_class:
+            ids = index.stratified(args.per_class, args.seed)
+        elif args.label is not None:
+            ids = index.class_lines(args.label)
+        for img_path, label in index.lines(ids):
+            print(f"{img_path}\t{label}")
+
+
+if __name__ == "__main__":
+    main()
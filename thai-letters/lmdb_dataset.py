@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 LMDB Dataset Export
+เขียน / อ่าน dataset ในรูปแบบ LMDB ตาม layout ของ PaddleOCR LMDBDataSet
+
+Layout (ต่อ 1 split):
+    num-samples       -> จำนวน sample (ASCII)
+    image-%09d        -> bytes ของภาพ (JPEG/PNG เดิม, index เริ่มที่ 1)
+    label-%09d        -> label (UTF-8)
+
+ใช้งาน (benchmark เปรียบเทียบกับ file tree):
+    python lmdb_dataset.py <converted_dataset_dir> --samples 2000
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+from typing import Dict, List
+
+# ขนาด map เริ่มต้น ขยายอัตโนมัติเมื่อเต็ม (บน Windows ไฟล์จะถูกจองตามขนาดนี้)
+DEFAULT_MAP_SIZE = 1 << 30
+
+
+def _import_lmdb():
+    """import lmdb แบบ lazy เพื่อให้ converter โหมด tree ใช้ได้โดยไม่ต้องติดตั้ง"""
+    try:
+        import lmdb
+    except ImportError:
+        raise ImportError("lmdb is required for --format lmdb: pip install lmdb")
+    return lmdb
+
+
+class LMDBSplitWriter:
+    """เขียน sample ของ split เดียวลง LMDB ด้วย bulk write transaction"""
+
+    def __init__(self, path: Path, commit_every: int = 5000, map_size: int = DEFAULT_MAP_SIZE):
+        """
+        Args:
+            path: โฟลเดอร์ LMDB environment (เช่น train_data/rec/lmdb/train)
+            commit_every: จำนวน sample ต่อ 1 write transaction
+            map_size: ขนาด map เริ่มต้น (bytes)
+        """
+        self.lmdb = _import_lmdb()
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self.env = self.lmdb.open(str(self.path), map_size=map_size, subdir=True,
+                                  meminit=False, map_async=True)
+        self.count = 0
+        self._batch = []
+
+    def add(self, image_bytes: bytes, label: str):
+        """เพิ่ม 1 sample (index ต่อเนื่องจาก sample ก่อนหน้า)"""
+        self.count += 1
+        self._batch.append((b"image-%09d" % self.count, image_bytes))
+        self._batch.append((b"label-%09d" % self.count, label.encode('utf-8')))
+        if len(self._batch) >= self.commit_every * 2:
+            self._flush()
+
+    def _flush(self):
+        """เขียน batch ใน transaction เดียว ขยาย map_size ถ้าเต็ม"""
+        if not self._batch:
+            return
+        while True:
+            try:
+                with self.env.begin(write=True) as txn:
+                    txn.cursor().putmulti(self._batch)
+                break
+            except self.lmdb.MapFullError:
+                new_size = self.env.info()["map_size"] * 2
+                self.env.set_mapsize(new_size)
+        self._batch = []
+
+    def close(self) -> int:
+        """เขียนส่วนที่เหลือพร้อม num-samples แล้วปิด environment
+
+        Returns:
+            จำนวน sample ทั้งหมด
+        """
+        self._batch.append((b"num-samples", str(self.count).encode('ascii')))
+        self._flush()
+        self.env.sync()
+        self.env.close()
+        return self.count
+
+
+def read_num_samples(lmdb_dir: Path) -> int:
+    """อ่านจำนวน sample จาก LMDB environment"""
+    lmdb = _import_lmdb()
+    env = lmdb.open(str(lmdb_dir), readonly=True, lock=False, readahead=False, meminit=False)
+    try:
+        with env.begin() as txn:
+            value = txn.get(b"num-samples")
+        return int(value) if value else 0
+    finally:
+        env.close()
+
+
+def lmdb_dataset_snippet(data_root: str, image_shape: List[int] = None,
+                         pre_resized: bool = False) -> Dict:
+    """สร้าง Train/Eval dataset sections สำหรับ LMDBDataSet
+
+    Args:
+        data_root: path ของโฟลเดอร์ lmdb/ (ที่มี train/ และ val/)
+        image_shape: shape ที่ใช้ใน RecResizeImg
+        pre_resized: ภาพถูก resize + pad ไว้แล้ว (ใช้ NormalizeImage + ToCHWImage แทน RecResizeImg)
+    """
+    image_shape = image_shape or [3, 32, 100]
+    data_root = data_root.rstrip("/")
+
+    def transforms():
+        if pre_resized:
+            from preresize import preresized_transforms
+            return preresized_transforms({"CTCLabelEncode": {}})
+        return [
+            {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
+            {"CTCLabelEncode": {}},
+            {"RecResizeImg": {"image_shape": image_shape}},
+            {"KeepKeys": {"keep_keys": ["image", "label", "length"]}}
+        ]
+
+    return {
+        "Train": {
+            "dataset": {
+                "name": "LMDBDataSet",
+                "data_dir": f"{data_root}/train/",
+                "transforms": transforms()
+            }
+        },
+        "Eval": {
+            "dataset": {
+                "name": "LMDBDataSet",
+                "data_dir": f"{data_root}/val/",
+                "transforms": transforms()
+            }
+        }
+    }
+
+
+def read_label_paths(label_file: Path, data_dir: Path, flat: bool = False) -> List[Path]:
+    """อ่าน path ภาพจาก rec_gt_*.txt
+
+    Args:
+        flat: ใช้แค่ชื่อไฟล์ (สำหรับโฟลเดอร์ images/ ของ raw dataset)
+    """
+    paths = []
+    with open(label_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if '\t' in line:
+                rel_path = line.split('\t', 1)[0]
+                paths.append(data_dir / (Path(rel_path).name if flat else rel_path))
+    return paths
+
+
+def benchmark_random_access(lmdb_dir: Path, image_paths: List[Path],
+                            samples: int = 2000, seed: int = 0) -> Dict:
+    """วัด random-access samples/sec ของ LMDB เทียบกับ file tree
+
+    อ่าน bytes ของภาพ+label แบบสุ่ม index (เหมือน DataLoader ที่ shuffle=True)
+    ผลลัพธ์ขึ้นกับ page cache ของ OS: รันครั้งแรกหลัง reboot จะเห็นความต่างชัดที่สุด
+
+    Args:
+        lmdb_dir: LMDB environment ของ split ที่จะทดสอบ
+        image_paths: path ภาพใน file tree ของ split เดียวกัน
+        samples: จำนวนครั้งที่อ่าน
+    """
+    lmdb = _import_lmdb()
+    rng = random.Random(seed)
+    results = {"samples": samples}
+
+    # File tree
+    existing = [p for p in image_paths if p.exists()]
+    if existing:
+        picks = [rng.randrange(len(existing)) for _ in range(samples)]
+        started = time.perf_counter()
+        total_bytes = 0
+        for idx in picks:
+            with open(existing[idx], 'rb') as f:
+                total_bytes += len(f.read())
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        results["file_tree"] = {"samples_per_sec": samples / elapsed,
+                                "mb_per_sec": total_bytes / (1024 * 1024) / elapsed}
+
+    # LMDB
+    env = lmdb.open(str(lmdb_dir), readonly=True, lock=False, readahead=False, meminit=False)
+    try:
+        with env.begin() as txn:
+            num_samples = int(txn.get(b"num-samples") or 0)
+            if num_samples:
+                picks = [rng.randint(1, num_samples) for _ in range(samples)]
+                started = time.perf_counter()
+                total_bytes = 0
+                for idx in picks:
+                    total_bytes += len(txn.get(b"image-%09d" % idx))
+                    txn.get(b"label-%09d" % idx)
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                results["lmdb"] = {"samples_per_sec": samples / elapsed,
+                                   "mb_per_sec": total_bytes / (1024 * 1024) / elapsed}
+    finally:
+        env.close()
+
+    if "file_tree" in results and "lmdb" in results:
+        results["speedup"] = results["lmdb"]["samples_per_sec"] / results["file_tree"]["samples_per_sec"]
+
+    return results
+
+
+def print_benchmark(results: Dict):
+    """แสดงผล benchmark"""
+    print(f"⏱️ Random-access read benchmark ({results['samples']:,} samples)")
+    for layout in ["file_tree", "lmdb"]:
+        if layout in results:
+            r = results[layout]
+            print(f"  • {layout:9s}: {r['samples_per_sec']:>10,.0f} samples/sec ({r['mb_per_sec']:,.1f} MB/sec)")
+    if "speedup" in results:
+        print(f"  🚀 LMDB speedup: {results['speedup']:.1f}x")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="📦 Benchmark LMDB vs file-tree random access")
+    parser.add_argument("dataset_dir", type=str,
+                       help="Converted dataset directory (train_data_thai_paddleocr_*)")
+    parser.add_argument("--image-dir", type=str, default=None,
+                       help="Flat image directory to compare against, e.g. the raw dataset's images/ "
+                            "(default: the converted tree under <dataset>/train_data/rec)")
+    parser.add_argument("--split", type=str, default="val", choices=["train", "val"])
+    parser.add_argument("--samples", type=int, default=2000)
+
+    args = parser.parse_args()
+
+    rec_dir = Path(args.dataset_dir) / "train_data" / "rec"
+    lmdb_dir = rec_dir / "lmdb" / args.split
+    if not (lmdb_dir / "data.mdb").exists():
+        print(f"❌ LMDB not found: {lmdb_dir}")
+        sys.exit(1)
+
+    label_file = rec_dir / f"rec_gt_{args.split}.txt"
+    if args.image_dir:
+        image_paths = read_label_paths(label_file, Path(args.image_dir), flat=True)
+    else:
+        image_paths = read_label_paths(label_file, rec_dir)
+    results = benchmark_random_access(lmdb_dir, image_paths, args.samples)
+    print_benchmark(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🪞 Overlay Datasets
+dataset ที่สร้างต่อจาก dataset อื่น (เช่น single-char) โดยไม่คัดลอกภาพ:
+มีแค่ label files ใหม่ + overlay.json ที่ชี้ไปยังภาพของ parent
+
+Layout (ระดับเดียวกับ train_data/ ของ converted dataset = training channel ของ SageMaker):
+    <overlay>/train_data/
+    ├── overlay.json          # {"parent": "<relative path to parent>/train_data", ...}
+    ├── th_dict.txt
+    └── rec/
+        ├── rec_gt_train.txt  # path ยังเป็น thai_data/... ของ parent
+        └── rec_gt_val.txt
+
+Label transforms ทำงานแบบ streaming ทีละบรรทัด:
+    first_char  -> ตัดเหลือตัวอักษรแรก
+    classes     -> เก็บเฉพาะ label ที่อยู่ในชุดที่กำหนด
+    chars       -> เก็บเฉพาะ label ที่ทุกตัวอักษรอยู่ในชุดที่กำหนด (เช่น dictionary ที่ตัดแล้ว)
+    subsample   -> สุ่มเก็บตามสัดส่วนด้วย hash ของ path (ผลเหมือนเดิมทุกครั้ง)
+
+ใช้งาน:
+    python overlay_dataset.py <parent_dataset> <output_dir> --first-char
+    python overlay_dataset.py <parent_dataset> <output_dir> --classes กขค --subsample 0.2
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+OVERLAY_FILE = "overlay.json"
+OVERLAY_VERSION = 1
+LABEL_FILES = ["rec_gt_train.txt", "rec_gt_val.txt"]
+
+
+def data_root(dataset_dir: Path) -> Path:
+    """โฟลเดอร์ train_data/ ของ dataset (รับได้ทั้ง dataset root และ train_data/ เอง)"""
+    dataset_dir = Path(dataset_dir)
+    if (dataset_dir / "train_data").is_dir():
+        return dataset_dir / "train_data"
+    return dataset_dir
+
+
+def load_overlay(root: Path) -> Dict:
+    """อ่าน overlay.json (คืน None ถ้าไม่ใช่ overlay)"""
+    overlay_file = Path(root) / OVERLAY_FILE
+    if not overlay_file.exists():
+        return None
+    with open(overlay_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve_image_root(dataset_dir: Path) -> Path:
+    """โฟลเดอร์ที่ path ใน rec_gt_*.txt อ้างอิง (data_dir ของ SimpleDataSet)
+
+    overlay ซ้อน overlay ได้: จะตามไปจนถึง dataset ที่มีภาพจริง
+    """
+    root = data_root(dataset_dir)
+    seen = set()
+    overlay = load_overlay(root)
+    while overlay is not None:
+        if root.resolve() in seen:
+            raise ValueError(f"Overlay cycle detected at {root}")
+        seen.add(root.resolve())
+        root = (root / overlay["parent"]).resolve()
+        overlay = load_overlay(root)
+    return root / "rec"
+
+
+def first_char(samples: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+    """ตัด label เหลือตัวอักษรแรก"""
+    for img_path, label in samples:
+        if label:
+            yield img_path, label[0]
+
+
+def filter_classes(samples: Iterable[Tuple[str, str]], classes) -> Iterator[Tuple[str, str]]:
+    """เก็บเฉพาะ sample ที่ label อยู่ใน classes"""
+    classes = frozenset(classes)
+    for img_path, label in samples:
+        if label in classes:
+            yield img_path, label
+
+
+def filter_chars(samples: Iterable[Tuple[str, str]], chars) -> Iterator[Tuple[str, str]]:
+    """เก็บเฉพาะ sample ที่ทุกตัวอักษรของ label อยู่ใน chars"""
+    chars = frozenset(chars)
+    for img_path, label in samples:
+        if label and chars.issuperset(label):
+            yield img_path, label
+
+
+def subsample(samples: Iterable[Tuple[str, str]], fraction: float,
+              salt: str = "overlay") -> Iterator[Tuple[str, str]]:
+    """เก็บ sample ตามสัดส่วน fraction ด้วย blake2b ของ path (deterministic)"""
+    salt = salt.encode('utf-8')
+    for img_path, label in samples:
+        digest = hashlib.blake2b(salt + b"\0" + img_path.encode('utf-8'), digest_size=8).digest()
+        if int.from_bytes(digest, 'big') / 2 ** 64 < fraction:
+            yield img_path, label
+
+
+def apply_transforms(samples: Iterable[Tuple[str, str]], transforms: List[Dict]) -> Iterator[Tuple[str, str]]:
+    """ต่อ transform ตามลำดับใน spec (รูปแบบเดียวกับที่บันทึกใน overlay.json)"""
+    for spec in transforms:
+        if "first_char" in spec:
+            samples = first_char(samples)
+        elif "classes" in spec:
+            samples = filter_classes(samples, spec["classes"])
+        elif "chars" in spec:
+            samples = filter_chars(samples, spec["chars"])
+        elif "subsample" in spec:
+            samples = subsample(samples, spec["subsample"], spec.get("salt", "overlay"))
+        else:
+            raise ValueError(f"Unknown label transform: {spec}")
+    return samples
+
+
+def _read_label_file(label_file: Path) -> Iterator[Tuple[str, str]]:
+    with open(label_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if '\t' in line:
+                img_path, label = line.split('\t', 1)
+                yield img_path, label
+
+
+def create_overlay(parent_dir: Path, output_dir: Path, transforms: List[Dict],
+                   dict_path: Path = None, images_s3_uri: str = None) -> Dict:
+    """สร้าง overlay dataset จาก parent (converted dataset หรือ overlay อื่น)
+
+    Args:
+        parent_dir: dataset ต้นทาง
+        output_dir: dataset ใหม่ (สร้าง <output_dir>/train_data/)
+        transforms: label transforms เช่น [{"first_char": True}, {"subsample": 0.1}]
+        dict_path: dictionary ของ overlay (default: ของ parent)
+        images_s3_uri: S3 prefix ที่เก็บภาพของ parent (ใช้เป็น images channel ตอนเทรน)
+
+    Returns:
+        เนื้อหาของ overlay.json
+    """
+    parent_root = data_root(parent_dir)
+    if not (parent_root / "rec").is_dir():
+        raise FileNotFoundError(f"Parent dataset has no rec/ directory: {parent_root}")
+
+    root = Path(output_dir) / "train_data"
+    rec_dir = root / "rec"
+    rec_dir.mkdir(parents=True, exist_ok=True)
+
+    counts = {}
+    for label_name in LABEL_FILES:
+        source = parent_root / "rec" / label_name
+        if not source.exists():
+            continue
+        target = rec_dir / label_name
+        count = 0
+        with open(f"{target}.tmp", 'w', encoding='utf-8') as f:
+            for img_path, label in apply_transforms(_read_label_file(source), transforms):
+                f.write(f"{img_path}\t{label}\n")
+                count += 1
+        os.replace(f"{target}.tmp", target)
+        counts[label_name] = count
+        print(f"✅ {label_name}: {count:,} samples")
+
+    dict_path = Path(dict_path) if dict_path else parent_root / "th_dict.txt"
+    if dict_path.exists():
+        shutil.copy2(dict_path, root / "th_dict.txt")
+
+    parent_overlay = load_overlay(parent_root)
+    if images_s3_uri is None and parent_overlay is not None:
+        images_s3_uri = parent_overlay.get("images_s3_uri")
+
+    overlay = {
+        "version": OVERLAY_VERSION,
+        "parent": os.path.relpath(parent_root.resolve(), root.resolve()),
+        "parent_name": parent_root.resolve().parent.name,
+        "images_s3_uri": images_s3_uri,
+        "transforms": transforms,
+        "counts": counts,
+        "created": datetime.now().isoformat(timespec="seconds")
+    }
+    with open(root / OVERLAY_FILE, 'w', encoding='utf-8') as f:
+        json.dump(overlay, f, ensure_ascii=False, indent=2)
+
+    print(f"🪞 Overlay saved: {root} (images: {resolve_image_root(root)})")
+    return overlay
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="🪞 Create a derived dataset without copying images")
+    parser.add_argument("parent_dir", type=str, help="Converted dataset (or another overlay)")
+    parser.add_argument("output_dir", type=str, help="New overlay dataset directory")
+    parser.add_argument("--first-char", action="store_true", help="Truncate labels to their first character")
+    parser.add_argument("--classes", type=str, default=None,
+                       help="Keep only these labels (a string of characters, or a file with one label per line)")
+    parser.add_argument("--subsample", type=float, default=None,
+                       help="Keep this fraction of samples (hash-based, deterministic)")
+    parser.add_argument("--salt", type=str, default="overlay", help="Salt for --subsample (default: overlay)")
+    parser.add_argument("--dict", type=str, default=None, help="Dictionary for the overlay (default: parent's)")
+    parser.add_argument("--images-s3-uri", type=str, default=None,
+                       help="S3 prefix holding the parent's images (the SageMaker images channel)")
+
+    args = parser.parse_args()
+
+    if not Path(args.parent_dir).exists():
+        print(f"❌ Parent dataset not found: {args.parent_dir}")
+        sys.exit(1)
+
+    transforms = []
+    if args.first_char:
+        transforms.append({"first_char": True})
+    if args.classes:
+        if Path(args.classes).is_file():
+            with open(args.classes, 'r', encoding='utf-8') as f:
+                classes = [line.rstrip('\r\n') for line in f if line.strip()]
+        else:
+            classes = list(args.classes)
+        transforms.append({"classes": classes})
+    if args.subsample is not None:
+        transforms.append({"subsample": args.subsample, "salt": args.salt})
+
+    create_overlay(Path(args.parent_dir), Path(args.output_dir), transforms,
+                   Path(args.dict) if args.dict else None, args.images_s3_uri)
+
+
+if __name__ == "__main__":
+    main()
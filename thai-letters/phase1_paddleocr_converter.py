@@ -10,30 +10,193 @@
 import os
 import sys
 import json
+import errno
 import shutil
-import random
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator
+
+# รูปแบบ output: file tree (ภาพ + rec_gt_*.txt) หรือ LMDB (LMDBDataSet)
+OUTPUT_FORMATS = ["tree", "lmdb"]
+
+# วิธีนำภาพเข้า output: "auto" = reflink (copy-on-write) ถ้า filesystem รองรับ ไม่อย่างนั้น copy
+# hardlink ต้องเลือกเอง เพราะแชร์ inode กับภาพต้นฉบับ (แก้ภาพหนึ่ง = แก้ทุก dataset ที่ link ไว้)
+LINK_MODES = ["auto", "copy", "hardlink", "reflink", "symlink"]
+
+# manifest ของ input ที่แปลงแล้ว ใช้สำหรับ incremental re-conversion
+MANIFEST_FILE = "conversion_manifest.jsonl"
+MANIFEST_VERSION = 1
+
+# ลำดับการ fallback ต่อไฟล์ (ถ้าวิธีแรกใช้ไม่ได้ จะลองวิธีถัดไป)
+LINK_MODE_FALLBACKS = {
+    "auto": ["reflink", "copy"],
+    "reflink": ["reflink", "copy"],
+    "hardlink": ["hardlink", "copy"],
+    "symlink": ["symlink", "copy"],
+    "copy": ["copy"],
+}
+
+# errno ที่หมายถึง "filesystem นี้ไม่รองรับวิธีนี้" (ไม่ต้องลองซ้ำกับไฟล์ถัดไป)
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY,
+    errno.EOPNOTSUPP, getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.ENOSYS, errno.EMLINK,
+}
+
+# ioctl FICLONE ของ Linux (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+def _reflink_file(src_path: Path, dst_path: Path):
+    """Copy-on-write clone (reflink) ผ่าน ioctl FICLONE"""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported on this platform")
+    
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(dst_path)
+            raise
+    shutil.copystat(src_path, dst_path)
+
+
+def place_file(src_path: Path, dst_path: Path, mode: str) -> None:
+    """นำไฟล์ src ไปไว้ที่ dst ด้วยวิธีเดียว (ไม่มี fallback)"""
+    if mode == "copy":
+        shutil.copy2(src_path, dst_path)
+    elif mode == "hardlink":
+        os.link(src_path, dst_path)
+    elif mode == "reflink":
+        _reflink_file(src_path, dst_path)
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src_path), dst_path)
+    else:
+        raise ValueError(f"Unknown link mode: {mode}")
+
+
+class StreamingStratifiedSplitter:
+    """แบ่ง train/val แบบ single pass ด้วย hash ของชื่อไฟล์ + salt
+    
+    - ผลลัพธ์เหมือนเดิมทุกครั้งและทุกเครื่อง (blake2b ไม่ขึ้นกับ PYTHONHASHSEED)
+    - เก็บแค่ตัวนับต่อ class -> หน่วยความจำ O(classes)
+    - ถ้า class ยังมี val ไม่ถึง min_val_per_class จะดึง sample ถัดไปของ class นั้น
+      (ที่ hash ตกฝั่ง train) มาเป็น val โดยเหลือ train ไว้อย่างน้อย 1 sample
+    
+    การตัดสินใจขึ้นกับเนื้อหาและลำดับของ labels.txt เท่านั้น
+    """
+    
+    def __init__(self, train_ratio: float = 0.8, salt: str = "thai-ocr",
+                 min_val_per_class: int = 1):
+        self.train_ratio = train_ratio
+        self.salt = salt.encode('utf-8')
+        self.min_val_per_class = min_val_per_class
+        # char -> [train_count, val_count]
+        self.class_counts = {}
+    
+    def hash_fraction(self, img_name: str) -> float:
+        """ค่า hash ของชื่อไฟล์ในช่วง [0, 1)"""
+        digest = hashlib.blake2b(self.salt + b"\0" + img_name.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') / 2 ** 64
+    
+    def assign(self, img_name: str, char: str) -> str:
+        """ตัดสินว่า sample นี้อยู่ split ไหน ("train" หรือ "val")"""
+        counts = self.class_counts.setdefault(char, [0, 0])
+        is_val = self.hash_fraction(img_name) >= self.train_ratio
+        
+        if not is_val and counts[1] < self.min_val_per_class and counts[0] >= 1:
+            is_val = True
+        
+        counts[1 if is_val else 0] += 1
+        return "val" if is_val else "train"
+    
+    def record(self, char: str, split: str):
+        """นับ sample ที่รู้ split อยู่แล้ว (เช่น จาก manifest ของรอบก่อน)"""
+        counts = self.class_counts.setdefault(char, [0, 0])
+        counts[1 if split == "val" else 0] += 1
+    
+    def classes_below_min_val(self) -> List[str]:
+        """class ที่มี sample ไม่พอจะได้ val ครบ min_val_per_class"""
+        return [char for char, (_, val) in self.class_counts.items()
+                if val < self.min_val_per_class]
+
 
 class PaddleOCRDatasetConverter:
     """แปลง Thai Dataset เป็น PaddleOCR format"""
     
-    def __init__(self, source_dataset_dir: str, train_val_split: float = 0.8):
+    def __init__(self, source_dataset_dir: str, train_val_split: float = 0.8,
+                 link_mode: str = "auto", workers: int = None,
+                 output_format: str = "tree", benchmark: bool = False,
+                 split_salt: str = "thai-ocr", min_val_per_class: int = 1,
+                 output_dir: str = None, content_hash: bool = False,
+                 check_integrity: bool = False, image_shape: List[int] = None,
+                 image_encoding: str = "png"):
         """
         Initialize converter
         
         Args:
             source_dataset_dir: โฟลเดอร์ dataset ต้นฉบับ
             train_val_split: อัตราส่วน train/validation
+            link_mode: วิธีนำภาพเข้า output (auto, copy, hardlink, reflink, symlink)
+            workers: จำนวน thread สำหรับ I/O (default: min(32, CPU * 4))
+            output_format: "tree" (ภาพแยกไฟล์) หรือ "lmdb" (LMDBDataSet)
+            benchmark: วัด random-access read ของ LMDB เทียบกับ file tree หลังแปลงเสร็จ
+            split_salt: salt ของ hash ที่ใช้แบ่ง train/val (เปลี่ยน salt = ได้ split ใหม่)
+            min_val_per_class: จำนวน val ขั้นต่ำต่อตัวอักษร
+            output_dir: โฟลเดอร์ output ที่มีอยู่แล้ว (แปลงเฉพาะ sample ใหม่/ที่เปลี่ยน)
+            content_hash: ตรวจการเปลี่ยนแปลงด้วย hash ของเนื้อไฟล์แทน size + mtime
+            check_integrity: decode ทุกภาพและตรวจ label กับ dictionary ก่อนแปลง (ข้าม sample ที่เสีย)
+            image_shape: [C, H, W] ของ input โมเดล ถ้าระบุจะ resize + pad ภาพไว้ล่วงหน้า
+            image_encoding: รูปแบบไฟล์ของภาพที่ pre-resize (png, gray-png, bmp)
         """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"link_mode must be one of {LINK_MODES}, got {link_mode!r}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+        
+        if image_shape:
+            from preresize import IMAGE_ENCODINGS
+            if image_encoding not in IMAGE_ENCODINGS:
+                raise ValueError(f"image_encoding must be one of {list(IMAGE_ENCODINGS)}, got {image_encoding!r}")
+        
         self.source_dir = Path(source_dataset_dir)
         self.train_val_split = train_val_split
+        self.link_mode = link_mode
+        self.output_format = output_format
+        self.benchmark = benchmark
+        self.splitter = StreamingStratifiedSplitter(train_val_split, split_salt, min_val_per_class)
+        self.content_hash = content_hash
+        # วิธีที่ filesystem ปฏิเสธแล้ว จะข้ามไปเลยสำหรับไฟล์ถัดไป
+        self._unsupported_modes = set()
+        self._lock = threading.Lock()
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self._source_images = None
+        self.missing_images = []
+        self.check_integrity = check_integrity
+        self.integrity_checker = None
+        self.bad_images = set()
+        self.image_shape = list(image_shape) if image_shape else None
+        self.image_encoding = image_encoding
         self.timestamp = datetime.now().strftime("%m%d_%H%M")
         
         # Output directory ตาม PaddleOCR standard (เก็บใน datasets/converted/)
-        os.makedirs("datasets/converted", exist_ok=True)
-        self.output_dir = Path(f"datasets/converted/train_data_thai_paddleocr_{self.timestamp}")
+        if output_dir:
+            self.output_dir = Path(output_dir)
+        else:
+            os.makedirs("datasets/converted", exist_ok=True)
+            self.output_dir = Path(f"datasets/converted/train_data_thai_paddleocr_{self.timestamp}")
+        
+        # manifest ของรอบก่อน: img_name -> entry
+        self.previous_manifest = {}
+        self.reuse_previous_splits = False
         
         # Statistics
         self.stats = {
@@ -42,12 +205,69 @@ class PaddleOCRDatasetConverter:
             "val_images": 0,
             "characters": 0,
             "processed": 0,
-            "errors": 0
+            "errors": 0,
+            "bytes": 0,
+            "reused": 0,
+            "added": 0,
+            "updated": 0,
+            "removed": 0,
+            "link_modes": {}
         }
         
         print(f"🔥 PaddleOCR Dataset Converter")
         print(f"📁 Source: {self.source_dir}")
         print(f"📁 Output: {self.output_dir}")
+        self._load_previous_manifest()
+        
+        print(f"📦 Format: {self.output_format}")
+        if self.image_shape:
+            print(f"📐 Pre-resize: {self.image_shape} ({self.image_encoding})")
+        elif self.output_format == "tree":
+            print(f"🔗 Link mode: {self.link_mode}")
+    
+    def _manifest_meta(self) -> Dict:
+        """ค่าที่มีผลต่อ split และวิธีตรวจการเปลี่ยนแปลง"""
+        return {
+            "version": MANIFEST_VERSION,
+            "format": self.output_format,
+            "train_val_split": self.train_val_split,
+            "split_salt": self.splitter.salt.decode('utf-8'),
+            "min_val_per_class": self.splitter.min_val_per_class,
+            "content_hash": self.content_hash
+        }
+    
+    def _output_name(self, img_name: str) -> str:
+        """ชื่อไฟล์ใน output (นามสกุลเปลี่ยนเมื่อ pre-resize)"""
+        if not self.image_shape:
+            return img_name
+        from preresize import IMAGE_ENCODINGS
+        return Path(img_name).stem + IMAGE_ENCODINGS[self.image_encoding]
+    
+    def _load_previous_manifest(self):
+        """โหลด manifest ของการแปลงครั้งก่อน (ถ้ามี)"""
+        manifest_file = self.output_dir / MANIFEST_FILE
+        if not manifest_file.exists():
+            return
+        
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            meta = json.loads(f.readline()).get("meta", {})
+            for line in f:
+                entry = json.loads(line)
+                self.previous_manifest[entry["name"]] = entry
+        
+        print(f"♻️ Incremental: {len(self.previous_manifest):,} samples in previous manifest")
+        
+        if self.output_format == "lmdb":
+            # LMDB index ต้องต่อเนื่อง จึงต้อง repack ใหม่ทั้งหมด
+            print("  ⚠️ LMDB output is repacked in full; previous images are not reused")
+            self.previous_manifest = {}
+            return
+        
+        if meta == self._manifest_meta():
+            self.reuse_previous_splits = True
+        else:
+            print("  ⚠️ Split/format settings changed since last run: samples are re-split, "
+                  "images are reused only where the split is unchanged")
     
     def validate_source_dataset(self) -> bool:
         """ตรวจสอบ dataset ต้นฉบับ"""
@@ -73,20 +293,32 @@ class PaddleOCRDatasetConverter:
             return False
         
         # Count images
-        image_count = len(list(images_dir.glob("*.jpg")))
+        image_count = sum(1 for name in self._scan_source_images() if name.endswith(".jpg"))
         print(f"✅ Found {image_count:,} images")
         
         # Load and validate labels
         labels_file = self.source_dir / "labels.txt"
         with open(labels_file, 'r', encoding='utf-8') as f:
-            labels = [line.strip() for line in f if line.strip()]
+            label_count = sum(1 for line in f if line.strip())
         
-        print(f"✅ Found {len(labels):,} labels")
+        print(f"✅ Found {label_count:,} labels")
         
-        if image_count != len(labels):
-            print(f"⚠️ Warning: Image count ({image_count}) != Label count ({len(labels)})")
+        if image_count != label_count:
+            print(f"⚠️ Warning: Image count ({image_count}) != Label count ({label_count})")
         
-        self.stats["total_images"] = len(labels)
+        self.stats["total_images"] = label_count
+        
+        if self.check_integrity:
+            from dataset_integrity_checker import DatasetIntegrityChecker
+            self.integrity_checker = DatasetIntegrityChecker(self.source_dir)
+            self.integrity_checker.run()
+            self.integrity_checker.print_summary()
+            self.bad_images = self.integrity_checker.bad_image_names()
+            if self.bad_images:
+                print(f"⚠️ Skipping {len(self.bad_images):,} bad images (see integrity_report.json)")
+            label_issues = len(self.integrity_checker.label_issue_samples())
+            if label_issues:
+                print(f"⚠️ {label_issues:,} samples have label issues only; they are kept (see integrity_report.json)")
         
         return True
     
@@ -95,10 +327,13 @@ class PaddleOCRDatasetConverter:
         print("📁 Creating PaddleOCR structure...")
         
         # Create directories
-        structure_paths = [
-            self.output_dir / "train_data" / "rec" / "thai_data" / "train",
-            self.output_dir / "train_data" / "rec" / "thai_data" / "val"
-        ]
+        if self.output_format == "lmdb":
+            structure_paths = [self.output_dir / "train_data" / "rec" / "lmdb"]
+        else:
+            structure_paths = [
+                self.output_dir / "train_data" / "rec" / "thai_data" / "train",
+                self.output_dir / "train_data" / "rec" / "thai_data" / "val"
+            ]
         
         for path in structure_paths:
             path.mkdir(parents=True, exist_ok=True)
@@ -106,114 +341,301 @@ class PaddleOCRDatasetConverter:
         
         print("✅ PaddleOCR structure created")
     
-    def load_and_split_data(self) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
-        """โหลดและแบ่งข้อมูล train/validation"""
-        print("📊 Loading and splitting data...")
+    def load_and_split_data(self) -> Iterator[Tuple[str, str, str]]:
+        """อ่าน labels.txt แบบ streaming และแบ่ง train/validation ทีละ sample
+        
+        ภาพที่ไม่มีใน images/ จะถูกข้ามก่อนแบ่ง เพื่อไม่ให้กินโควตา val ของ class
         
-        # Load labels
+        Yields:
+            (split, img_name, char)
+        """
+        print("📊 Loading and splitting data (streaming, hash-based)...")
+        print(f"  🔑 Salt: {self.splitter.salt.decode('utf-8')} | "
+              f"Min val per class: {self.splitter.min_val_per_class}")
+        
+        available = self._scan_source_images()
         labels_file = self.source_dir / "labels.txt"
         with open(labels_file, 'r', encoding='utf-8') as f:
-            all_data = []
             for line in f:
-                if line.strip():
-                    parts = line.strip().split('\t')
-                    if len(parts) == 2:
-                        img_name, char = parts
-                        all_data.append((img_name, char))
-        
-        print(f"📋 Loaded {len(all_data):,} label pairs")
-        
-        # Shuffle for random split
-        random.shuffle(all_data)
+                parts = line.strip().split('\t')
+                if len(parts) != 2:
+                    continue
+                
+                img_name, char = parts
+                if img_name not in available:
+                    self.missing_images.append(img_name)
+                    self.stats["errors"] += 1
+                    continue
+                if img_name in self.bad_images:
+                    self.stats["errors"] += 1
+                    continue
+                
+                previous = self.previous_manifest.get(img_name)
+                if self.reuse_previous_splits and previous is not None:
+                    # sample เดิมอยู่ split เดิมเสมอ แม้ labels.txt จะเปลี่ยนลำดับ
+                    split = previous["split"]
+                    self.splitter.record(char, split)
+                else:
+                    split = self.splitter.assign(img_name, char)
+                self.stats[f"{split}_images"] += 1
+                yield split, img_name, char
+    
+    def _print_split_summary(self):
+        """แสดงผลการแบ่ง train/val หลังอ่านครบ"""
+        total = max(self.stats["train_images"] + self.stats["val_images"], 1)
+        print(f"✅ Train: {self.stats['train_images']:,} samples ({self.stats['train_images']/total*100:.1f}%)")
+        print(f"✅ Val: {self.stats['val_images']:,} samples ({self.stats['val_images']/total*100:.1f}%)")
+        print(f"✅ Classes: {len(self.splitter.class_counts):,}")
         
-        # Split train/validation
-        split_idx = int(len(all_data) * self.train_val_split)
-        train_data = all_data[:split_idx]
-        val_data = all_data[split_idx:]
+        short = self.splitter.classes_below_min_val()
+        if short:
+            print(f"⚠️ {len(short)} classes have fewer than {self.splitter.min_val_per_class} "
+                  f"validation samples (too few samples): {' '.join(short[:20])}")
+    
+    def _scan_source_images(self) -> set:
+        """อ่านรายชื่อไฟล์ใน images/ ครั้งเดียวด้วย os.scandir
         
-        self.stats["train_images"] = len(train_data)
-        self.stats["val_images"] = len(val_data)
+        ใช้แทนการเรียก exists() ทีละไฟล์ ซึ่งช้ามากบน network storage
+        """
+        if self._source_images is None:
+            images_dir = self.source_dir / "images"
+            with os.scandir(images_dir) as entries:
+                self._source_images = {entry.name for entry in entries if entry.is_file()}
+        return self._source_images
+    
+    def copy_images_and_create_labels(self, samples: Iterator[Tuple[str, str, str]]):
+        """คัดลอกภาพและสร้างไฟล์ label
         
-        print(f"✅ Train: {len(train_data):,} samples ({len(train_data)/len(all_data)*100:.1f}%)")
-        print(f"✅ Val: {len(val_data):,} samples ({len(val_data)/len(all_data)*100:.1f}%)")
+        Args:
+            samples: (split, img_name, char) จาก load_and_split_data()
         
-        return train_data, val_data
-    
-    def copy_images_and_create_labels(self, train_data: List[Tuple[str, str]], 
-                                    val_data: List[Tuple[str, str]]):
-        """คัดลอกภาพและสร้างไฟล์ label"""
+        ภาพถูกคัดลอก (หรืออ่านเพื่อเขียนลง LMDB) ใน thread pool ที่จำกัดจำนวนงานค้าง
+        ส่วน label และ LMDB index เขียนตามลำดับเดิมของข้อมูลเสมอ
+        ในโหมด lmdb บรรทัดที่ i ของ rec_gt_*.txt ตรงกับ key image-%09d ที่ i+1
+        """
         print("🖼️ Copying images and creating labels...")
+        print(f"  ⚙️ Workers: {self.workers}")
+        
+        lmdb_writers = None
+        if self.output_format == "lmdb":
+            from lmdb_dataset import LMDBSplitWriter
+            lmdb_root = self.output_dir / "train_data" / "rec" / "lmdb"
+            lmdb_writers = {split: LMDBSplitWriter(lmdb_root / split) for split in ["train", "val"]}
         
         source_images_dir = self.source_dir / "images"
-        train_dir = self.output_dir / "train_data" / "rec" / "thai_data" / "train"
-        val_dir = self.output_dir / "train_data" / "rec" / "thai_data" / "val"
+        rec_dir = self.output_dir / "train_data" / "rec"
+        split_dirs = {
+            "train": rec_dir / "thai_data" / "train",
+            "val": rec_dir / "thai_data" / "val"
+        }
+        label_counts = {"train": 0, "val": 0}
+        total = self.stats["total_images"]
         
-        train_labels = []
-        val_labels = []
+        if self.image_shape:
+            from preresize import preresize_bytes
         
-        # Process training data
-        print("  📋 Processing training data...")
-        for i, (img_name, char) in enumerate(train_data):
-            try:
-                # Copy image
-                src_path = source_images_dir / img_name
-                dst_path = train_dir / img_name
-                
-                if src_path.exists():
-                    shutil.copy2(src_path, dst_path)
-                    train_labels.append(f"{img_name}\t{char}")
-                    self.stats["processed"] += 1
-                else:
-                    print(f"  ⚠️ Missing image: {img_name}")
-                    self.stats["errors"] += 1
-                
-                if (i + 1) % 1000 == 0:
-                    print(f"    Processed {i+1:,}/{len(train_data):,} training images...")
+        def file_digest(path):
+            h = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            return h.hexdigest()
+        
+        def place(sample):
+            split, img_name, _ = sample
+            src_path = source_images_dir / img_name
+            st = os.stat(src_path)
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            if self.content_hash:
+                entry["blake2b"] = file_digest(src_path)
+            if self.image_shape:
+                entry["preresize"] = f"{'x'.join(map(str, self.image_shape))}/{self.image_encoding}"
             
-            except Exception as e:
-                print(f"  ❌ Error processing {img_name}: {e}")
-                self.stats["errors"] += 1
+            if lmdb_writers is None:
+                dst_path = split_dirs[split] / self._output_name(img_name)
+                previous = self.previous_manifest.get(img_name)
+                if previous is not None and previous["split"] == split \
+                        and all(previous.get(k) == v for k, v in entry.items()) \
+                        and (dst_path.exists() or dst_path.is_symlink()):
+                    return "reused", None, entry
+                action = "added" if previous is None else "updated"
+            
+            if lmdb_writers is None and not self.image_shape:
+                return action, self._place_image(src_path, dst_path), entry
+            
+            with open(src_path, 'rb') as f:
+                data = f.read()
+            if self.image_shape:
+                data = preresize_bytes(data, self.image_shape, self.image_encoding)
+            if lmdb_writers is not None:
+                return "added", data, entry
+            
+            if dst_path.exists() or dst_path.is_symlink():
+                dst_path.unlink()
+            with open(dst_path, 'wb') as f:
+                f.write(data)
+            return action, "resize", entry
         
-        # Process validation data
-        print("  📋 Processing validation data...")
-        for i, (img_name, char) in enumerate(val_data):
-            try:
-                # Copy image
-                src_path = source_images_dir / img_name
-                dst_path = val_dir / img_name
-                
-                if src_path.exists():
-                    shutil.copy2(src_path, dst_path)
-                    val_labels.append(f"{img_name}\t{char}")
-                    self.stats["processed"] += 1
-                else:
-                    print(f"  ⚠️ Missing image: {img_name}")
+        # เขียนลงไฟล์ .tmp แล้ว os.replace ตอนจบ (atomic)
+        label_paths = {split: rec_dir / f"rec_gt_{split}.txt" for split in ["train", "val"]}
+        manifest_path = self.output_dir / MANIFEST_FILE
+        current = {}
+        
+        started = time.perf_counter()
+        with open(f"{label_paths['train']}.tmp", 'w', encoding='utf-8') as train_f, \
+             open(f"{label_paths['val']}.tmp", 'w', encoding='utf-8') as val_f, \
+             open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as manifest_f:
+            label_files = {"train": train_f, "val": val_f}
+            manifest_f.write(json.dumps({"meta": self._manifest_meta()}) + "\n")
+            
+            for i, (sample, result, error) in enumerate(self._run_ordered(place, samples)):
+                split, img_name, char = sample
+                if error is not None:
+                    print(f"  ❌ Error processing {img_name}: {error}")
                     self.stats["errors"] += 1
+                    continue
+                
+                action, payload, entry = result
+                if action != "reused":
+                    if lmdb_writers is not None:
+                        lmdb_writers[split].add(payload, char)
+                    else:
+                        self.stats["link_modes"][payload] = self.stats["link_modes"].get(payload, 0) + 1
+                    self.stats["bytes"] += entry["size"]
+                self.stats[action] += 1
+                self.stats["processed"] += 1
+                output_name = self._output_name(img_name)
+                label_files[split].write(f"thai_data/{split}/{output_name}\t{char}\n")  # Add path prefix
+                label_counts[split] += 1
+                
+                current[img_name] = (split, output_name)
+                manifest_entry = {"name": img_name, "split": split, "label": char, **entry}
+                if output_name != img_name:
+                    manifest_entry["output"] = output_name
+                manifest_f.write(json.dumps(manifest_entry, ensure_ascii=False) + "\n")
                 
                 if (i + 1) % 1000 == 0:
-                    print(f"    Processed {i+1:,}/{len(val_data):,} validation images...")
-            
+                    print(f"    Processed {i+1:,}/{total:,} images...")
+        
+        for split, path in label_paths.items():
+            os.replace(f"{path}.tmp", path)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        
+        if lmdb_writers is None:
+            self._remove_stale_outputs(current, split_dirs)
+        
+        if lmdb_writers is not None:
+            for split, writer in lmdb_writers.items():
+                writer.close()
+                print(f"📦 LMDB {split}: {writer.count:,} samples -> {writer.path}")
+        
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stats["copy_seconds"] = elapsed
+        self.stats["files_per_sec"] = self.stats["processed"] / elapsed
+        self.stats["mb_per_sec"] = self.stats["bytes"] / (1024 * 1024) / elapsed
+        
+        self._print_split_summary()
+        if self.previous_manifest:
+            print(f"♻️ Reused: {self.stats['reused']:,} | Added: {self.stats['added']:,} | "
+                  f"Updated: {self.stats['updated']:,} | Removed: {self.stats['removed']:,}")
+        print(f"✅ Copied {self.stats['processed'] - self.stats['reused']:,} images")
+        print(f"✅ Created {label_counts['train']:,} training labels")
+        print(f"✅ Created {label_counts['val']:,} validation labels")
+        print(f"⚡ Throughput: {self.stats['files_per_sec']:,.0f} files/sec, "
+              f"{self.stats['mb_per_sec']:,.1f} MB/sec ({elapsed:.1f}s)")
+        self._print_link_mode_summary()
+        self._write_missing_report()
+        if self.integrity_checker is not None:
+            self.integrity_checker.write_report(self.output_dir / "integrity_report.json")
+    
+    def _remove_stale_outputs(self, current: Dict[str, Tuple[str, str]], split_dirs: Dict[str, Path]):
+        """ลบภาพของ sample ที่หายไปจาก source ย้าย split หรือเปลี่ยนชื่อไฟล์ output"""
+        for img_name, previous in self.previous_manifest.items():
+            previous_output = previous.get("output", img_name)
+            if current.get(img_name) == (previous["split"], previous_output):
+                continue
+            if img_name not in current:
+                self.stats["removed"] += 1
+            stale_path = split_dirs[previous["split"]] / previous_output
+            if stale_path.exists() or stale_path.is_symlink():
+                stale_path.unlink()
+    
+    def _run_ordered(self, func, items):
+        """รัน func กับทุก item ใน thread pool และคืนผลตามลำดับเดิม
+        
+        จำกัดงานค้างไว้ที่ workers * 4 เพื่อให้หน่วยความจำคงที่
+        แม้จะมีไฟล์หลายล้านไฟล์
+        
+        Yields:
+            (item, result, error) ตามลำดับของ items
+        """
+        max_in_flight = self.workers * 4
+        pending = deque()
+        
+        def resolve(item, future):
+            try:
+                return item, future.result(), None
             except Exception as e:
-                print(f"  ❌ Error processing {img_name}: {e}")
-                self.stats["errors"] += 1
+                return item, None, e
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for item in items:
+                pending.append((item, pool.submit(func, item)))
+                if len(pending) >= max_in_flight:
+                    yield resolve(*pending.popleft())
+            while pending:
+                yield resolve(*pending.popleft())
+    
+    def _write_missing_report(self):
+        """บันทึกรายชื่อภาพที่มีใน labels.txt แต่ไม่มีใน images/"""
+        if not self.missing_images:
+            return
         
-        # Save label files (PaddleOCR format)
-        train_label_file = self.output_dir / "train_data" / "rec" / "rec_gt_train.txt"
-        val_label_file = self.output_dir / "train_data" / "rec" / "rec_gt_val.txt"
+        missing_file = self.output_dir / "missing_images.txt"
+        with open(missing_file, 'w', encoding='utf-8') as f:
+            for img_name in self.missing_images:
+                f.write(f"{img_name}\n")
         
-        # Training labels
-        with open(train_label_file, 'w', encoding='utf-8') as f:
-            for label in train_labels:
-                f.write(f"thai_data/train/{label}\n")  # Add path prefix
+        print(f"⚠️ Missing images: {len(self.missing_images):,} (first: {', '.join(self.missing_images[:5])})")
+        print(f"📄 Missing-file report: {missing_file}")
+    
+    def _place_image(self, src_path: Path, dst_path: Path) -> str:
+        """นำภาพเข้า output ตาม link_mode พร้อม fallback ต่อไฟล์
+        
+        Returns:
+            วิธีที่ใช้จริงกับไฟล์นี้
+        """
+        if dst_path.exists() or dst_path.is_symlink():
+            dst_path.unlink()
         
-        # Validation labels  
-        with open(val_label_file, 'w', encoding='utf-8') as f:
-            for label in val_labels:
-                f.write(f"thai_data/val/{label}\n")  # Add path prefix
+        last_error = None
+        for mode in LINK_MODE_FALLBACKS[self.link_mode]:
+            if mode in self._unsupported_modes:
+                continue
+            try:
+                place_file(src_path, dst_path, mode)
+            except OSError as e:
+                last_error = e
+                if mode != "copy" and e.errno in _UNSUPPORTED_ERRNOS:
+                    with self._lock:
+                        if mode not in self._unsupported_modes:
+                            print(f"  ⚠️ {mode} not available ({e.strerror}), falling back")
+                        self._unsupported_modes.add(mode)
+                continue
+            
+            return mode
         
-        print(f"✅ Copied {self.stats['processed']:,} images")
-        print(f"✅ Created {len(train_labels):,} training labels")
-        print(f"✅ Created {len(val_labels):,} validation labels")
+        raise last_error or OSError(f"No usable link mode for {src_path}")
+    
+    def _print_link_mode_summary(self):
+        """แสดงจำนวนไฟล์ตามวิธีที่ใช้จริง"""
+        if not self.stats["link_modes"]:
+            return
+        used = ", ".join(f"{mode}: {count:,}" for mode, count in self.stats["link_modes"].items())
+        print(f"🔗 Link modes used: {used}")
+        if self.stats["link_modes"].get("hardlink"):
+            print("⚠️  WARNING: hardlinked images share the inode with the raw images - editing either one "
+                  "in place changes both (use --link-mode copy/reflink for independent files)")
     
     def copy_dictionary_and_corpus(self):
         """คัดลอกไฟล์ dictionary และ corpus"""
@@ -227,11 +649,12 @@ class PaddleOCRDatasetConverter:
             shutil.copy2(src_dict, dst_dict)
             print(f"✅ Dictionary copied: {dst_dict}")
             
-            # Count characters
-            with open(src_dict, 'r', encoding='utf-8') as f:
-                chars = [line.strip() for line in f if line.strip()]
+            # คอมไพล์ไว้ข้าง dictionary (th_dict.txt.trie) ให้ validator / evaluation ใช้ต่อ
+            from compiled_dictionary import CompiledDictionary
+            with CompiledDictionary(dst_dict) as dictionary:
+                chars = [unit for unit in dictionary.units if unit.strip()]
             self.stats["characters"] = len(chars)
-            print(f"📊 Dictionary contains {len(chars)} characters")
+            print(f"📊 Dictionary contains {len(chars)} characters (compiled: {dst_dict.name}.trie)")
         else:
             print("⚠️ th_dict.txt not found in thai-letters/")
         
@@ -254,6 +677,8 @@ class PaddleOCRDatasetConverter:
         """สร้างไฟล์ config สำหรับ PaddleOCR"""
         print("⚙️ Creating PaddleOCR config files...")
         
+        image_shape = self.image_shape or [3, 64, 256]
+        
         # Training config
         config = {
             "Global": {
@@ -298,7 +723,7 @@ class PaddleOCRDatasetConverter:
                 "Transform": None,
                 "Backbone": {
                     "name": "SVTRNet",
-                    "img_size": [64, 256],
+                    "img_size": image_shape[1:],
                     "out_char_num": 25,
                     "out_channels": 192,
                     "patch_merging": "Conv",
@@ -336,7 +761,7 @@ class PaddleOCRDatasetConverter:
                         {"RecConAug": {"prob": 0.5, "ext_data_num": 2, "image_shape": [48, 320, 3], "max_text_length": 25}},
                         {"RecAug": {}},
                         {"MultiLabelEncode": {}},
-                        {"RecResizeImg": {"image_shape": [3, 64, 256]}},
+                        {"RecResizeImg": {"image_shape": image_shape}},
                         {"KeepKeys": {"keep_keys": ["image", "label", "length", "valid_ratio"]}}
                     ]
                 },
@@ -355,7 +780,7 @@ class PaddleOCRDatasetConverter:
                     "transforms": [
                         {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
                         {"MultiLabelEncode": {}},
-                        {"RecResizeImg": {"image_shape": [3, 64, 256]}},
+                        {"RecResizeImg": {"image_shape": image_shape}},
                         {"KeepKeys": {"keep_keys": ["image", "label", "length", "valid_ratio"]}}
                     ]
                 },
@@ -368,6 +793,13 @@ class PaddleOCRDatasetConverter:
             }
         }
         
+        if self.output_format == "lmdb":
+            for section, split in [("Train", "train"), ("Eval", "val")]:
+                dataset = config[section]["dataset"]
+                dataset["name"] = "LMDBDataSet"
+                dataset["data_dir"] = f"./train_data/rec/lmdb/{split}/"
+                dataset.pop("label_file_list")
+        
         # Save config file
         config_file = self.output_dir / "thai_svtr_tiny_config.yml"
         
@@ -378,6 +810,50 @@ class PaddleOCRDatasetConverter:
             f.write(yaml_content)
         
         print(f"✅ Config saved: {config_file}")
+        
+        if self.image_shape:
+            self._create_preresized_config(config)
+        
+        if self.output_format == "lmdb":
+            self._create_lmdb_config_snippet()
+    
+    def _create_preresized_config(self, config: Dict):
+        """config variant สำหรับภาพที่ pre-resize แล้ว: ไม่มี RecResizeImg / RecConAug / RecAug"""
+        from preresize import preresized_transforms
+        
+        variant = json.loads(json.dumps(config))
+        for section in ["Train", "Eval"]:
+            dataset = variant[section]["dataset"]
+            label_op = next(op for op in dataset["transforms"] if list(op)[0].endswith("LabelEncode"))
+            dataset["transforms"] = preresized_transforms(label_op)
+            dataset.pop("ext_op_transform_idx", None)
+        
+        config_file = self.output_dir / "thai_svtr_tiny_preresized_config.yml"
+        with open(config_file, 'w', encoding='utf-8') as f:
+            f.write("# Images are already resized + padded to "
+                    f"{self.image_shape}: NormalizeImage + ToCHWImage replace RecResizeImg\n")
+            f.write(self._dict_to_yaml(variant, 0))
+        
+        print(f"✅ Pre-resized config saved: {config_file}")
+    
+    def _create_lmdb_config_snippet(self):
+        """สร้าง dataset snippet (LMDBDataSet) สำหรับ merge เข้า configs/rec/*.yml"""
+        from lmdb_dataset import lmdb_dataset_snippet
+        
+        # path เทียบกับ project root ให้ตรงกับ configs/rec/*.yml
+        project_root = Path(__file__).resolve().parent.parent
+        rel_root = f"{Path(os.path.relpath(self.output_dir.resolve(), project_root)).as_posix()}/train_data/rec/lmdb"
+        snippet = lmdb_dataset_snippet(rel_root, self.image_shape, pre_resized=bool(self.image_shape))
+        
+        snippet_file = self.output_dir / "thai_rec_lmdb_dataset.yml"
+        header = (
+            "# LMDBDataSet sections for configs/rec/*.yml\n"
+            "# Replace Train.dataset and Eval.dataset with these blocks (label_file_list is not used)\n"
+        )
+        with open(snippet_file, 'w', encoding='utf-8') as f:
+            f.write(header + self._dict_to_yaml(snippet, 0))
+        
+        print(f"✅ LMDB config snippet saved: {snippet_file}")
     
     def _dict_to_yaml(self, data, indent_level):
         """Convert dict to YAML format (simple implementation)"""
@@ -411,6 +887,16 @@ class PaddleOCRDatasetConverter:
         report_file = self.output_dir / "PHASE1_PADDLEOCR_CONVERSION_REPORT.md"
         
         success_rate = ((self.stats["processed"] / self.stats["total_images"]) * 100) if self.stats["total_images"] > 0 else 0
+        link_modes_used = ", ".join(f"{mode} {count:,}" for mode, count in self.stats["link_modes"].items()) or "none"
+        
+        if self.output_format == "lmdb":
+            data_tree = f"""│   │   ├── lmdb/
+│   │   │   ├── train/           # {self.stats['train_images']:,} training samples (LMDBDataSet)
+│   │   │   └── val/             # {self.stats['val_images']:,} validation samples (LMDBDataSet)"""
+        else:
+            data_tree = f"""│   │   ├── thai_data/
+│   │   │   ├── train/           # {self.stats['train_images']:,} training images
+│   │   │   └── val/             # {self.stats['val_images']:,} validation images"""
         
         report_content = f"""# 🔥 Phase 1: PaddleOCR Dataset Conversion Report
 
@@ -427,6 +913,12 @@ class PaddleOCRDatasetConverter:
 - **Thai Characters:** {self.stats['characters']:,}
 - **Success Rate:** {success_rate:.2f}%
 - **Errors:** {self.stats['errors']}
+- **Link Mode:** {self.link_mode} (used: {link_modes_used})
+- **Pre-resize:** {f"{self.image_shape} ({self.image_encoding}), see `thai_svtr_tiny_preresized_config.yml`" if self.image_shape else "off (RecResizeImg at train time)"}
+- **Incremental:** reused {self.stats['reused']:,}, added {self.stats['added']:,}, updated {self.stats['updated']:,}, removed {self.stats['removed']:,}
+- **Missing Images:** {len(self.missing_images):,}{" (see `missing_images.txt`)" if self.missing_images else ""}
+- **Integrity Check:** {f"{len(self.bad_images):,} bad images skipped (see `integrity_report.json`)" if self.integrity_checker else "not run (use --check-integrity)"}
+- **Throughput:** {self.stats.get('files_per_sec', 0):,.0f} files/sec, {self.stats.get('mb_per_sec', 0):,.1f} MB/sec ({self.workers} workers)
 
 ## 📁 PaddleOCR Dataset Structure
 
@@ -434,12 +926,11 @@ class PaddleOCRDatasetConverter:
 {self.output_dir.name}/
 ├── train_data/
 │   ├── rec/
-│   │   ├── thai_data/
-│   │   │   ├── train/           # {self.stats['train_images']:,} training images
-│   │   │   └── val/             # {self.stats['val_images']:,} validation images
+{data_tree}
 │   │   ├── rec_gt_train.txt     # Training labels (PaddleOCR format)
 │   │   └── rec_gt_val.txt       # Validation labels (PaddleOCR format)
 │   ├── th_dict.txt              # Thai character dictionary ({self.stats['characters']} chars)
+│   ├── th_dict.txt.trie         # Compiled dictionary (trie + hash index, mmap)
 │   └── th_corpus.txt            # Thai text corpus
 ├── thai_svtr_tiny_config.yml    # PaddleOCR training configuration
 └── PHASE1_PADDLEOCR_CONVERSION_REPORT.md
@@ -520,6 +1011,35 @@ tensorboard --logdir=./output/rec_thai_svtr_tiny/
         
         print(f"📋 Report saved: {report_file}")
     
+    def run_read_benchmark(self, samples: int = 2000):
+        """วัด random-access read ของ LMDB (val) เทียบกับ file tree ต้นฉบับ"""
+        from lmdb_dataset import benchmark_random_access, print_benchmark, read_label_paths
+        
+        rec_dir = self.output_dir / "train_data" / "rec"
+        image_paths = read_label_paths(rec_dir / "rec_gt_val.txt", self.source_dir / "images", flat=True)
+        results = benchmark_random_access(rec_dir / "lmdb" / "val", image_paths, samples)
+        print_benchmark(results)
+        
+        with open(self.output_dir / "lmdb_read_benchmark.json", 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        return results
+    
+    def run_loader_benchmark(self, samples: int = 2000):
+        """วัด data-loader transform throughput: RecResizeImg บนภาพต้นฉบับ vs ภาพที่ pre-resize แล้ว"""
+        from preresize import benchmark_loader, print_loader_benchmark
+        from lmdb_dataset import read_label_paths
+        
+        rec_dir = self.output_dir / "train_data" / "rec"
+        preresized_paths = read_label_paths(rec_dir / "rec_gt_val.txt", rec_dir)
+        source_names = {Path(self._output_name(name)).stem: name for name in self._scan_source_images()}
+        raw_paths = [self.source_dir / "images" / source_names.get(p.stem, p.name) for p in preresized_paths]
+        results = benchmark_loader(raw_paths, preresized_paths, self.image_shape, samples)
+        print_loader_benchmark(results)
+        
+        with open(self.output_dir / "loader_benchmark.json", 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        return results
+    
     def convert_dataset(self):
         """แปลง dataset หลัก"""
         print("🚀 Starting PaddleOCR dataset conversion...")
@@ -534,11 +1054,8 @@ tensorboard --logdir=./output/rec_thai_svtr_tiny/
             # Step 2: Create structure
             self.create_paddleocr_structure()
             
-            # Step 3: Load and split data
-            train_data, val_data = self.load_and_split_data()
-            
-            # Step 4: Copy images and create labels
-            self.copy_images_and_create_labels(train_data, val_data)
+            # Step 3 + 4: Stream labels, split, copy images and create labels
+            self.copy_images_and_create_labels(self.load_and_split_data())
             
             # Step 5: Copy dictionary and corpus
             self.copy_dictionary_and_corpus()
@@ -549,6 +1066,12 @@ tensorboard --logdir=./output/rec_thai_svtr_tiny/
             # Step 7: Generate report
             self.generate_report()
             
+            # Step 8 (optional): Random-access read benchmark
+            if self.benchmark and self.output_format == "lmdb":
+                self.run_read_benchmark()
+            if self.benchmark and self.image_shape and self.output_format == "tree":
+                self.run_loader_benchmark()
+            
             print("=" * 60)
             print("✅ PaddleOCR Dataset Conversion Complete!")
             print(f"📁 Output: {self.output_dir}")
@@ -570,6 +1093,32 @@ def main():
                        help="Source dataset directory")
     parser.add_argument("--split", type=float, default=0.8,
                        help="Train/validation split ratio (default: 0.8)")
+    parser.add_argument("--split-salt", type=str, default="thai-ocr",
+                       help="Salt for the hash-based train/val split; same salt = same split (default: thai-ocr)")
+    parser.add_argument("--min-val-per-class", type=int, default=1,
+                       help="Minimum validation samples per character (default: 1)")
+    parser.add_argument("--output-dir", type=str, default=None,
+                       help="Convert into this directory. If it holds a previous conversion, only new or "
+                            "changed samples are processed (default: new datasets/converted/train_data_thai_paddleocr_<timestamp>)")
+    parser.add_argument("--content-hash", action="store_true",
+                       help="Detect changed images by content hash instead of size + mtime")
+    parser.add_argument("--check-integrity", action="store_true",
+                       help="Decode every source image and check labels against th_dict.txt; unusable images are skipped")
+    parser.add_argument("--link-mode", type=str, default="auto", choices=LINK_MODES,
+                       help="How images enter the output tree: auto uses a copy-on-write reflink when "
+                            "the filesystem supports it, otherwise a copy. hardlink must be chosen explicitly "
+                            "(shares the inode with the raw image) (default: auto)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="I/O threads for placing images (default: min(32, CPU * 4))")
+    parser.add_argument("--format", type=str, default="tree", choices=OUTPUT_FORMATS,
+                       help="Output layout: tree (images + rec_gt_*.txt) or lmdb (LMDBDataSet) (default: tree)")
+    parser.add_argument("--image-shape", type=str, default=None,
+                       help="Pre-resize + pad images to the model input C,H,W, e.g. 3,32,100 (CRNN) or 3,64,256 (SVTR)")
+    parser.add_argument("--image-encoding", type=str, default="png", choices=["png", "gray-png", "bmp"],
+                       help="File format of pre-resized images (default: png)")
+    parser.add_argument("--benchmark", action="store_true",
+                       help="With --format lmdb: compare random-access samples/sec against the file tree; "
+                            "with --image-shape: compare data-loader transform throughput before/after")
     
     args = parser.parse_args()
     
@@ -582,10 +1131,24 @@ def main():
         print(f"❌ Source directory not found: {args.source_dir}")
         sys.exit(1)
     
+    if args.image_shape:
+        from preresize import parse_image_shape
+    
     # Initialize converter
     converter = PaddleOCRDatasetConverter(
         source_dataset_dir=args.source_dir,
-        train_val_split=args.split
+        train_val_split=args.split,
+        link_mode=args.link_mode,
+        workers=args.workers,
+        output_format=args.format,
+        benchmark=args.benchmark,
+        split_salt=args.split_salt,
+        min_val_per_class=args.min_val_per_class,
+        output_dir=args.output_dir,
+        content_hash=args.content_hash,
+        check_integrity=args.check_integrity,
+        image_shape=parse_image_shape(args.image_shape) if args.image_shape else None,
+        image_encoding=args.image_encoding
     )
     
     # Convert dataset
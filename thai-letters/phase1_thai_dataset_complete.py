@@ -40,7 +40,8 @@ class ThaiDatasetPhase1:
     def __init__(self, 
                  output_dir: str = None,
                  samples_per_char: int = 10,
-                 train_val_split: float = 0.8):
+                 train_val_split: float = 0.8,
+                 corpus_size: int = 15000):
         """
         Initialize Thai Dataset Generator Phase 1
         
@@ -48,11 +49,13 @@ class ThaiDatasetPhase1:
             output_dir: Output directory for dataset
             samples_per_char: Number of samples per character
             train_val_split: Train/validation split ratio
+            corpus_size: Target number of unique words in th_corpus.txt
         """
         self.timestamp = datetime.now().strftime("%m%d_%H%M")
         self.output_dir = output_dir or f"train_data_thai_phase1_{self.timestamp}"
         self.samples_per_char = samples_per_char
         self.train_val_split = train_val_split
+        self.corpus_size = corpus_size
         
         # Dataset statistics
         self.stats = {
@@ -77,8 +80,10 @@ class ThaiDatasetPhase1:
         """Load Thai characters from dictionary"""
         dict_path = Path(__file__).parent / "th_dict.txt"
         if dict_path.exists():
-            with open(dict_path, 'r', encoding='utf-8') as f:
-                chars = [line.strip() for line in f if line.strip()]
+            sys.path.append(str(Path(__file__).parent))
+            from compiled_dictionary import CompiledDictionary
+            with CompiledDictionary(dict_path) as dictionary:
+                chars = [unit.strip() for unit in dictionary.units if unit.strip()]
             return [c for c in chars if self._is_thai_character(c)]
         else:
             # Default Thai character set
@@ -368,79 +373,51 @@ class ThaiDatasetPhase1:
         base_path = Path(self.output_dir)
         dict_file = base_path / "train_data" / "th_dict.txt"
         
-        # Clean and optimize dictionary
-        clean_chars = []
-        for char in self.thai_chars:
-            if char and self._is_thai_character(char):
-                if char not in clean_chars:
-                    clean_chars.append(char)
-        
-        # Sort by Unicode order
-        clean_chars.sort()
+        # Clean and optimize dictionary (set: ไม่ต้องสแกน list ทุกตัว)
+        clean_chars = sorted({char for char in self.thai_chars
+                              if char and self._is_thai_character(char)})
         
         # Save dictionary
         with open(dict_file, 'w', encoding='utf-8') as f:
             for char in clean_chars:
                 f.write(f"{char}\n")
         
+        # คอมไพล์ไว้ข้าง dictionary (th_dict.txt.trie)
+        sys.path.append(str(Path(__file__).parent))
+        from compiled_dictionary import compile_dictionary
+        compile_dictionary(dict_file)
+        
         print(f"✅ Dictionary created with {len(clean_chars)} characters")
         print(f"📁 Saved to: {dict_file}")
         
         return clean_chars
     
     def create_corpus_file(self):
-        """1.3 สร้างไฟล์ Corpus (th_corpus.txt)"""
+        """1.3 สร้างไฟล์ Corpus (th_corpus.txt)
+
+        คำจริงจาก thai_corpus.txt + คำสังเคราะห์จาก character n-gram model
+        จนครบ corpus_size (ดู corpus_builder.py) เขียนแบบ streaming แยก bucket ตามความยาว
+        แล้วต่อกันเป็น th_corpus.txt ที่เรียงตามความยาว
+        """
         print("📖 1.3 Creating Thai corpus file...")
         
+        sys.path.append(str(Path(__file__).parent))
+        from corpus_builder import build_corpus
+        
         base_path = Path(self.output_dir)
         corpus_file = base_path / "train_data" / "th_corpus.txt"
+        chunks_dir = base_path / "train_data" / "corpus_chunks"
         
-        # Expand corpus if needed
-        expanded_corpus = self.thai_corpus.copy()
-        
-        # Generate additional words from character combinations
-        if len(expanded_corpus) < 10000:
-            print("🔄 Expanding corpus with synthetic words...")
-            synthetic_words = self._generate_synthetic_words(5000)
-            expanded_corpus.extend(synthetic_words)
-        
-        # Remove duplicates and sort
-        unique_corpus = list(set(expanded_corpus))
-        unique_corpus.sort(key=len)  # Sort by length
-        
-        # Save corpus
-        with open(corpus_file, 'w', encoding='utf-8') as f:
-            for word in unique_corpus:
-                f.write(f"{word}\n")
-        
-        print(f"✅ Corpus created with {len(unique_corpus)} words")
-        print(f"📁 Saved to: {corpus_file}")
+        if len(self.thai_corpus) < self.corpus_size:
+            print(f"🔄 Expanding corpus with n-gram synthetic words (target: {self.corpus_size:,})...")
+        builder = build_corpus(chunks_dir, self.thai_corpus, self.corpus_size)
+        builder.merge(corpus_file)
         
-        return unique_corpus
-    
-    def _generate_synthetic_words(self, count: int) -> List[str]:
-        """Generate synthetic Thai words"""
-        words = []
-        consonants = "กขคงจชซญดตถทนบปผพฟมยรลวสห"
-        vowels = "ะาิีึืุูเแโใไ"
+        print(f"✅ Corpus created with {builder.total:,} words "
+              f"({builder.duplicates:,} duplicates skipped)")
+        print(f"📁 Saved to: {corpus_file} (length buckets: {chunks_dir})")
         
-        for _ in range(count):
-            # Generate words of length 2-8
-            word_len = random.randint(2, 8)
-            word = ""
-            
-            for i in range(word_len):
-                if i == 0 or random.random() < 0.7:
-                    # Start with consonant or mostly consonants
-                    word += random.choice(consonants)
-                else:
-                    # Add vowel
-                    word += random.choice(vowels)
-            
-            if len(word) >= 2 and word not in words:
-                words.append(word)
-        
-        return words
+        return builder.total
     
     def create_annotation_tool(self):
         """1.4 ติดป้ายกำกับข้อมูล (Annotation Helper)"""
@@ -504,6 +481,9 @@ if __name__ == "__main__":
         """1.5 จัดโครงสร้างชุดข้อมูล - Validation"""
         print("✅ 1.5 Validating dataset structure...")
         
+        sys.path.append(str(Path(__file__).parent))
+        from label_index import count_labels
+        
         base_path = Path(self.output_dir)
         
         # Check required files and directories
@@ -527,9 +507,11 @@ if __name__ == "__main__":
                 if path.is_dir():
                     count = len(list(path.glob("*")))
                     print(f"✅ {item} - {count} files")
+                elif path.name.startswith("rec_gt_"):
+                    print(f"✅ {item} - {count_labels(path)} lines")
                 else:
                     with open(path, 'r', encoding='utf-8') as f:
-                        lines = len(f.readlines())
+                        lines = sum(1 for _ in f)
                     print(f"✅ {item} - {lines} lines")
             else:
                 print(f"❌ {item} - Missing")
@@ -537,7 +519,10 @@ if __name__ == "__main__":
         # Validate label file format
         self._validate_label_format()
         
-        return all(validation_results.values())
+        # Decode images and check labels against th_dict.txt
+        integrity_ok = self._check_integrity() if all(validation_results.values()) else False
+        
+        return all(validation_results.values()) and integrity_ok
     
     def _validate_label_format(self):
         """Validate label file format"""
@@ -561,6 +546,16 @@ if __name__ == "__main__":
                 
                 print(f"✅ {label_file} format validation passed")
     
+    def _check_integrity(self) -> bool:
+        """ตรวจภาพเสีย ขนาดผิด และ label นอก dictionary (process pool)"""
+        from dataset_integrity_checker import DatasetIntegrityChecker
+        
+        checker = DatasetIntegrityChecker(self.output_dir)
+        checker.run()
+        checker.print_summary()
+        checker.write_report()
+        return checker.stats["bad"] == 0
+    
     def generate_complete_dataset(self):
         """Generate complete Phase 1 dataset"""
         print("🚀 Starting Phase 1: Complete Thai Dataset Generation")
@@ -714,6 +709,8 @@ def main():
                        help="Output directory (default: auto-generated)")
     parser.add_argument("--split", type=float, default=0.8,
                        help="Train/validation split ratio (default: 0.8)")
+    parser.add_argument("--corpus-size", type=int, default=15000,
+                       help="Unique words in th_corpus.txt, filled with n-gram synthetic words (default: 15000)")
     
     args = parser.parse_args()
     
@@ -725,7 +722,8 @@ def main():
     generator = ThaiDatasetPhase1(
         output_dir=args.output,
         samples_per_char=args.samples,
-        train_val_split=args.split
+        train_val_split=args.split,
+        corpus_size=args.corpus_size
     )
     
     # Generate complete dataset
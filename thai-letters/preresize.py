@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📐 Pre-resize สำหรับ Recognition Dataset
+ย่อ + pad ภาพให้เท่ากับ input shape ของโมเดลตั้งแต่ตอนแปลง dataset
+แทนที่จะให้ RecResizeImg ทำซ้ำทุก epoch
+
+ผลลัพธ์ตรงกับ RecResizeImg ของ PaddleOCR (resize_norm_img):
+    - ย่อให้สูง = H โดยรักษาอัตราส่วน (กว้างไม่เกิน W) ด้วย cv2.resize (bilinear)
+    - pad ด้านขวาจนกว้าง = W
+RecResizeImg pad หลัง normalize ด้วย 0.0 ซึ่งเท่ากับ pixel 127.5
+จึง pad ด้วย 128 (ต่างกันไม่เกิน 0.004 หลัง normalize)
+
+ใช้งาน (benchmark data loader):
+    python preresize.py <raw_images_dir> <preresized_images_dir> --image-shape 3,32,100
+"""
+
+import sys
+import math
+import time
+import random
+from pathlib import Path
+from typing import Dict, List
+
+# รูปแบบไฟล์ที่เขียน: ทุกแบบ decode ได้ด้วย DecodeImage (cv2.imdecode) ของ PaddleOCR
+#   png      -> lossless, ไฟล์เล็ก
+#   gray-png -> 1 channel, DecodeImage (BGR) ขยายเป็น 3 channel ให้เอง
+#   bmp      -> ไม่บีบอัด (raw array + header) decode เร็วที่สุด แต่ไฟล์ใหญ่
+IMAGE_ENCODINGS = {"png": ".png", "gray-png": ".png", "bmp": ".bmp"}
+
+PAD_VALUE = 128
+
+
+def _import_cv2():
+    """import cv2 แบบ lazy เพื่อให้ converter ที่ไม่ใช้ pre-resize ไม่ต้องติดตั้ง"""
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        raise ImportError("opencv-python and numpy are required for --image-shape: pip install opencv-python numpy")
+    return cv2, np
+
+
+def parse_image_shape(value: str) -> List[int]:
+    """'3,32,100' -> [3, 32, 100]"""
+    shape = [int(v) for v in value.replace("x", ",").split(",")]
+    if len(shape) != 3 or shape[0] != 3:
+        raise ValueError(f"image_shape must be C,H,W with C=3 (DecodeImage always yields 3 channels), got {value!r}")
+    return shape
+
+
+def resize_and_pad(img, image_shape: List[int]):
+    """ย่อ + pad แบบเดียวกับ RecResizeImg แต่คืนค่าเป็น uint8 (H, W[, C])"""
+    cv2, np = _import_cv2()
+    _, img_h, img_w = image_shape
+    h, w = img.shape[:2]
+    resized_w = min(img_w, int(math.ceil(img_h * w / float(h))))
+    resized = cv2.resize(img, (resized_w, img_h))
+
+    padded = np.full((img_h, img_w) + img.shape[2:], PAD_VALUE, dtype=np.uint8)
+    padded[:, :resized_w] = resized
+    return padded
+
+
+def preresize_bytes(data: bytes, image_shape: List[int], encoding: str = "png") -> bytes:
+    """decode -> resize + pad -> encode ใหม่
+
+    Args:
+        data: bytes ของภาพต้นฉบับ (JPEG/PNG)
+        encoding: png, gray-png หรือ bmp
+    """
+    cv2, np = _import_cv2()
+    flag = cv2.IMREAD_GRAYSCALE if encoding == "gray-png" else cv2.IMREAD_COLOR
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if img is None:
+        raise ValueError("cannot decode image")
+
+    ok, encoded = cv2.imencode(IMAGE_ENCODINGS[encoding], resize_and_pad(img, image_shape))
+    if not ok:
+        raise ValueError(f"cannot encode image as {encoding}")
+    return encoded.tobytes()
+
+
+def preresized_transforms(label_op: Dict) -> List[Dict]:
+    """transforms สำหรับภาพที่ pre-resize แล้ว: NormalizeImage + ToCHWImage แทน RecResizeImg
+
+    op ที่เปลี่ยนขนาดภาพ (RecConAug, RecAug) ใช้ไม่ได้เพราะ batch ต้องมี shape เดียวกัน
+    """
+    return [
+        {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
+        label_op,
+        {"NormalizeImage": {"scale": 1.0 / 255.0, "mean": [0.5, 0.5, 0.5],
+                            "std": [0.5, 0.5, 0.5], "order": "hwc"}},
+        {"ToCHWImage": {}},
+        {"KeepKeys": {"keep_keys": ["image", "label", "length"]}}
+    ]
+
+
+def _rec_resize_norm(img, image_shape: List[int]):
+    """RecResizeImg ของ PaddleOCR (สำหรับ benchmark "ก่อน")"""
+    cv2, np = _import_cv2()
+    img_c, img_h, img_w = image_shape
+    h, w = img.shape[:2]
+    resized_w = min(img_w, int(math.ceil(img_h * w / float(h))))
+    resized = cv2.resize(img, (resized_w, img_h)).astype('float32')
+    resized = resized.transpose((2, 0, 1)) / 255
+    resized -= 0.5
+    resized /= 0.5
+    padded = np.zeros((img_c, img_h, img_w), dtype=np.float32)
+    padded[:, :, :resized_w] = resized
+    return padded
+
+
+def _normalize_chw(img):
+    """NormalizeImage + ToCHWImage (สำหรับ benchmark "หลัง")"""
+    _, np = _import_cv2()
+    img = (img.astype('float32') * (1.0 / 255.0) - 0.5) / 0.5
+    return img.transpose((2, 0, 1))
+
+
+def benchmark_loader(raw_paths: List[Path], preresized_paths: List[Path],
+                     image_shape: List[int], samples: int = 2000, seed: int = 0) -> Dict:
+    """วัด samples/sec ของ transform pipeline ต่อภาพ (อ่านไฟล์ + decode + resize/normalize)
+
+    จำลองงานของ DataLoader worker 1 ตัว ไม่รวม augmentation และ label encode
+    และตรวจว่า tensor ที่ได้ตรงกับ RecResizeImg (max_abs_diff)
+    """
+    cv2, np = _import_cv2()
+    rng = random.Random(seed)
+    results = {"samples": samples, "image_shape": image_shape}
+
+    def decode(path):
+        with open(path, 'rb') as f:
+            return cv2.imdecode(np.frombuffer(f.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    pairs = [(r, p) for r, p in zip(raw_paths, preresized_paths) if r.exists() and p.exists()]
+    if not pairs:
+        return results
+    picks = [pairs[rng.randrange(len(pairs))] for _ in range(samples)]
+
+    started = time.perf_counter()
+    for raw_path, _ in picks:
+        _rec_resize_norm(decode(raw_path), image_shape)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    results["rec_resize_img"] = {"samples_per_sec": samples / elapsed}
+
+    started = time.perf_counter()
+    for _, preresized_path in picks:
+        _normalize_chw(decode(preresized_path))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    results["preresized"] = {"samples_per_sec": samples / elapsed}
+
+    results["speedup"] = results["preresized"]["samples_per_sec"] / results["rec_resize_img"]["samples_per_sec"]
+
+    # ความต่างของ tensor: pad 128 vs 127.5 (gray-png ต่างมากกว่าเพราะตัดสีออก)
+    max_diff = 0.0
+    for raw_path, preresized_path in pairs[:50]:
+        before = _rec_resize_norm(decode(raw_path), image_shape)
+        after = _normalize_chw(decode(preresized_path))
+        max_diff = max(max_diff, float(np.abs(before - after).max()))
+    results["max_abs_diff"] = max_diff
+
+    return results
+
+
+def print_loader_benchmark(results: Dict):
+    """แสดงผล benchmark"""
+    if "speedup" not in results:
+        print("⚠️ Loader benchmark skipped: no matching images")
+        return
+    print(f"⏱️ Data-loader transform benchmark ({results['samples']:,} samples, shape {results['image_shape']})")
+    print(f"  • RecResizeImg : {results['rec_resize_img']['samples_per_sec']:>10,.0f} samples/sec")
+    print(f"  • Pre-resized  : {results['preresized']['samples_per_sec']:>10,.0f} samples/sec")
+    print(f"  🚀 Speedup: {results['speedup']:.1f}x (max |Δ| = {results['max_abs_diff']:.4f})")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="📐 Benchmark RecResizeImg vs pre-resized images")
+    parser.add_argument("raw_dir", type=str, help="Directory with the original images")
+    parser.add_argument("preresized_dir", type=str, help="Directory with the pre-resized images (same stems)")
+    parser.add_argument("--image-shape", type=parse_image_shape, default=[3, 32, 100],
+                       help="C,H,W of the model input (default: 3,32,100)")
+    parser.add_argument("--samples", type=int, default=2000)
+
+    args = parser.parse_args()
+
+    preresized = {p.stem: p for p in Path(args.preresized_dir).iterdir() if p.is_file()}
+    raw_paths, preresized_paths = [], []
+    for raw_path in sorted(Path(args.raw_dir).iterdir()):
+        if raw_path.stem in preresized:
+            raw_paths.append(raw_path)
+            preresized_paths.append(preresized[raw_path.stem])
+
+    if not raw_paths:
+        print("❌ No matching images between the two directories")
+        sys.exit(1)
+
+    print_loader_benchmark(benchmark_loader(raw_paths, preresized_paths, args.image_shape, args.samples))
+
+
+if __name__ == "__main__":
+    main()
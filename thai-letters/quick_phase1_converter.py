@@ -11,6 +11,7 @@ import os
 import sys
 from pathlib import Path
 from phase1_paddleocr_converter import PaddleOCRDatasetConverter
+from label_index import count_labels
 
 def find_existing_datasets():
     """หา dataset ที่มีอยู่ใน thai-letters/ และ datasets/raw/"""
@@ -72,8 +73,7 @@ def show_menu(datasets):
         # Get dataset info
         labels_file = dataset / "labels.txt"
         if labels_file.exists():
-            with open(labels_file, 'r', encoding='utf-8') as f:
-                label_count = len(f.readlines())
+            label_count = count_labels(labels_file)
         else:
             label_count = 0
         